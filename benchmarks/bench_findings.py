@@ -0,0 +1,81 @@
+"""
+Compares the memory held by a scan's findings as plain dicts and as Finding objects.
+
+Usage: python benchmarks/bench_findings.py [--findings 200000] [--files 2000]
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import random
+import string
+import time
+import tracemalloc
+
+from aminscan.findings import Finding
+from aminscan.secrets_scanner import dedupe_findings, entropy_finding, line_hash, mask_evidence
+
+
+def tokens(n: int, seed: int = 1) -> list[tuple[str, int, str]]:
+    rnd = random.Random(seed)
+    alphabet = string.ascii_letters + string.digits
+    out = []
+    for _ in range(n):
+        tok = "".join(rnd.choice(alphabet) for _ in range(32))
+        out.append((tok, rnd.randrange(1, 5000), f"key = '{tok}'"))
+    return out
+
+
+def as_dicts(hits: list[tuple[str, int, str]], files: list[str]) -> list[dict]:
+    # The pre-Finding representation, one dict per hit
+    return [{
+        "rule_id": "SEC-ENTROPY-TOKEN",
+        "title": "Possible high-entropy secret/token (heuristic)",
+        "severity": "medium",
+        "confidence": "medium",
+        # Each file's findings come back from a worker with their own copy of the path
+        "file": "".join(files[i % len(files)]),
+        "line": line_no,
+        "evidence_masked": mask_evidence(tok),
+        "recommendation": "If this is a real secret, rotate it and move it to environment variables/secret manager.",
+        "line_hash": line_hash(line),
+    } for i, (tok, line_no, line) in enumerate(hits)]
+
+
+def as_findings(hits: list[tuple[str, int, str]], files: list[str]) -> list[Finding]:
+    return [entropy_finding("".join(files[i % len(files)]), line_no, tok, line) for i, (tok, line_no, line) in enumerate(hits)]
+
+
+def measure(build) -> tuple[int, float, list]:
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    findings = dedupe_findings(build())
+    seconds = time.perf_counter() - t0
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, seconds, findings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--findings", type=int, default=200_000)
+    parser.add_argument("--files", type=int, default=2_000)
+    args = parser.parse_args()
+
+    hits = tokens(args.findings)
+    files = [f"/home/ci/build/workspace/project/src/module_{i:05d}/generated_fixture.py" for i in range(args.files)]
+
+    dict_bytes, dict_seconds, dicts = measure(lambda: as_dicts(hits, files))
+    del dicts
+    slot_bytes, slot_seconds, findings = measure(lambda: as_findings(hits, files))
+    assert [f.to_record() for f in findings[:100]] == as_dicts(hits[:100], files)
+
+    print(f"{'representation':<16} {'MB':>8} {'bytes/finding':>14} {'build+dedupe (s)':>17}")
+    for name, size, seconds in (("dict", dict_bytes, dict_seconds), ("Finding", slot_bytes, slot_seconds)):
+        print(f"{name:<16} {size / 1e6:>8.1f} {size / args.findings:>14.0f} {seconds:>17.3f}")
+    print(f"{dict_bytes / slot_bytes:.1f}x less memory")
+
+
+if __name__ == "__main__":
+    main()
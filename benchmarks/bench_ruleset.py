@@ -0,0 +1,91 @@
+"""
+Compares the per-line rule loop with RuleSet's keyword prefilter as the rule count grows.
+
+Usage: python benchmarks/bench_ruleset.py [--lines 20000] [--repeat 3]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import time
+
+from aminscan.secrets_rules import RULES, RuleSet, SecretRule
+
+
+def synthetic_rules(n: int) -> list[SecretRule]:
+    rules = list(RULES)
+    for i in range(max(0, n - len(rules))):
+        prefix = f"tk{i:03d}_"
+        rules.append(SecretRule(
+            id=f"BENCH-{i:03d}",
+            title=f"Synthetic token {i}",
+            severity="medium",
+            pattern=re.compile(rf"\b{prefix}[A-Za-z0-9]{{24}}\b"),
+            recommendation="n/a",
+            keywords=(prefix,),
+        ))
+    return rules
+
+
+def synthetic_text(lines: int, seed: int = 1) -> str:
+    rnd = random.Random(seed)
+    filler = [
+        "def handler(event, context):",
+        "    return {'statusCode': 200, 'body': json.dumps(payload)}",
+        "const config = require('./config');",
+        "    url: https://example.com/api/v1/items?page=2",
+        "# TODO: remove once the migration is done",
+    ]
+    out = []
+    for i in range(lines):
+        if i % 500 == 0:
+            out.append(f"AWS_KEY = 'AKIA{rnd.randrange(10**16):016d}'")
+        elif i % 700 == 0:
+            out.append(f"token = 'tk001_{'a1B2' * 6}'")
+        else:
+            out.append(rnd.choice(filler))
+    return "\n".join(out)
+
+
+def per_line(rules: list[SecretRule], text: str) -> int:
+    hits = 0
+    for line in text.splitlines():
+        for rule in rules:
+            if rule.pattern.search(line):
+                hits += 1
+    return hits
+
+
+def prefiltered(ruleset: RuleSet, text: str) -> int:
+    return sum(1 for _ in ruleset.scan(text))
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = synthetic_text(args.lines)
+    print(f"{'rules':>6} {'per-line (s)':>13} {'ruleset (s)':>12} {'speedup':>8}")
+    for n in (6, 24, 96, 192):
+        rules = synthetic_rules(n)
+        ruleset = RuleSet(rules)
+        assert per_line(rules, text) == prefiltered(ruleset, text)
+        slow = best_of(lambda: per_line(rules, text), args.repeat)
+        fast = best_of(lambda: prefiltered(ruleset, text), args.repeat)
+        print(f"{n:>6} {slow:>13.4f} {fast:>12.4f} {slow / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Measures CLI startup: the cumulative `-X importtime` of aminscan.cli and the wall
+time of `aminscan scan` on an empty folder, interpreter startup included.
+
+Usage: python benchmarks/bench_startup.py [--repeat 5]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+def run(args: list[str], env: dict[str, str]) -> tuple[int | None, float]:
+    """
+    Runs python -X importtime; returns (cumulative us of aminscan.cli, wall seconds).
+    """
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", *args], env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - t0
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and line.endswith("| aminscan.cli"):
+            return int(line.split("|")[1]), wall
+    return None, wall
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = Path(tmp) / "repo"
+        repo.mkdir()
+        (repo / ".aminscan.yml").write_text("fail_on: critical\n", encoding="utf-8")
+        env = {k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"}
+        env["XDG_CACHE_HOME"] = str(Path(tmp) / "xdg")
+
+        workloads = {
+            "import aminscan.cli": ["-c", "import aminscan.cli"],
+            "scan of an empty repo": ["-m", "aminscan", "scan", "--path", str(repo)],
+        }
+        for name, cmd in workloads.items():
+            # Warm-up run writes the bytecode and the parsed config cache
+            run(cmd, env)
+            results = [run(cmd, env) for _ in range(args.repeat)]
+            import_us = min(us for us, _ in results if us is not None)
+            wall = min(w for _, w in results)
+            print(f"{name:<24} import {import_us / 1000:7.1f} ms   wall {wall * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Compares the scandir walker (with pruning) against the previous rglob + fnmatch walker.
+
+Usage: python benchmarks/bench_walker.py [--packages 40] [--repeat 3]
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from fnmatch import fnmatch
+from pathlib import Path
+
+from aminscan.file_utils import TEXT_EXTS, iter_text_files, load_ignore_patterns
+
+
+def legacy_iter_text_files(base: Path, patterns: list[str]):
+    for p in base.rglob("*"):
+        if not p.is_file():
+            continue
+        rel = p.relative_to(base).as_posix()
+        if any(fnmatch(rel, pat) for pat in patterns):
+            continue
+        if p.suffix.lower() in TEXT_EXTS or (p.suffix == "" and p.stat().st_size < 200_000):
+            yield p
+
+
+def build_tree(root: Path, packages: int) -> None:
+    """
+    A JS-monorepo shape: a little source per package, a lot of node_modules.
+    """
+    for i in range(packages):
+        pkg = root / "packages" / f"pkg{i}"
+        (pkg / "src").mkdir(parents=True)
+        for j in range(10):
+            (pkg / "src" / f"mod{j}.ts").write_text("export const x = 1;\n")
+        for d in range(15):
+            dep = pkg / "node_modules" / f"dep{d}" / "lib" / "sub"
+            dep.mkdir(parents=True)
+            for k in range(8):
+                (dep / f"f{k}.js").write_text("module.exports = {};\n")
+            (dep.parent / "LICENSE").write_text("MIT\n")
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--packages", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        build_tree(root, args.packages)
+        patterns = load_ignore_patterns(root)
+
+        legacy = sorted(legacy_iter_text_files(root, patterns))
+        assert legacy == sorted(iter_text_files(root, patterns))
+
+        results = {
+            "rglob + fnmatch": best_of(lambda: list(legacy_iter_text_files(root, patterns)), args.repeat),
+            "scandir": best_of(lambda: list(iter_text_files(root, patterns)), args.repeat),
+            "scandir, 4 threads": best_of(lambda: list(iter_text_files(root, patterns, threads=4)), args.repeat),
+        }
+        base_time = results["rglob + fnmatch"]
+        print(f"{len(legacy)} files kept")
+        for name, t in results.items():
+            print(f"{name:<20} {t:8.4f}s {base_time / t:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Regression gate: compares a benchmark result file against a stored baseline.
+
+Exits with status 1 when any workload's throughput (items/sec and MB/sec) drops
+by more than `--threshold` relative to the baseline. Peak RSS growth is reported
+and only gates when `--rss-threshold` is given.
+
+Usage: python benchmarks/compare.py BASELINE.json CURRENT.json [--threshold 0.10]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+METRICS = ("items_per_s", "mb_per_s")
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float,
+    rss_threshold: float | None = None,
+) -> List[str]:
+    """
+    Returns one message per regression; an empty list means the gate passes.
+    """
+    failures: List[str] = []
+    base_results = baseline.get("results", {})
+    for name, cur in current.get("results", {}).items():
+        base = base_results.get(name)
+        if base is None:
+            print(f"{name:<22} (no baseline)")
+            continue
+
+        ratios = {m: cur[m] / base[m] for m in METRICS if base.get(m)}
+        rss_ratio = cur["peak_rss_kb"] / base["peak_rss_kb"] if base.get("peak_rss_kb") else 1.0
+        print(
+            f"{name:<22} "
+            + " ".join(f"{m} {r - 1:+7.1%}" for m, r in ratios.items())
+            + f"  rss {rss_ratio - 1:+7.1%}"
+        )
+
+        for m, r in ratios.items():
+            if r < 1 - threshold:
+                failures.append(f"{name}: {m} {base[m]:.1f} -> {cur[m]:.1f} ({r - 1:+.1%})")
+        if rss_threshold is not None and rss_ratio > 1 + rss_threshold:
+            failures.append(f"{name}: peak RSS {base['peak_rss_kb']} -> {cur['peak_rss_kb']} KiB ({rss_ratio - 1:+.1%})")
+
+    if baseline.get("corpus", {}).get("spec") != current.get("corpus", {}).get("spec"):
+        print("warning: corpus spec differs from the baseline; numbers are not directly comparable")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("current", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed throughput drop (fraction)")
+    parser.add_argument("--rss-threshold", type=float, default=None, help="allowed peak RSS growth (fraction)")
+    args = parser.parse_args()
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    current = json.loads(args.current.read_text(encoding="utf-8"))
+    failures = compare(baseline, current, args.threshold, args.rss_threshold)
+
+    if failures:
+        print(f"\n{len(failures)} regression(s) beyond {args.threshold:.0%}:")
+        for msg in failures:
+            print(f"- {msg}")
+        sys.exit(1)
+    print("\nNo regressions.")
+
+
+if __name__ == "__main__":
+    main()
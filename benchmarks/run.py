@@ -0,0 +1,152 @@
+"""
+Runs the benchmark suite against a synthetic corpus and writes the results as JSON.
+
+Each workload runs in a fresh interpreter so its peak RSS is its own. Throughput
+is reported as items/sec (files, tokens or findings) and MB/sec.
+
+Usage: python benchmarks/run.py [--out results.json] [--files 2000] [--corpus DIR] [--repeat 3]
+Compare two result files with benchmarks/compare.py.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import CorpusSpec, generate  # noqa: E402
+
+from aminscan.cli import VERSION, render_json, render_markdown  # noqa: E402
+from aminscan.entropy import TOKEN_RE, shannon_entropy  # noqa: E402
+from aminscan.file_utils import iter_text_files, load_ignore_patterns  # noqa: E402
+from aminscan.secrets_scanner import scan_secrets, scan_text  # noqa: E402
+
+WORKLOADS = [
+    "iter_text_files", "scan_secrets", "scan_secrets_parallel", "scan_long_line", "shannon_entropy", "render_markdown", "render_json",
+]
+
+# A workload returns a callable to time plus the (items, bytes) it processes per call
+Prepared = Tuple[Callable[[], Any], int, int]
+
+
+def _corpus_bytes(root: Path) -> Tuple[int, int]:
+    files = list(iter_text_files(root, load_ignore_patterns(root)))
+    return len(files), sum(p.stat().st_size for p in files)
+
+
+def prepare(name: str, root: Path) -> Prepared:
+    if name == "iter_text_files":
+        patterns = load_ignore_patterns(root)
+        n, size = _corpus_bytes(root)
+        return (lambda: list(iter_text_files(root, patterns))), n, size
+    if name == "scan_secrets":
+        n, size = _corpus_bytes(root)
+        return (lambda: scan_secrets(root, jobs=1)), n, size
+    if name == "scan_secrets_parallel":
+        n, size = _corpus_bytes(root)
+        return (lambda: scan_secrets(root, jobs=0)), n, size
+    if name == "scan_long_line":
+        # A minified JSON blob: every token is a hit on the same ~1 MB line
+        rnd = random.Random(0)
+        alphabet = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+        tokens = ["".join(rnd.choice(alphabet) for _ in range(40)) for _ in range(20_000)]
+        text = "{" + ", ".join(f'"k{i}": "{t}"' for i, t in enumerate(tokens)) + "}\n"
+        return (lambda: scan_text(root / "blob.json", text)), len(tokens), len(text.encode("utf-8"))
+    if name == "shannon_entropy":
+        tokens = []
+        for fp in iter_text_files(root, load_ignore_patterns(root)):
+            tokens.extend(TOKEN_RE.findall(fp.read_text(encoding="utf-8", errors="ignore")))
+        return (lambda: [shannon_entropy(t) for t in tokens]), len(tokens), sum(map(len, tokens))
+    if name in ("render_markdown", "render_json"):
+        findings = scan_secrets(root, jobs=1)
+        size = len(render_json(findings, {}, VERSION).encode("utf-8"))
+        if name == "render_markdown":
+            return (lambda: render_markdown(findings)), len(findings), size
+        return (lambda: render_json(findings, {"path": str(root)}, VERSION)), len(findings), size
+    raise ValueError(f"unknown workload: {name}")
+
+
+def run_worker(name: str, root: Path, repeat: int) -> Dict[str, Any]:
+    fn, items, nbytes = prepare(name, root)
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    # ru_maxrss is in KiB on Linux; pool workers are reaped, so they show up under CHILDREN
+    rss = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    if sys.platform == "darwin":
+        rss //= 1024
+    return {
+        "seconds": best,
+        "items": items,
+        "bytes": nbytes,
+        "items_per_s": items / best if best else 0.0,
+        "mb_per_s": nbytes / best / 1e6 if best else 0.0,
+        "peak_rss_kb": rss,
+    }
+
+
+def run_isolated(name: str, root: Path, repeat: int) -> Dict[str, Any]:
+    proc = subprocess.run(
+        [sys.executable, __file__, "--worker", name, "--corpus", str(root), "--repeat", str(repeat)],
+        stdout=subprocess.PIPE,
+        check=True,
+    )
+    return json.loads(proc.stdout)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", type=Path, default=Path("benchmark-results.json"))
+    parser.add_argument("--files", type=int, default=CorpusSpec.files)
+    parser.add_argument("--seed", type=int, default=CorpusSpec.seed)
+    parser.add_argument("--corpus", type=Path, help="reuse (or create) the corpus in this directory")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", action="append", choices=WORKLOADS, help="run only these workloads")
+    parser.add_argument("--worker", choices=WORKLOADS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.corpus, args.repeat)))
+        return
+
+    with tempfile.TemporaryDirectory(prefix="aminscan-bench-") as tmp:
+        # The manifest sits next to the scanned tree so it is not part of the corpus
+        corpus_dir = args.corpus or Path(tmp)
+        root = corpus_dir / "tree"
+        manifest_fp = corpus_dir / "manifest.json"
+        if manifest_fp.exists():
+            manifest = json.loads(manifest_fp.read_text(encoding="utf-8"))
+        else:
+            root.mkdir(parents=True, exist_ok=True)
+            manifest = generate(root, CorpusSpec(files=args.files, seed=args.seed))
+            manifest_fp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+        results: Dict[str, Any] = {}
+        for name in args.only or WORKLOADS:
+            results[name] = r = run_isolated(name, root, args.repeat)
+            print(f"{name:<22} {r['seconds']:8.3f}s {r['items_per_s']:12.1f} items/s {r['mb_per_s']:8.2f} MB/s {r['peak_rss_kb'] / 1024:8.1f} MB RSS")
+
+    payload = {
+        "version": VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "corpus": manifest,
+        "results": results,
+    }
+    args.out.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import io
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Iterator, Tuple
+
+from .classify import BINARY_EXTS, SNIFF_BLOCK, looks_binary
+from .config import AminScanConfig
+from .file_utils import _suffix, archive_kind
+
+# Archive members are addressed as "<archive>!/<member path>"
+MEMBER_SEP = "!/"
+
+# Extension-less members with these magic numbers are nested tars (OCI layer blobs have no name)
+GZIP_MAGIC = b"\x1f\x8b"
+TAR_MAGIC_OFFSET = 257
+
+
+def archive_errors() -> Tuple[type, ...]:
+    """
+    Exceptions that mean a corrupt or truncated archive. The archive modules are
+    imported on first use, since most scans never meet an archive.
+    """
+    import lzma
+    import tarfile
+    import zipfile
+    import zlib
+
+    return (zipfile.BadZipFile, zipfile.LargeZipFile, tarfile.TarError, EOFError, OSError, zlib.error, lzma.LZMAError)
+
+
+@dataclass(frozen=True)
+class ArchiveLimits:
+    """
+    How deep and how much of an archive is read. Everything stays in memory:
+    text members over `max_member_bytes` are skipped, nested tars are streamed,
+    and nested zips (which need random access) are read only up to `max_nested_zip_bytes`.
+    """
+
+    max_depth: int = 3
+    max_member_bytes: int = 8 * 1024 * 1024
+    max_nested_zip_bytes: int = 64 * 1024 * 1024
+
+    @classmethod
+    def from_config(cls, config: AminScanConfig) -> "ArchiveLimits | None":
+        if not config.archives:
+            return None
+        return cls(max_depth=config.archive_depth, max_member_bytes=config.archive_member_bytes)
+
+
+class ArchiveReader:
+    """
+    Streams the text members of an archive, recursing into nested archives.
+    Members are classified like walked files (see classify.py).
+    `skipped` counts members and archives left out because of a limit or corruption.
+    """
+
+    def __init__(self, limits: ArchiveLimits):
+        self.limits = limits
+        self.skipped = 0
+
+    def members(self, fp: Path) -> Iterator[Tuple[str, bytes]]:
+        """
+        Yields (display path, content) for each text member, in archive order.
+        """
+        kind = archive_kind(fp.name)
+        if kind is None:
+            return
+        with open(fp, "rb") as fh:
+            yield from self._open(fh, kind, str(fp), 1)
+
+    def _open(self, fh: IO[bytes], kind: str, display: str, depth: int) -> Iterator[Tuple[str, bytes]]:
+        try:
+            if kind == "zip":
+                yield from self._zip(fh, display, depth)
+            else:
+                yield from self._tar(fh, display, depth)
+        except archive_errors():
+            # Corrupt or truncated: keep what was read so far
+            self.skipped += 1
+
+    def _zip(self, fh: IO[bytes], display: str, depth: int) -> Iterator[Tuple[str, bytes]]:
+        import zipfile
+
+        with zipfile.ZipFile(fh) as zf:
+            for info in zf.infolist():
+                if info.is_dir():
+                    continue
+                with zf.open(info) as member:
+                    yield from self._member(member, info.filename, info.file_size, display, depth)
+
+    def _tar(self, fh: IO[bytes], display: str, depth: int) -> Iterator[Tuple[str, bytes]]:
+        import tarfile
+
+        # Stream mode reads the archive front to back, so a multi-GB layer is never held or seeked
+        with tarfile.open(fileobj=fh, mode="r|*") as tf:
+            for info in tf:
+                if not info.isfile():
+                    continue
+                member = tf.extractfile(info)
+                if member is not None:
+                    yield from self._member(member, info.name, info.size, display, depth)
+
+    def _member(self, member: IO[bytes], name: str, size: int, display: str, depth: int) -> Iterator[Tuple[str, bytes]]:
+        name = name.lstrip("/")
+        if name.startswith("./"):
+            name = name[2:]
+        path = f"{display}{MEMBER_SEP}{name}"
+
+        kind = archive_kind(name)
+        suffix = _suffix(name.rsplit("/", 1)[-1])
+        if kind is None and suffix in BINARY_EXTS:
+            return
+        head = b"" if kind else member.read(SNIFF_BLOCK)
+        if kind is None and not suffix:
+            kind = _sniff_tar(head)
+        if kind is not None:
+            yield from self._nested(_Prefixed(head, member), kind, size, path, depth)
+            return
+
+        if looks_binary(head):
+            return
+        if size > self.limits.max_member_bytes:
+            self.skipped += 1
+            return
+        data = head + member.read(self.limits.max_member_bytes + 1 - len(head))
+        if len(data) > self.limits.max_member_bytes:
+            self.skipped += 1
+            return
+        yield path, data
+
+    def _nested(self, member: IO[bytes], kind: str, size: int, path: str, depth: int) -> Iterator[Tuple[str, bytes]]:
+        if depth >= self.limits.max_depth:
+            self.skipped += 1
+            return
+        if kind == "zip":
+            if size > self.limits.max_nested_zip_bytes:
+                self.skipped += 1
+                return
+            member = io.BytesIO(member.read())
+        yield from self._open(member, kind, path, depth + 1)
+
+
+def _sniff_tar(head: bytes) -> str | None:
+    if head.startswith(GZIP_MAGIC) or head[TAR_MAGIC_OFFSET:TAR_MAGIC_OFFSET + 5] == b"ustar":
+        return "tar"
+    return None
+
+
+class _Prefixed(io.RawIOBase):
+    """
+    Read-only stream of `head` followed by the rest of `stream`, for sniffed members.
+    """
+
+    def __init__(self, head: bytes, stream: IO[bytes]):
+        self._head = head
+        self._stream = stream
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, n: int = -1) -> bytes:
+        if self._head:
+            if n is None or n < 0:
+                data, self._head = self._head + self._stream.read(), b""
+                return data
+            data, self._head = self._head[:n], self._head[n:]
+            return data
+        return self._stream.read(n)
+
+    def readinto(self, b: bytearray) -> int:  # type: ignore[override]
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
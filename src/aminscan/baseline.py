@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator
+
+from .findings import Finding
+
+# A binary extension (classify.BINARY_EXTS), so the walker never opens it
+DEFAULT_BASELINE_FILE = ".aminscan-baseline.bin"
+
+# Header: magic, format version, entry count; followed by sorted big-endian uint64 fingerprints
+MAGIC = b"AMSBASE"
+FORMAT = 1
+HEADER = struct.Struct(">7sBQ")
+
+
+class BaselineError(ValueError):
+    pass
+
+
+def fingerprint(f: Dict[str, Any], base: Path | None = None) -> int:
+    """
+    64-bit id of a finding that survives line shifts: rule, path relative to
+    `base`, masked evidence and the hash of the (whitespace-normalized) line.
+    """
+    where = f.get("file")
+    if where:
+        where = _relative(str(where), base)
+    else:
+        where = f.get("target") or ""
+    # Findings keep the hash as an attribute, out of the report keys; stored records have it as a key
+    line = f.line_hash if isinstance(f, Finding) else f.get("line_hash")
+    key = "\0".join((f.get("rule_id") or "", where, f.get("evidence_masked") or "", line or ""))
+    return int.from_bytes(hashlib.sha256(key.encode("utf-8")).digest()[:8], "big")
+
+
+def _relative(file: str, base: Path | None) -> str:
+    p = Path(file)
+    if base is not None and p.is_absolute():
+        try:
+            return p.relative_to(base).as_posix()
+        except ValueError:
+            pass
+    return p.as_posix()
+
+
+class Baseline:
+    """
+    Set of accepted finding fingerprints; `filter` drops known findings as they stream past.
+    """
+
+    def __init__(self, fingerprints: Iterable[int], base: Path | None = None, path: Path | None = None):
+        self.fingerprints = set(fingerprints)
+        self.base = base
+        self.path = path
+        self.suppressed = 0
+
+    @classmethod
+    def load(cls, path: Path, base: Path | None = None) -> "Baseline":
+        try:
+            data = path.read_bytes()
+        except OSError as e:
+            raise BaselineError(f"cannot read baseline {path}: {e.strerror or e}")
+        if len(data) < HEADER.size:
+            raise BaselineError(f"{path} is not an AminScan baseline")
+        magic, version, count = HEADER.unpack_from(data)
+        if magic != MAGIC or version != FORMAT or len(data) != HEADER.size + 8 * count:
+            raise BaselineError(f"{path} is not an AminScan baseline (or was written by another version)")
+
+        entries = array("Q")
+        entries.frombytes(data[HEADER.size:])
+        if sys.byteorder == "little":
+            entries.byteswap()
+        return cls(entries, base, path)
+
+    def __len__(self) -> int:
+        return len(self.fingerprints)
+
+    def __contains__(self, f: Dict[str, Any]) -> bool:
+        return fingerprint(f, self.base) in self.fingerprints
+
+    def filter(self, findings: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        for f in findings:
+            if fingerprint(f, self.base) in self.fingerprints:
+                self.suppressed += 1
+                continue
+            yield f
+
+    def stats(self) -> Dict[str, Any]:
+        return {"path": str(self.path) if self.path else None, "entries": len(self), "suppressed": self.suppressed}
+
+
+def write_baseline(path: Path, findings: Iterable[Dict[str, Any]], base: Path | None = None) -> int:
+    """
+    Writes the fingerprints of `findings` and returns how many distinct ones were stored.
+    """
+    entries = array("Q", sorted({fingerprint(f, base) for f in findings}))
+    if sys.byteorder == "little":
+        entries.byteswap()
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as fh:
+        fh.write(HEADER.pack(MAGIC, FORMAT, len(entries)))
+        fh.write(entries.tobytes())
+    os.replace(tmp, path)
+    return len(entries)
@@ -0,0 +1,406 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Tuple
+
+from .archives import ArchiveLimits
+from .baseline import Baseline
+from .budget import ScanBudget
+from .classify import FileClassifier, FileTypes
+from .config import load_config
+from .entropy import SafeTokens
+from .file_utils import iter_text_files, load_ignore_patterns
+from .findings import Finding
+from .rule_packs import RuleError, load_ruleset
+from .secrets_rules import RuleSet
+from .secrets_scanner import MAX_BATCH_SIZE, FileScan, ScanTally, _scan_task, dedupe_findings, resolve_jobs
+from .sharding import FILE_COST_BYTES
+from .streaming import SEVERITY_ORDER
+
+# Work unit size: files of one repository adding up to about this many bytes (see FILE_COST_BYTES)
+BATCH_BYTES = 4 * 1024 * 1024
+# Units in flight per worker; enough to keep workers busy while the next repository is walked
+QUEUE_PER_WORKER = 4
+# Compiled repository settings a worker keeps (identical configs share one entry)
+WORKER_SETTINGS = 64
+
+CHECKPOINT_FILE = "checkpoint.jsonl"
+# Bump when checkpoint entries change, so old checkpoints are not resumed from
+CHECKPOINT_FORMAT = 1
+
+
+class BatchError(ValueError):
+    pass
+
+
+def load_roots(path: Path) -> List[Path]:
+    """
+    Reads one repository path per line; blank lines and # comments are skipped.
+    Relative paths are relative to the file's directory. Duplicates are dropped.
+    """
+    roots: List[Path] = []
+    seen = set()
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        root = (path.parent / Path(line).expanduser()).resolve()
+        if root not in seen:
+            seen.add(root)
+            roots.append(root)
+    return roots
+
+
+def report_name(root: Path) -> str:
+    """
+    File name of a repository's report: its folder name plus a hash of the full path,
+    so repositories with the same name do not overwrite each other.
+    """
+    digest = hashlib.sha256(str(root).encode("utf-8")).hexdigest()[:8]
+    return f"{root.name or 'root'}-{digest}.json"
+
+
+@dataclass(frozen=True)
+class RepoSettings:
+    """
+    What a worker needs to scan the files of one repository.
+    """
+
+    ruleset: RuleSet
+    use_entropy: bool
+    budget: ScanBudget | None
+    archives: ArchiveLimits | None
+    safe_tokens: SafeTokens
+
+
+@dataclass
+class RepoScan:
+    """
+    Outcome of one repository. With `error` set (e.g. a broken config), nothing was scanned.
+    """
+
+    root: Path
+    findings: List[Finding] = field(default_factory=list)
+    meta: Dict[str, Any] = field(default_factory=dict)
+    # The repository's own fail_on, which applies unless the command line sets one
+    fail_on: str = "high"
+    files: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    error: str | None = None
+
+
+class _Repo:
+    """
+    Scheduler state of a repository between its walk and its last unit.
+    """
+
+    def __init__(self, root: Path, use_entropy: bool):
+        self.root = root
+        self.t0 = time.perf_counter()
+        self.scan = RepoScan(root)
+        self.units: List[List[Path]] = []
+        self.results: Dict[int, List[FileScan]] = {}
+        self.error: str | None = None
+        self.finished = False
+        try:
+            self._open(use_entropy)
+        # One broken repository (missing, unreadable, invalid config) must not stop the batch
+        except RuleError as e:
+            self.error = f"Invalid rules: {e}"
+        except Exception as e:
+            self.error = str(e) or type(e).__name__
+
+    def _open(self, use_entropy: bool) -> None:
+        root = self.root
+        if not root.is_dir():
+            raise BatchError(f"Path not found: {root}")
+        config = load_config(root)
+        # Checked here: a bad value would otherwise only surface when the summary is built
+        if config.fail_on not in SEVERITY_ORDER:
+            raise BatchError(f"invalid fail_on {config.fail_on!r} in .aminscan.yml (use {', '.join(SEVERITY_ORDER)})")
+        self.scan.fail_on = config.fail_on
+        settings = RepoSettings(
+            ruleset=load_ruleset(root, config),
+            use_entropy=config.entropy and use_entropy,
+            budget=ScanBudget.from_config(config),
+            archives=ArchiveLimits.from_config(config),
+            safe_tokens=SafeTokens.from_config(config),
+        )
+        # Config paths are relative to the scanned path
+        self.baseline = Baseline.load(root / config.baseline, root) if config.baseline else None
+        # Pickled once per repository; workers unpickle (and compile) it once per distinct config
+        self.settings = pickle.dumps(settings)
+        self.key = hashlib.sha256(self.settings).hexdigest()[:16]
+
+        ignore = load_ignore_patterns(root, config.extra_ignores)
+        classifier = FileClassifier(FileTypes.from_config(config), archives=settings.archives is not None)
+        batch: List[Path] = []
+        cost = 0
+        for fp in iter_text_files(root, ignore, accept=classifier.accept):
+            try:
+                size = fp.stat().st_size
+            except OSError:
+                size = 0
+            self.scan.files += 1
+            self.scan.bytes += size
+            batch.append(fp)
+            cost += size + FILE_COST_BYTES
+            if cost >= BATCH_BYTES or len(batch) >= MAX_BATCH_SIZE:
+                self.units.append(batch)
+                batch, cost = [], 0
+        if batch:
+            self.units.append(batch)
+        # Counted after the walk, which is when the classifier has seen every file
+        self.tally = ScanTally(root, classifier, settings.budget, settings.use_entropy, settings.safe_tokens)
+        self.scan.meta = {"scanned_path": str(root), "url": None, "entropy_enabled": settings.use_entropy}
+
+    @property
+    def complete(self) -> bool:
+        return self.error is not None or len(self.results) == len(self.units)
+
+    def add(self, seq: int, results: List[FileScan]) -> bool:
+        """
+        Stores the results of unit `seq`; returns whether the repository just became complete.
+        """
+        self.results[seq] = results
+        return self.complete and not self.finished
+
+    def fail(self, error: BaseException) -> bool:
+        """
+        Records a unit that raised; the repository is reported with that error and
+        its other units are dropped. Returns whether it just became complete.
+        """
+        if self.error is None:
+            self.error = f"Scan failed: {str(error) or type(error).__name__}"
+        return not self.finished
+
+    def finish(self) -> RepoScan:
+        self.finished = True
+        scan = self.scan
+        scan.seconds = time.perf_counter() - self.t0
+        if self.error is not None:
+            scan.error = self.error
+            return scan
+        # Units are reassembled in walk order; deduplicating per file is the same as per repository
+        findings: List[Finding] = []
+        for seq in range(len(self.units)):
+            for result in self.results[seq]:
+                self.tally.add(result)
+                findings.extend(dedupe_findings(result.findings or []))
+        scan.findings = list(self.baseline.filter(findings)) if self.baseline is not None else findings
+        self.tally.report(scan.meta)
+        if self.baseline is not None:
+            scan.meta["baseline"] = self.baseline.stats()
+        self.results.clear()
+        return scan
+
+
+_worker_settings: Dict[str, RepoSettings] = {}
+
+
+def _scan_unit(key: str, settings: bytes, base: Path, paths: List[Path]) -> List[FileScan]:
+    s = _worker_settings.get(key)
+    if s is None:
+        if len(_worker_settings) >= WORKER_SETTINGS:
+            _worker_settings.clear()
+        s = _worker_settings[key] = pickle.loads(settings)
+    return [
+        _scan_task(fp, s.use_entropy, ruleset=s.ruleset, base=base, budget=s.budget, archives=s.archives, safe_tokens=s.safe_tokens)
+        for fp in paths
+    ]
+
+
+class BatchScan:
+    """
+    Scans many repositories with one shared worker pool.
+
+    Each repository is set up from its own `.aminscan.yml` and `.aminscanignore`
+    (rules, budget, archives, safe tokens, baseline), as `aminscan scan` would.
+    Its files are cut into units of about BATCH_BYTES, and units of all repositories
+    go through one queue, so a worker that finishes early takes the next unit
+    whatever repository it belongs to: a huge repository does not leave workers
+    idle and thousands of tiny ones do not each pay for a pool.
+
+    Repositories are walked one at a time while the workers scan the units
+    already queued. run() yields each repository once its last unit is back, so
+    results arrive roughly in the order of `roots`. Working-tree scans only:
+    the per-repository scan cache and the git modes are not used.
+    """
+
+    def __init__(self, roots: Iterable[Path], use_entropy: bool = True, jobs: int | None = None):
+        self.roots = list(roots)
+        self.use_entropy = use_entropy
+        self.jobs = jobs
+
+    def _repos(self) -> Iterator[_Repo]:
+        for root in self.roots:
+            yield _Repo(root, self.use_entropy)
+
+    def run(self) -> Iterator[RepoScan]:
+        jobs = resolve_jobs(self.jobs)
+        if jobs <= 1:
+            for repo in self._repos():
+                for seq, paths in enumerate(repo.units):
+                    if repo.error is not None:
+                        break
+                    try:
+                        repo.add(seq, _scan_unit(repo.key, repo.settings, repo.root, paths))
+                    # Only this repository fails, as it would on its own
+                    except Exception as e:
+                        repo.fail(e)
+                yield repo.finish()
+            return
+
+        # Imported here: multiprocessing is a noticeable share of startup for small (pre-commit) scans
+        from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+
+        repos = self._repos()
+        queue: Deque[Tuple[_Repo, int, List[Path]]] = deque()
+        in_flight: Dict[Future, Tuple[_Repo, int]] = {}
+        window = jobs * QUEUE_PER_WORKER
+        ex = ProcessPoolExecutor(max_workers=jobs)
+        try:
+            while True:
+                # Keep the window full, walking the next repository when the queue runs dry
+                while len(in_flight) < window:
+                    if not queue:
+                        repo = next(repos, None)
+                        if repo is None:
+                            break
+                        if repo.complete:
+                            yield repo.finish()
+                        else:
+                            queue.extend((repo, seq, paths) for seq, paths in enumerate(repo.units))
+                        continue
+                    repo, seq, paths = queue.popleft()
+                    if repo.finished:
+                        continue
+                    in_flight[ex.submit(_scan_unit, repo.key, repo.settings, repo.root, paths)] = (repo, seq)
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    repo, seq = in_flight.pop(fut)
+                    try:
+                        results = fut.result()
+                    # Only this repository fails, as it would on its own
+                    except Exception as e:
+                        complete = repo.fail(e)
+                    else:
+                        complete = repo.add(seq, results)
+                    if complete:
+                        yield repo.finish()
+        finally:
+            # Also on interruption: queued units are dropped instead of scanned
+            ex.shutdown(wait=True, cancel_futures=True)
+
+
+class Checkpoint:
+    """
+    Append-only JSON Lines record of the repositories a scan-many run finished,
+    so an interrupted run resumes where it stopped.
+
+    The first line records the format and the scan options; a checkpoint written
+    with other options is not resumed from (BatchError). Each later line is one
+    repository: its report file, summary, size and error. Lines are flushed and
+    synced as they are written; a last line cut off by a crash is dropped.
+    """
+
+    def __init__(self, path: Path, options: Dict[str, Any], done: Dict[str, Dict[str, Any]]):
+        self.path = path
+        self.options = options
+        self.done = done
+        self._fh = None
+
+    @classmethod
+    def open(cls, path: Path, options: Dict[str, Any], fresh: bool = False) -> "Checkpoint":
+        done: Dict[str, Dict[str, Any]] = {}
+        try:
+            data = b"" if fresh else path.read_bytes()
+        except FileNotFoundError:
+            data = b""
+        # Everything after the last newline is a line that was still being written
+        data = data[:data.rfind(b"\n") + 1]
+        lines = data.decode("utf-8", errors="replace").splitlines()
+        if lines:
+            try:
+                header = json.loads(lines[0])
+                entries = [json.loads(line) for line in lines[1:]]
+            except ValueError:
+                raise BatchError(f"{path} is not a scan-many checkpoint (use --fresh to start over)")
+            if header.get("format") != CHECKPOINT_FORMAT or header.get("options") != options:
+                raise BatchError(f"{path} was written with other options or by another version (use --fresh to start over)")
+            done = {e["root"]: e for e in entries}
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as fh:
+            fh.write(data or (json.dumps({"format": CHECKPOINT_FORMAT, "options": options}) + "\n").encode("utf-8"))
+        return cls(path, options, done)
+
+    def record(self, scan: RepoScan, report: str | None, summary: Dict[str, Any]) -> Dict[str, Any]:
+        entry = {
+            "root": str(scan.root),
+            "report": report,
+            "error": scan.error,
+            "fail_on": scan.fail_on,
+            "files": scan.files,
+            "bytes": scan.bytes,
+            "seconds": round(scan.seconds, 3),
+            "summary": summary,
+        }
+        if self._fh is None:
+            self._fh = open(self.path, "a", encoding="utf-8")
+        self._fh.write(json.dumps(entry) + "\n")
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self.done[entry["root"]] = entry
+        return entry
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+def entry_failed(entry: Dict[str, Any], fail_on: str | None = None) -> bool:
+    """
+    Whether a checkpoint entry fails the CI gate: it has an error, or a finding at or
+    above `fail_on` (default: the repository's own fail_on).
+    """
+    if entry["error"]:
+        return True
+    threshold = SEVERITY_ORDER[fail_on or entry["fail_on"]]
+    return any(SEVERITY_ORDER.get(sev, 0) >= threshold for sev in entry["summary"]["by_severity"])
+
+
+def summarize_batch(entries: List[Dict[str, Any]], fail_on: str | None = None) -> Dict[str, Any]:
+    """
+    Aggregated summary of the checkpoint entries of a run, for summary.json.
+    """
+    by_severity: Counter = Counter()
+    by_category: Counter = Counter()
+    for e in entries:
+        by_severity.update(e["summary"]["by_severity"])
+        by_category.update(e["summary"]["by_category"])
+    failed = [e["root"] for e in entries if entry_failed(e, fail_on)]
+    return {
+        "repositories": len(entries),
+        "errors": sum(1 for e in entries if e["error"]),
+        "failed": failed,
+        "files": sum(e["files"] for e in entries),
+        "bytes": sum(e["bytes"] for e in entries),
+        "summary": {
+            "by_severity": dict(by_severity),
+            "by_category": dict(by_category),
+            "total": sum(e["summary"]["total"] for e in entries),
+        },
+        "reports": entries,
+    }
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from pathlib import PurePosixPath
+from typing import Tuple
+
+from .config import AminScanConfig
+from .file_utils import IgnoreMatcher
+
+# Bytes sampled from the start of a file for the minified/generated heuristic
+SNIFF_BYTES = 64 * 1024
+# Files smaller than this are always scanned; a short one-line config can still hold a key
+MINIFIED_MIN_BYTES = 32 * 1024
+# Average line length (over the sample) above which content is treated as minified
+MINIFIED_AVG_LINE = 500
+
+# Lockfiles and manifests that are generated but not covered by the "**/*.lock" default ignore
+GENERATED_NAMES = {"package-lock.json", "npm-shrinkwrap.json", "pnpm-lock.yaml"}
+GENERATED_MARKERS = (b"@generated", b"DO NOT EDIT", b"Code generated by")
+MARKER_BYTES = 512
+
+
+@dataclass
+class ScanBudget:
+    """
+    Guards against files that cost far more than they are worth to scan.
+
+    Zero disables a limit. Paths matching `full_scan` (ignore-pattern syntax,
+    relative to the scan root) are exempt from every guard.
+    """
+
+    max_file_bytes: int = 0
+    # Longer lines are matched in windows around rule keywords instead of as a whole
+    max_line_length: int = 0
+    file_time_budget: float = 0.0
+    skip_minified: bool = False
+    full_scan: Tuple[str, ...] = ()
+
+    def __post_init__(self) -> None:
+        self._exempt = IgnoreMatcher(self.full_scan) if self.full_scan else None
+
+    @classmethod
+    def from_config(cls, config: AminScanConfig) -> "ScanBudget":
+        return cls(
+            max_file_bytes=config.max_file_bytes,
+            max_line_length=config.max_line_length,
+            file_time_budget=config.file_time_budget,
+            skip_minified=config.skip_minified,
+            full_scan=tuple(config.full_scan),
+        )
+
+    @property
+    def active(self) -> bool:
+        return bool(self.max_file_bytes or self.max_line_length or self.file_time_budget or self.skip_minified)
+
+    def exempt(self, rel_posix: str) -> bool:
+        return self._exempt is not None and self._exempt.match_file(rel_posix)
+
+    def deadline(self) -> "Deadline | None":
+        return Deadline(self.file_time_budget) if self.file_time_budget > 0 else None
+
+    def skip_reason(self, rel_posix: str, size: int, head: bytes) -> str | None:
+        """
+        Why a file should not be scanned at all, or None. `head` is the start of the file.
+        """
+        if self.max_file_bytes and size > self.max_file_bytes:
+            return "size"
+        if self.skip_minified:
+            return sniff_generated(rel_posix, size, head)
+        return None
+
+
+def sniff_generated(rel_posix: str, size: int, head: bytes) -> str | None:
+    """
+    "generated" for known lockfiles or files marked as generated, "minified" for
+    content whose lines are very long on average; None otherwise.
+    """
+    if PurePosixPath(rel_posix).name in GENERATED_NAMES:
+        return "generated"
+    if any(marker in head[:MARKER_BYTES] for marker in GENERATED_MARKERS):
+        return "generated"
+    if size >= MINIFIED_MIN_BYTES:
+        sample = head[:SNIFF_BYTES]
+        if len(sample) / (sample.count(b"\n") + 1) > MINIFIED_AVG_LINE:
+            return "minified"
+    return None
+
+
+class Deadline:
+    """
+    Wall-clock budget for scanning one file; checked between matches.
+    """
+
+    __slots__ = ("at", "expired")
+
+    def __init__(self, seconds: float):
+        self.at = time.perf_counter() + seconds
+        self.expired = False
+
+    def check(self) -> bool:
+        if not self.expired and time.perf_counter() > self.at:
+            self.expired = True
+        return self.expired
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional
+
+from .config import AminScanConfig
+from .entropy import MIN_ENTROPY, MIN_TOKEN_LENGTH
+from .findings import Finding, record_default
+from .secrets_rules import DEFAULT_RULESET, RuleSet
+
+CACHE_DIR_NAME = ".aminscan-cache"
+CACHE_FORMAT = 2
+INDEX_FILE = "index.json"
+
+# Upper bound on the serialized index; least recently used entries are dropped first
+DEFAULT_MAX_BYTES = 128 * 1024 * 1024
+
+
+def scan_signature(
+    use_entropy: bool,
+    config: AminScanConfig | None = None,
+    ruleset: RuleSet | None = None,
+) -> str:
+    """
+    Everything besides file content that can change a file's findings.
+    A cache written under a different signature is discarded on load.
+    """
+    ruleset = ruleset or DEFAULT_RULESET
+    parts = {
+        "format": CACHE_FORMAT,
+        "rules": ruleset.version,
+        "entropy": [use_entropy, MIN_TOKEN_LENGTH, MIN_ENTROPY],
+        "config": asdict(config) if config is not None else None,
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+class ScanCache:
+    """
+    On-disk per-file findings, keyed by path relative to the scan root.
+
+    An entry is reused without reading the file when size and mtime match; when
+    only the mtime moved (fresh checkouts) the content hash decides.
+    """
+
+    def __init__(self, directory: Path, signature: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.signature = signature
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        # File type verdicts of the classifier: rel -> [size, mtime_ns, is_text]
+        self.types: Dict[str, List] = {}
+        self._load()
+
+    @classmethod
+    def open(
+        cls,
+        directory: Path,
+        use_entropy: bool = True,
+        config: AminScanConfig | None = None,
+        ruleset: RuleSet | None = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> "ScanCache":
+        return cls(directory, scan_signature(use_entropy, config, ruleset), max_bytes=max_bytes)
+
+    def _load(self) -> None:
+        index = self.directory / INDEX_FILE
+        try:
+            raw = json.loads(index.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if not isinstance(raw, dict) or raw.get("signature") != self.signature:
+            return
+        self.generation = int(raw.get("generation", 0)) + 1
+        self.entries = dict(raw.get("entries") or {})
+        self.types = dict(raw.get("types") or {})
+
+    def lookup(self, rel: str, size: int, mtime_ns: int) -> Optional[List[Mapping]]:
+        """
+        Returns cached findings if the file's size and mtime are unchanged.
+        """
+        entry = self.entries.get(rel)
+        if entry is None or entry["size"] != size or entry["mtime_ns"] != mtime_ns:
+            return None
+        entry["used"] = self.generation
+        self.hits += 1
+        return entry["findings"]
+
+    def digest(self, rel: str) -> Optional[str]:
+        entry = self.entries.get(rel)
+        return entry["sha256"] if entry else None
+
+    def revalidate(self, rel: str, size: int, mtime_ns: int) -> List[Mapping]:
+        """
+        Marks an entry whose content hash still matched as fresh and returns its findings.
+        """
+        entry = self.entries[rel]
+        entry.update(size=size, mtime_ns=mtime_ns, used=self.generation)
+        self.hits += 1
+        return entry["findings"]
+
+    def store(self, rel: str, size: int, mtime_ns: int, digest: str, findings: List[Finding]) -> None:
+        self.entries[rel] = {
+            "size": size,
+            "mtime_ns": mtime_ns,
+            "sha256": digest,
+            "findings": findings,
+            "used": self.generation,
+        }
+        self.misses += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"dir": str(self.directory), "hits": self.hits, "misses": self.misses, "entries": len(self.entries)}
+
+    def save(self) -> None:
+        self._evict()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        payload = {"signature": self.signature, "generation": self.generation, "entries": self.entries, "types": self.types}
+        tmp = self.directory / f"{INDEX_FILE}.{os.getpid()}.tmp"
+        tmp.write_text(json.dumps(payload, separators=(",", ":"), default=record_default), encoding="utf-8")
+        os.replace(tmp, self.directory / INDEX_FILE)
+
+    def _evict(self) -> None:
+        sizes = {rel: len(json.dumps(e, separators=(",", ":"), default=record_default)) + len(rel) for rel, e in self.entries.items()}
+        total = sum(sizes.values())
+        if total <= self.max_bytes:
+            return
+        for rel in sorted(self.entries, key=lambda r: self.entries[r]["used"]):
+            if total <= self.max_bytes:
+                break
+            total -= sizes[rel]
+            del self.entries[rel]
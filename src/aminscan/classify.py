@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import codecs
+import os
+import re
+from dataclasses import dataclass
+from fnmatch import translate
+from typing import Dict, List, Tuple
+
+from .config import AminScanConfig
+from .file_utils import TEXT_EXTS, _suffix, archive_kind
+
+# Bytes read to classify a file whose name does not decide it
+SNIFF_BLOCK = 8192
+
+# Never opened: the name alone says binary
+BINARY_EXTS = {
+    ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".ico", ".webp", ".tif", ".tiff", ".psd",
+    ".pdf", ".exe", ".dll", ".so", ".dylib", ".o", ".a", ".lib", ".bin", ".class", ".pyc", ".pyo",
+    ".woff", ".woff2", ".ttf", ".otf", ".eot", ".mp3", ".mp4", ".m4a", ".avi", ".mov", ".mkv",
+    ".wav", ".ogg", ".flac", ".gz", ".bz2", ".xz", ".7z", ".rar", ".iso", ".dmg", ".wasm",
+    ".sqlite", ".db", ".npy", ".pkl", ".parquet",
+}
+
+MAGIC_NUMBERS = (
+    b"\x89PNG", b"\xff\xd8\xff", b"GIF8", b"%PDF-", b"\x7fELF", b"MZ\x90\x00", b"\xca\xfe\xba\xbe",
+    b"\xcf\xfa\xed\xfe", b"\xce\xfa\xed\xfe", b"PK\x03\x04", b"\x1f\x8b", b"BZh", b"\xfd7zXZ\x00",
+    b"7z\xbc\xaf\x27\x1c", b"Rar!\x1a\x07", b"\x00asm", b"SQLite format 3\x00", b"wOFF", b"wOF2",
+)
+
+_ASCII_TEXT = {7, 8, 9, 10, 11, 12, 13, 27} | set(range(0x20, 0x7F))
+# Bytes deleted before counting the rest as "odd": UTF-8 text may use any byte >= 0x80,
+# other text (legacy 8-bit encodings) only a few of them
+_UTF8_TEXT_BYTES = bytes(_ASCII_TEXT | set(range(0x80, 0x100)))
+_ASCII_TEXT_BYTES = bytes(_ASCII_TEXT)
+# Share of odd bytes above which a block is binary
+NON_TEXT_RATIO = 0.3
+
+
+def looks_binary(head: bytes) -> bool:
+    """
+    Classifies the first block of a file: known magic numbers and NUL bytes mean
+    binary; so does a high share of control bytes, or, if the block is not valid
+    UTF-8 (a character cut at the block end is fine), of control and 8-bit bytes.
+    """
+    if head.startswith(MAGIC_NUMBERS) or b"\0" in head:
+        return True
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        text_bytes = _UTF8_TEXT_BYTES
+    except UnicodeDecodeError:
+        text_bytes = _ASCII_TEXT_BYTES
+    return len(head.translate(None, text_bytes)) > len(head) * NON_TEXT_RATIO
+
+
+@dataclass(frozen=True)
+class FileTypes:
+    """
+    File name globs from the config: `text` files are accepted by name like known
+    text extensions (their content is still checked for binary data when it is
+    read), `skip` files are never scanned. A bare suffix such as ".tf" means "*.tf".
+    """
+
+    text: Tuple[str, ...] = ()
+    skip: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_config(cls, config: AminScanConfig) -> "FileTypes":
+        return cls(text=tuple(config.text_types), skip=tuple(config.skip_types))
+
+
+def _compile(globs: Tuple[str, ...]) -> re.Pattern | None:
+    pats = []
+    for g in globs:
+        if g.startswith(".") and not any(c in g for c in "*?["):
+            g = "*" + g
+        pats.append(translate(g.lower()))
+    return re.compile("|".join(pats)) if pats else None
+
+
+class FileClassifier:
+    """
+    Decides which walked files are scanned, for iter_text_files(accept=...).
+
+    Known text extensions are accepted by name (their content is checked when the
+    scanner reads them); known binary extensions are rejected by name; everything
+    else is sniffed. Sniff verdicts are looked up in / recorded to `known`-style
+    dicts of rel -> [size, mtime_ns, is_text], so unchanged files are not reopened.
+    """
+
+    def __init__(
+        self,
+        types: FileTypes | None = None,
+        archives: bool = False,
+        known: Dict[str, List] | None = None,
+    ):
+        types = types or FileTypes()
+        self._text = _compile(types.text)
+        self._skip = _compile(types.skip)
+        self.archives = archives
+        self.known = known or {}
+        # Verdicts of the files seen in this walk
+        self.verdicts: Dict[str, List] = {}
+        self.binary_files = 0
+        self.binary_bytes = 0
+        self.sniffed = 0
+
+    def accept(self, rel: str, entry: os.DirEntry) -> bool:
+        name = entry.name.lower()
+        if self._skip is not None and self._skip.match(name):
+            return False
+        if self._text is not None and self._text.match(name):
+            return True
+        suffix = _suffix(name)
+        if suffix in TEXT_EXTS:
+            return True
+        if archive_kind(name):
+            return self.archives
+        st = entry.stat()
+        if suffix in BINARY_EXTS:
+            self._binary(st.st_size)
+            return False
+
+        cached = self.known.get(rel)
+        if cached is not None and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            is_text = bool(cached[2])
+        else:
+            is_text = not _sniff(entry.path)
+            self.sniffed += 1
+        self.verdicts[rel] = [st.st_size, st.st_mtime_ns, is_text]
+        if not is_text:
+            self._binary(st.st_size)
+        return is_text
+
+    def by_name(self, name: str) -> bool:
+        """
+        Whether a file whose content is at hand rather than walked (a diff target,
+        a history blob) may be scanned; if so, its first block decides (see looks_binary),
+        as it does when the scanner reads a walked file. Unlike accept(), archives are
+        rejected: their members are not scanned here.
+        """
+        name = name.lower()
+        if self._skip is not None and self._skip.match(name):
+            return False
+        if self._text is not None and self._text.match(name):
+            return True
+        return not (archive_kind(name) or _suffix(name) in BINARY_EXTS)
+
+    def _binary(self, size: int) -> None:
+        self.binary_files += 1
+        self.binary_bytes += size
+
+
+def _sniff(path: str) -> bool:
+    try:
+        with open(path, "rb") as fh:
+            return looks_binary(fh.read(SNIFF_BLOCK))
+    except OSError:
+        return True
@@ -2,19 +2,32 @@ from __future__ import annotations
 
 import argparse
 import json
+import signal
 import sys
-from collections import Counter
+import time
 from pathlib import Path
-
-from .secrets_scanner import scan_secrets
-from .web_scanner import scan_web
+from typing import Iterable, Mapping
+
+from .archives import ArchiveLimits
+from .baseline import DEFAULT_BASELINE_FILE, BaselineError, write_baseline
+from .budget import ScanBudget
+from .cache import CACHE_DIR_NAME
+from .classify import FileTypes
+from .entropy import SafeTokenError, SafeTokens
+from .findings import json_default
+from .git_scanner import GitError, scan_history
+from .pipeline import ScanPipeline
+from .secrets_scanner import dedupe_findings, iter_secrets
+from .sharding import Shard, ShardError, merge_reports
+from .stats import ScanStats, timed
+from .streaming import SEVERITY_ORDER, JsonlWriter, SarifWriter, SummaryCounter
 from .config import load_config
+from .rule_packs import RuleError, load_ruleset
 
-
-SEVERITY_ORDER = {"low": 1, "medium": 2, "high": 3, "critical": 4}
+VERSION = "0.0.4"
 
 
-def findings_hit_threshold(findings: list[dict], fail_on: str) -> bool:
+def findings_hit_threshold(findings: list[Mapping], fail_on: str) -> bool:
     threshold = SEVERITY_ORDER[fail_on]
     for f in findings:
         sev = (f.get("severity") or "low").lower()
@@ -23,24 +36,14 @@ def findings_hit_threshold(findings: list[dict], fail_on: str) -> bool:
     return False
 
 
-def summarize(findings: list[dict]) -> dict:
-    sev = Counter()
-    cat = Counter()
+def summarize(findings: list[Mapping]) -> dict:
+    counter = SummaryCounter()
     for f in findings:
-        sev[(f.get("severity") or "low").lower()] += 1
+        counter.add(f)
+    return counter.as_dict()
 
-        rule_id = (f.get("rule_id") or "").strip()
-        prefix = rule_id.split("-")[0] if rule_id else "OTHER"
-        cat[prefix] += 1
-
-    return {
-        "by_severity": dict(sev),
-        "by_category": dict(cat),
-        "total": len(findings),
-    }
 
-
-def render_json(findings: list[dict], meta: dict, version: str) -> str:
+def render_json(findings: list[Mapping], meta: dict, version: str) -> str:
     payload = {
         "tool": "AminScan",
         "version": version,
@@ -48,10 +51,11 @@ def render_json(findings: list[dict], meta: dict, version: str) -> str:
         "summary": summarize(findings),
         "findings": findings,
     }
-    return json.dumps(payload, indent=2)
+    # Findings are rendered to their dict shape only here
+    return json.dumps(payload, indent=2, default=json_default)
 
 
-def render_markdown(findings: list[dict]) -> str:
+def render_markdown(findings: list[Mapping]) -> str:
     lines: list[str] = []
     lines.append("# AminScan Report\n")
 
@@ -89,6 +93,8 @@ def render_markdown(findings: list[dict]) -> str:
         lines.append(f"- Confidence: **{confidence}**")
         if location:
             lines.append(f"- Location: `{location}`")
+        if f.get("target"):
+            lines.append(f"- Target: {f['target']}")
         if f.get("rule_id"):
             lines.append(f"- Rule: `{f['rule_id']}`")
         if f.get("evidence_masked"):
@@ -100,9 +106,20 @@ def render_markdown(findings: list[dict]) -> str:
     return "\n".join(lines)
 
 
-def main() -> None:
-    VERSION = "0.0.4"
+def add_output_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument(
+        "--fail-on",
+        choices=["low", "medium", "high", "critical"],
+        default="high",
+        help="Exit with code 1 if any finding is >= this severity",
+    )
+    p.add_argument("--out-md", default=None, help="Write Markdown report to this file")
+    p.add_argument("--out-json", default=None, help="Write JSON report to this file")
+    p.add_argument("--out-jsonl", default=None, help="Stream findings to this file as JSON Lines")
+    p.add_argument("--out-sarif", default=None, help="Stream findings to this file as SARIF 2.1.0")
+
 
+def main() -> None:
     parser = argparse.ArgumentParser(prog="aminscan")
     sub = parser.add_subparsers(dest="cmd", required=True)
 
@@ -110,72 +127,429 @@ def main() -> None:
     scan.add_argument("--path", default=".", help="Path to scan (default: .)")
     scan.add_argument("--no-entropy", action="store_true", help="Disable entropy-based heuristic detection")
     scan.add_argument("--url", default=None, help="Optional URL to scan for basic web misconfigurations")
+    add_output_args(scan)
     scan.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of worker processes for the secrets scan (default: CPU count, 1 = serial)",
+    )
+    scan.add_argument(
+        "--cache",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="DIR",
+        help=f"Reuse findings for unchanged files from an on-disk cache (default DIR: <path>/{CACHE_DIR_NAME})",
+    )
+    scan.add_argument(
+        "--baseline",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="FILE",
+        help=f"Drop findings recorded in a baseline (default FILE: <path>/{DEFAULT_BASELINE_FILE}); only new ones count for --fail-on",
+    )
+    scan.add_argument(
+        "--stats",
+        action="store_true",
+        help="Profile the scan (phase, rule and slowest-file timings); printed and added to the JSON meta",
+    )
+    scan.add_argument(
+        "--shard",
+        default=None,
+        metavar="I/N",
+        help="Only scan slice I of N (balanced by bytes, same on every node); combine the JSON reports with `aminscan merge`",
+    )
+    diff_mode = scan.add_mutually_exclusive_group()
+    diff_mode.add_argument(
+        "--diff",
+        default=None,
+        metavar="BASE..HEAD",
+        help="Only scan lines added between two git revisions",
+    )
+    diff_mode.add_argument("--staged", action="store_true", help="Only scan lines added in the git index (pre-commit)")
+    diff_mode.add_argument(
+        "--history",
+        action="store_true",
+        help="Scan every blob in the git history (each unique blob once) instead of the working tree",
+    )
+
+    web = sub.add_parser("web", help="Scan many URLs concurrently for web misconfigurations")
+    web.add_argument("--targets", default=None, help="File with one URL per line")
+    web.add_argument("--url", action="append", default=[], help="URL to scan (repeatable)")
+    web.add_argument("--concurrency", type=int, default=32, help="Maximum requests in flight overall (default: 32)")
+    web.add_argument("--per-host", type=int, default=4, help="Maximum requests in flight per host (default: 4)")
+    web.add_argument("--timeout", type=int, default=10, help="Per-request timeout in seconds (default: 10)")
+    add_output_args(web)
+
+    serve = sub.add_parser("serve", help="Keep a warm findings index for a folder and answer scans over local HTTP")
+    serve.add_argument("--path", default=".", help="Path to watch (default: .)")
+    serve.add_argument("--no-entropy", action="store_true", help="Disable entropy-based heuristic detection")
+    serve.add_argument("--jobs", type=int, default=None, help="Worker processes for rescans (default: CPU count)")
+    serve.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    serve.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765)")
+    serve.add_argument("--socket", default=None, metavar="PATH", help="Listen on a Unix socket instead of a port")
+    serve.add_argument(
+        "--interval",
+        type=float,
+        default=None,
+        help="Seconds between mtime polls (default: 2)",
+    )
+
+    many = sub.add_parser("scan-many", help="Scan many repositories with one shared worker pool, resumable")
+    many.add_argument("--roots", required=True, metavar="FILE", help="File with one repository path per line")
+    many.add_argument("--out-dir", default="aminscan-reports", help="Folder for the per-repository reports and summary.json (default: aminscan-reports)")
+    many.add_argument("--checkpoint", default=None, metavar="FILE", help="Progress file to resume from (default: <out-dir>/checkpoint.jsonl)")
+    many.add_argument("--fresh", action="store_true", help="Ignore the checkpoint and scan every repository again")
+    many.add_argument("--no-entropy", action="store_true", help="Disable entropy-based heuristic detection")
+    many.add_argument("--jobs", type=int, default=None, help="Number of worker processes (default: CPU count, 1 = serial)")
+    many.add_argument(
         "--fail-on",
         choices=["low", "medium", "high", "critical"],
-        default="high",
-        help="Exit with code 1 if any finding is >= this severity",
+        default=None,
+        help="Exit with code 1 if any repository has a finding >= this severity (default: each repository's fail_on)",
     )
-    scan.add_argument("--out-md", default=None, help="Write Markdown report to this file")
-    scan.add_argument("--out-json", default=None, help="Write JSON report to this file")
+
+    merge = sub.add_parser("merge", help="Combine JSON reports (e.g. of every --shard) into one report")
+    merge.add_argument("reports", nargs="+", metavar="REPORT", help="JSON reports written with --out-json")
+    add_output_args(merge)
+
+    baseline = sub.add_parser("baseline", help="Manage the baseline of accepted findings")
+    baseline_sub = baseline.add_subparsers(dest="action", required=True)
+    create = baseline_sub.add_parser("create", help="Scan and record every current finding as accepted")
+    create.add_argument("--path", default=".", help="Path to scan (default: .)")
+    create.add_argument("--out", default=None, help=f"Baseline file to write (default: <path>/{DEFAULT_BASELINE_FILE})")
+    create.add_argument("--no-entropy", action="store_true", help="Disable entropy-based heuristic detection")
+    create.add_argument("--jobs", type=int, default=None, help="Number of worker processes (default: CPU count)")
+    create.add_argument("--history", action="store_true", help="Also record findings from the whole git history")
 
     args = parser.parse_args()
+    if args.cmd == "web":
+        run_web(args)
+    elif args.cmd == "serve":
+        run_serve(args)
+    elif args.cmd == "scan-many":
+        run_scan_many(args)
+    elif args.cmd == "merge":
+        run_merge(args)
+    elif args.cmd == "baseline":
+        run_baseline_create(args)
+    else:
+        run_scan(args)
+
 
+def run_baseline_create(args: argparse.Namespace) -> None:
     base = Path(args.path).resolve()
-    if not base.exists():
+    if not base.is_dir():
         raise SystemExit(f"Path not found: {base}")
+    cfg = load_config(base)
+    try:
+        ruleset = load_ruleset(base, cfg)
+        safe_tokens = SafeTokens.from_config(cfg)
+    except RuleError as e:
+        raise SystemExit(f"Invalid rules: {e}")
+    except SafeTokenError as e:
+        raise SystemExit(str(e))
+    entropy_enabled = cfg.entropy and not args.no_entropy
+
+    findings = list(iter_secrets(
+        base,
+        use_entropy=entropy_enabled,
+        extra_ignores=cfg.extra_ignores,
+        jobs=args.jobs,
+        ruleset=ruleset,
+        budget=ScanBudget.from_config(cfg),
+        archives=ArchiveLimits.from_config(cfg),
+        types=FileTypes.from_config(cfg),
+        safe_tokens=safe_tokens,
+    ))
+    if args.history:
+        try:
+            findings.extend(scan_history(
+                base, use_entropy=entropy_enabled, extra_ignores=cfg.extra_ignores, ruleset=ruleset, safe_tokens=safe_tokens,
+                types=FileTypes.from_config(cfg),
+            ))
+        except GitError as e:
+            raise SystemExit(f"git history scan failed: {e}")
+
+    out = Path(args.out) if args.out else base / DEFAULT_BASELINE_FILE
+    count = write_baseline(out, findings, base)
+    print(f"AminScan baseline: {count} findings recorded in {out}")
+
+
+def run_serve(args: argparse.Namespace) -> None:
+    from .daemon import DEFAULT_INTERVAL, FindingsIndex, ScanDaemon
 
-    findings = scan_secrets(base, use_entropy=not args.no_entropy)
-
-    if args.url:
-        findings.extend(scan_web(args.url))
+    base = Path(args.path).resolve()
+    if not base.is_dir():
+        raise SystemExit(f"Path not found: {base}")
 
-    cfg = load_config(base)
-        # If user didn't pass --url, use config url
-    if not args.url and cfg.url:
-            args.url = cfg.url
+    index = FindingsIndex(base, use_entropy=not args.no_entropy, jobs=args.jobs)
+    try:
+        daemon = ScanDaemon(
+            index,
+            render=lambda findings, meta: render_json(findings, meta, VERSION),
+            host=args.host,
+            port=args.port,
+            socket_path=args.socket,
+            interval=DEFAULT_INTERVAL if args.interval is None else args.interval,
+        )
+    except OSError as e:
+        raise SystemExit(f"Cannot listen: {e}")
+
+    print(f"AminScan serving {base} on {daemon.address} (GET /scan, /scan?refresh=1, /status)", flush=True)
+    # Exit through serve_forever's cleanup (e.g. removing the socket) on SIGTERM too
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def run_web(args: argparse.Namespace) -> None:
+    from .web_scanner import load_targets, scan_web_many
+
+    targets = list(args.url)
+    if args.targets:
+        try:
+            targets.extend(load_targets(Path(args.targets)))
+        except OSError as e:
+            raise SystemExit(f"Cannot read targets file: {e}")
+    if not targets:
+        raise SystemExit("No targets given (use --targets FILE and/or --url URL)")
+
+    findings = scan_web_many(targets, timeout=args.timeout, concurrency=args.concurrency, per_host=args.per_host)
+    meta = {"targets": len(targets), "concurrency": args.concurrency, "per_host": args.per_host}
+    emit_report(findings, args, meta)
+
+
+def run_scan(args: argparse.Namespace) -> None:
+    base = Path(args.path).resolve()
+    if not base.exists():
+        raise SystemExit(f"Path not found: {base}")
 
-        # If user didn't pass output paths, use config outputs
+    git_scan = bool(args.diff or args.staged or args.history)
+    shard = None
+    if args.shard:
+        if git_scan:
+            raise SystemExit("--shard only applies to working-tree scans")
+        try:
+            shard = Shard.parse(args.shard)
+        except ShardError as e:
+            raise SystemExit(str(e))
+
+    stats = ScanStats() if args.stats else None
+    with timed(stats, "config"):
+        cfg = load_config(base)
+
+    # If user didn't pass output paths, use config outputs
     if not args.out_md and cfg.out_md:
-            args.out_md = cfg.out_md
+        args.out_md = cfg.out_md
     if not args.out_json and cfg.out_json:
-            args.out_json = cfg.out_json
+        args.out_json = cfg.out_json
 
-        # If user didn't override fail-on, use config fail_on
-        # (Here, default is "high", so if they kept default, config can replace it)
+    # If user didn't override fail-on, use config fail_on
+    # (Here, default is "high", so if they kept default, config can replace it)
     if args.fail_on == "high" and cfg.fail_on:
-            args.fail_on = cfg.fail_on
-
-        # Entropy: config decides default; CLI flag --no-entropy disables regardless
-    entropy_enabled = cfg.entropy and (not args.no_entropy)
-
-    findings = scan_secrets(base, use_entropy=entropy_enabled, extra_ignores=cfg.extra_ignores)
-
-
-    # Console output
-    if not findings:
+        args.fail_on = cfg.fail_on
+
+    # --cache/--baseline without a value use the default location; absent, the config decides.
+    # A --baseline path is relative to the working directory, a config one to the scanned path.
+    try:
+        pipeline = ScanPipeline(
+            base,
+            url=args.url,
+            use_entropy=not args.no_entropy,
+            jobs=args.jobs,
+            cache=None if args.cache is None else Path(args.cache) if args.cache else True,
+            baseline=None if args.baseline is None else Path(args.baseline) if args.baseline else True,
+            shard=shard,
+            diff=args.diff,
+            staged=args.staged,
+            history=args.history,
+            stats=stats,
+            config=cfg,
+        )
+    except RuleError as e:
+        raise SystemExit(f"Invalid rules: {e}")
+    except (BaselineError, SafeTokenError) as e:
+        raise SystemExit(str(e))
+
+    try:
+        findings = pipeline.findings()
+    except GitError as e:
+        raise SystemExit(f"git {'history scan' if args.history else 'diff'} failed: {e}")
+    emit_report(findings, args, pipeline.meta, base=base, stats=stats)
+
+
+def run_scan_many(args: argparse.Namespace) -> None:
+    from .batch import CHECKPOINT_FILE, BatchError, BatchScan, Checkpoint, load_roots, report_name, summarize_batch
+
+    try:
+        roots = load_roots(Path(args.roots))
+    except OSError as e:
+        raise SystemExit(f"Cannot read roots file: {e}")
+    if not roots:
+        raise SystemExit(f"No repositories listed in {args.roots}")
+
+    out_dir = Path(args.out_dir)
+    use_entropy = not args.no_entropy
+    try:
+        out_dir.mkdir(parents=True, exist_ok=True)
+        checkpoint = Checkpoint.open(
+            Path(args.checkpoint) if args.checkpoint else out_dir / CHECKPOINT_FILE,
+            {"use_entropy": use_entropy},
+            fresh=args.fresh,
+        )
+    except OSError as e:
+        raise SystemExit(f"Cannot write to {out_dir}: {e}")
+    except BatchError as e:
+        raise SystemExit(str(e))
+
+    todo = [r for r in roots if str(r) not in checkpoint.done]
+    done = len(roots) - len(todo)
+    if done:
+        print(f"AminScan: resuming from {checkpoint.path}, {done} of {len(roots)} repositories already scanned", flush=True)
+
+    try:
+        for repo in BatchScan(todo, use_entropy=use_entropy, jobs=args.jobs).run():
+            done += 1
+            report = None
+            if repo.error is None:
+                report = report_name(repo.root)
+                (out_dir / report).write_text(render_json(repo.findings, repo.meta, VERSION), encoding="utf-8")
+            # Recorded only once the report is on disk, so a resumed run never skips a missing one
+            entry = checkpoint.record(repo, report, summarize(repo.findings))
+            if repo.error is not None:
+                status = f"error: {repo.error}"
+            else:
+                status = f"{entry['summary']['total']} findings, {repo.files} files, {repo.bytes / 1e6:.1f} MB, {repo.seconds:.2f}s"
+            print(f"[{done}/{len(roots)}] {repo.root}: {status}", flush=True)
+    except KeyboardInterrupt:
+        print(f"\nAminScan: interrupted after {done} of {len(roots)} repositories; run the same command again to resume", file=sys.stderr)
+        sys.exit(130)
+    finally:
+        checkpoint.close()
+
+    entries = [checkpoint.done[str(r)] for r in roots]
+    summary = {"tool": "AminScan", "version": VERSION, **summarize_batch(entries, args.fail_on)}
+    (out_dir / "summary.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+
+    failed = summary["failed"]
+    print(
+        f"AminScan: {summary['summary']['total']} findings in {len(roots)} repositories "
+        f"({summary['errors']} errors, {len(failed)} failing); reports in {out_dir}"
+    )
+    sys.exit(1 if failed else 0)
+
+
+def run_merge(args: argparse.Namespace) -> None:
+    reports = []
+    for name in args.reports:
+        try:
+            reports.append(json.loads(Path(name).read_text(encoding="utf-8")))
+        except (OSError, ValueError) as e:
+            raise SystemExit(f"Cannot read report {name}: {e}")
+    try:
+        findings, meta = merge_reports(reports)
+    except ShardError as e:
+        raise SystemExit(f"Cannot merge reports: {e}")
+    emit_report(dedupe_findings(findings), args, meta)
+
+
+def emit_report(
+    findings: Iterable[dict],
+    args: argparse.Namespace,
+    meta: dict,
+    base: Path | None = None,
+    extra_meta: dict | None = None,
+    stats: ScanStats | None = None,
+) -> None:
+    """
+    Prints findings and writes the requested reports, then exits with the CI gate status.
+    `extra_meta` is merged into `meta` after the findings are consumed (scanners fill it on completion).
+    With `stats`, the profile goes into meta["stats"]; it is taken before the JSON report
+    itself is rendered, so its render phase covers the console output and Markdown only.
+    """
+    # Findings are handled as they arrive; they are only kept in memory
+    # when a whole-report format (Markdown/JSON) was requested.
+    writers = []
+    if args.out_jsonl:
+        writers.append(JsonlWriter(Path(args.out_jsonl)))
+    if args.out_sarif:
+        writers.append(SarifWriter(Path(args.out_sarif), VERSION, base))
+    collected: list[Mapping] | None = [] if (args.out_md or args.out_json) else None
+    counter = SummaryCounter()
+
+    render_seconds = 0.0
+    try:
+        for f in findings:
+            t0 = time.perf_counter()
+            counter.add(f)
+            if collected is not None:
+                collected.append(f)
+            for w in writers:
+                w.write(f)
+            print_finding(f)
+            render_seconds += time.perf_counter() - t0
+    finally:
+        for w in writers:
+            w.close()
+    if stats is not None:
+        stats.add_phase("render", render_seconds)
+
+    # Console summary
+    if not counter.total:
         print("AminScan ✅ No findings.")
     else:
-        print(f"AminScan ⚠️ Findings: {len(findings)}\n")
-        for f in findings:
-            print(f"- [{(f.get('severity') or 'low').upper()}] {f.get('title', 'Finding')}")
-            file_path = f.get("file")
-            line_no = f.get("line")
-            if file_path:
-                loc = f"{file_path}:{line_no}" if line_no is not None else str(file_path)
-                print(f"  Location: {loc}")
-            print(f"  Evidence: {f.get('evidence_masked')}")
-            print(f"  Confidence: {(f.get('confidence') or 'high').upper()}")
-            print(f"  Fix: {f.get('recommendation')}\n")
+        print(f"AminScan ⚠️ Findings: {counter.total}")
 
     # Reports
-    meta = {"scanned_path": str(base), "url": args.url, "entropy_enabled": (not args.no_entropy)}
+    meta.update(extra_meta or {})
+    budget = meta.get("budget")
+    if budget and (budget["skipped_files"] or budget["truncated_files"]):
+        print(f"AminScan: scan budget skipped {budget['skipped_files']} files and cut {budget['truncated_files']} short")
 
     if args.out_md:
-        Path(args.out_md).write_text(render_markdown(findings), encoding="utf-8")
+        with timed(stats, "render"):
+            Path(args.out_md).write_text(render_markdown(collected), encoding="utf-8")
+
+    if stats is not None:
+        meta["stats"] = stats.finish()
+        print_stats(meta["stats"])
 
     if args.out_json:
-        Path(args.out_json).write_text(render_json(findings, meta, VERSION), encoding="utf-8")
+        Path(args.out_json).write_text(render_json(collected, meta, VERSION), encoding="utf-8")
 
     # Exit code for CI gate
-    sys.exit(1 if findings_hit_threshold(findings, args.fail_on) else 0)
+    sys.exit(1 if counter.hit_threshold(args.fail_on) else 0)
+
+
+def print_stats(report: dict, top: int = 5) -> None:
+    print(f"\nScan profile ({report['wall_seconds']:.3f}s wall, {report['files']} files, "
+          f"{report['bytes'] / 1e6:.1f} MB, {report['lines']} lines)")
+    for name, seconds in report["phases"].items():
+        print(f"  {name:<12} {seconds:9.4f}s")
+    if report["rules"]:
+        print("  Rules:")
+        for rule_id, r in list(report["rules"].items())[:top]:
+            print(f"    {rule_id:<24} {r['seconds']:9.4f}s {r['hits']:6d} hits")
+    if report["slowest_files"]:
+        print("  Slowest files:")
+        for f in report["slowest_files"][:top]:
+            print(f"    {f['seconds']:9.4f}s  {f['file']}")
+
+
+def print_finding(f: Mapping) -> None:
+    print(f"- [{(f.get('severity') or 'low').upper()}] {f.get('title', 'Finding')}")
+    file_path = f.get("file")
+    line_no = f.get("line")
+    if file_path:
+        loc = f"{file_path}:{line_no}" if line_no is not None else str(file_path)
+        print(f"  Location: {loc}")
+    if f.get("target"):
+        print(f"  Target: {f['target']}")
+    print(f"  Evidence: {f.get('evidence_masked')}")
+    print(f"  Confidence: {(f.get('confidence') or 'high').upper()}")
+    print(f"  Fix: {f.get('recommendation')}\n", flush=True)
@@ -1,10 +1,24 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import os
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
-import yaml
+CONFIG_FILE = ".aminscan.yml"
+# Bump when the stored parse format changes, so old entries are ignored
+PARSE_CACHE_FORMAT = 1
+CONFIG_CACHE_SUBDIR = "config"
+
+
+def user_cache_dir() -> Path:
+    """
+    Per-user cache directory ($XDG_CACHE_HOME/aminscan, default ~/.cache/aminscan).
+    """
+    root = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(root) / "aminscan"
 
 
 @dataclass
@@ -15,14 +29,43 @@ class AminScanConfig:
     out_md: Optional[str] = None
     out_json: Optional[str] = None
     extra_ignores: List[str] = field(default_factory=list)
+    cache: bool = False
+    # Fingerprint index of accepted findings, relative to the scanned path
+    baseline: Optional[str] = None
+    # User-defined rules (see rule_packs.py) and YAML files with more of them
+    rules: List[Dict[str, Any]] = field(default_factory=list)
+    rule_packs: List[str] = field(default_factory=list)
+    # Scan budget (see budget.py); 0 disables a limit
+    max_file_bytes: int = 0
+    max_line_length: int = 10000
+    file_time_budget: float = 0.0
+    skip_minified: bool = False
+    # Globs that are always scanned in full, whatever the budget
+    full_scan: List[str] = field(default_factory=list)
+    # Scan text members of zip/tar archives (see archives.py)
+    archives: bool = True
+    archive_depth: int = 3
+    archive_member_bytes: int = 8 * 1024 * 1024
+    # File name globs to always scan / never scan (see classify.py)
+    text_types: List[str] = field(default_factory=list)
+    skip_types: List[str] = field(default_factory=list)
+    # Entropy candidate classes never scored (see entropy.SafeTokens); None means all
+    safe_tokens: Optional[List[str]] = None
 
 
-def load_config(base: Path) -> AminScanConfig:
-    cfg_path = base / ".aminscan.yml"
-    if not cfg_path.exists():
+def load_config(base: Path, cache_dir: Path | None = None) -> AminScanConfig:
+    """
+    Reads `.aminscan.yml` from `base`. The parsed file is kept in the user cache
+    keyed by its size, mtime and inode, so the YAML parser is only imported and run
+    when the file changed; a missing file never touches it.
+    """
+    cfg_path = base / CONFIG_FILE
+    try:
+        st = cfg_path.stat()
+    except OSError:
         return AminScanConfig()
 
-    raw: Dict[str, Any] = yaml.safe_load(cfg_path.read_text(encoding="utf-8")) or {}
+    raw: Dict[str, Any] = _parse_cached(cfg_path, st, cache_dir)
 
     return AminScanConfig(
         fail_on=str(raw.get("fail_on", "high")),
@@ -31,4 +74,51 @@ def load_config(base: Path) -> AminScanConfig:
         out_md=raw.get("out_md"),
         out_json=raw.get("out_json"),
         extra_ignores=list(raw.get("extra_ignores", []) or []),
+        cache=bool(raw.get("cache", False)),
+        baseline=raw.get("baseline"),
+        rules=list(raw.get("rules", []) or []),
+        rule_packs=[str(p) for p in (raw.get("rule_packs", []) or [])],
+        max_file_bytes=int(raw.get("max_file_bytes", 0) or 0),
+        max_line_length=int(raw.get("max_line_length", 10000) or 0),
+        file_time_budget=float(raw.get("file_time_budget", 0) or 0),
+        skip_minified=bool(raw.get("skip_minified", False)),
+        full_scan=[str(p) for p in (raw.get("full_scan", []) or [])],
+        archives=bool(raw.get("archives", True)),
+        archive_depth=int(raw.get("archive_depth", 3)),
+        archive_member_bytes=int(raw.get("archive_member_bytes", 8 * 1024 * 1024)),
+        text_types=[str(t) for t in (raw.get("text_types", []) or [])],
+        skip_types=[str(t) for t in (raw.get("skip_types", []) or [])],
+        safe_tokens=None if raw.get("safe_tokens") is None else [str(c) for c in raw["safe_tokens"]],
     )
+
+
+def _parse_cached(cfg_path: Path, st: os.stat_result, cache_dir: Path | None) -> Dict[str, Any]:
+    key = hashlib.sha256(str(cfg_path.resolve()).encode("utf-8")).hexdigest()[:32]
+    entry = (cache_dir or user_cache_dir() / CONFIG_CACHE_SUBDIR) / f"{key}.json"
+    stamp = [st.st_size, st.st_mtime_ns, st.st_ino]
+    try:
+        cached = json.loads(entry.read_text(encoding="utf-8"))
+        if cached["format"] == PARSE_CACHE_FORMAT and cached["stamp"] == stamp:
+            return cached["raw"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    import yaml
+
+    raw = yaml.safe_load(cfg_path.read_text(encoding="utf-8")) or {}
+    _write_parsed(entry, stamp, raw)
+    return raw
+
+
+def _write_parsed(fp: Path, stamp: List[int], raw: Any) -> None:
+    # Best effort, and only for documents JSON stores faithfully (no dates, no non-string keys)
+    try:
+        data = json.dumps({"format": PARSE_CACHE_FORMAT, "stamp": stamp, "raw": raw})
+        if json.loads(data)["raw"] != raw:
+            return
+        fp.parent.mkdir(parents=True, exist_ok=True)
+        tmp = fp.with_name(f"{fp.name}.{os.getpid()}.tmp")
+        tmp.write_text(data, encoding="utf-8")
+        os.replace(tmp, fp)
+    except (OSError, TypeError, ValueError):
+        pass
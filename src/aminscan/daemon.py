@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import json
+import dataclasses
+import os
+import socketserver
+import stat
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from .archives import ArchiveLimits
+from .baseline import Baseline
+from .budget import ScanBudget
+from .classify import FileClassifier, FileTypes
+from .config import AminScanConfig, load_config
+from .entropy import SafeTokens
+from .file_utils import iter_text_files, load_ignore_patterns
+from .rule_packs import load_ruleset
+from .secrets_rules import DEFAULT_RULESET
+from .secrets_scanner import FileScan, ScanTally, dedupe_findings, scan_paths
+
+# Files whose change invalidates the whole index (besides the configured rule packs)
+CONFIG_FILES = (".aminscan.yml", ".aminscanignore")
+
+DEFAULT_INTERVAL = 2.0
+
+Renderer = Callable[[List[Dict[str, Any]], Dict[str, Any]], str]
+
+
+class FindingsIndex:
+    """
+    Per-file findings for one checkout, kept current by rescanning only files
+    whose size or mtime changed since the last refresh. The configured baseline
+    is applied when a snapshot is taken.
+    """
+
+    def __init__(self, base: Path, use_entropy: bool = True, jobs: int | None = None):
+        self.base = base
+        self.use_entropy_flag = use_entropy
+        self.jobs = jobs
+        # rel -> (size, mtime_ns, findings, scan result without findings, for the report meta)
+        self.entries: Dict[str, Tuple[int, int, List[Dict[str, Any]], FileScan]] = {}
+        self.order: List[str] = []
+        self.config = AminScanConfig()
+        self.ignore: List[str] = []
+        self.ruleset = DEFAULT_RULESET
+        self.budget = ScanBudget.from_config(self.config)
+        self.archives = ArchiveLimits.from_config(self.config)
+        self.safe_tokens = SafeTokens.from_config(self.config)
+        self.baseline: Baseline | None = None
+        self.classifier = FileClassifier()
+        # Classifier verdicts (rel -> [size, mtime_ns, is_text]), so unchanged files are not sniffed again
+        self.types: Dict[str, List] = {}
+        self._config_stamp: Tuple[Tuple[int, int], ...] | None = None
+        self.refreshed_at = 0.0
+        self.last_rescanned = 0
+        # _refresh serializes refreshes; _lock only guards the swap, so reads never wait on a rescan
+        self._refresh = threading.Lock()
+        self._lock = threading.Lock()
+
+    @property
+    def use_entropy(self) -> bool:
+        return self.config.entropy and self.use_entropy_flag
+
+    def _stamp(self) -> Tuple[Tuple[int, int], ...]:
+        stamp = []
+        baseline = [self.config.baseline] if self.config.baseline else []
+        for name in (*CONFIG_FILES, *self.config.rule_packs, *baseline):
+            try:
+                st = (self.base / name).stat()
+                stamp.append((st.st_size, st.st_mtime_ns))
+            except OSError:
+                stamp.append((-1, -1))
+        return tuple(stamp)
+
+    def refresh(self) -> int:
+        """
+        Brings the index up to date and returns the number of files rescanned.
+        """
+        with self._refresh:
+            entries = self.entries
+            stamp = self._stamp()
+            if stamp != self._config_stamp:
+                self.config = load_config(self.base)
+                self.ignore = load_ignore_patterns(self.base, self.config.extra_ignores)
+                self.ruleset = load_ruleset(self.base, self.config)
+                self.budget = ScanBudget.from_config(self.config)
+                self.archives = ArchiveLimits.from_config(self.config)
+                self.safe_tokens = SafeTokens.from_config(self.config)
+                # Config paths are relative to the scanned path
+                self.baseline = Baseline.load(self.base / self.config.baseline, self.base) if self.config.baseline else None
+                self.types = {}
+                entries = {}
+
+            order: List[str] = []
+            changed: List[Tuple[Path, str, int, int]] = []
+            classifier = FileClassifier(FileTypes.from_config(self.config), self.archives is not None, self.types)
+            for fp in iter_text_files(self.base, self.ignore, accept=classifier.accept):
+                rel = fp.relative_to(self.base).as_posix()
+                try:
+                    st = fp.stat()
+                except OSError:
+                    continue
+                order.append(rel)
+                entry = entries.get(rel)
+                if entry is None or entry[0] != st.st_size or entry[1] != st.st_mtime_ns:
+                    changed.append((fp, rel, st.st_size, st.st_mtime_ns))
+
+            fresh = {rel: entries[rel] for rel in order if rel in entries}
+            results = scan_paths(
+                [c[0] for c in changed], self.use_entropy, self.jobs, self.ruleset, self.base, self.budget, self.archives,
+                self.safe_tokens,
+            )
+            for (_, rel, size, mtime_ns), result in zip(changed, results):
+                findings = dedupe_findings(result.findings or [])
+                fresh[rel] = (size, mtime_ns, findings, dataclasses.replace(result, findings=None, stats=None))
+
+            self.types = classifier.verdicts
+            with self._lock:
+                self.classifier = classifier
+                self.entries, self.order = fresh, order
+                self._config_stamp = stamp
+                self.refreshed_at = time.time()
+                self.last_rescanned = len(changed)
+            return len(changed)
+
+    def snapshot(self) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Current findings in walk order plus the report meta, as `aminscan scan` would produce them.
+        """
+        with self._lock:
+            findings = [f for rel in self.order for f in self.entries[rel][2]]
+            meta: Dict[str, Any] = {
+                "scanned_path": str(self.base),
+                "url": None,
+                "entropy_enabled": self.use_entropy,
+            }
+            tally = ScanTally(self.base, self.classifier, self.budget, self.use_entropy, self.safe_tokens)
+            for rel in self.order:
+                tally.add(self.entries[rel][3])
+            tally.report(meta)
+            if self.baseline is not None:
+                # Counted per snapshot, as per scan
+                self.baseline.suppressed = 0
+                findings = list(self.baseline.filter(findings))
+                meta["baseline"] = self.baseline.stats()
+            meta.update({
+                "daemon": {
+                    "files": len(self.order),
+                    "refreshed_at": self.refreshed_at,
+                    "last_rescanned": self.last_rescanned,
+                },
+            })
+        return findings, meta
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_ServerMixin"
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        index = self.server.index
+        if url.path == "/scan":
+            # ?refresh=1 rescans before answering instead of serving the last poll
+            if parse_qs(url.query).get("refresh", ["0"])[0] not in ("", "0"):
+                index.refresh()
+            findings, meta = index.snapshot()
+            self._send(200, self.server.render(findings, meta))
+        elif url.path == "/status":
+            _, meta = index.snapshot()
+            self._send(200, json.dumps(meta["daemon"]))
+        else:
+            self._send(404, json.dumps({"error": "not found"}))
+
+    def _send(self, status: int, body: str) -> None:
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self) -> str:
+        # Unix socket peers have no (host, port) pair
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class _ServerMixin:
+    index: FindingsIndex
+    render: Renderer
+    daemon_threads = True
+
+
+class _TCPServer(_ServerMixin, ThreadingHTTPServer):
+    pass
+
+
+class _UnixServer(_ServerMixin, socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    pass
+
+
+class ScanDaemon:
+    """
+    Serves a FindingsIndex over HTTP on a loopback port or a Unix socket,
+    refreshing it from a polling thread every `interval` seconds.
+    """
+
+    def __init__(
+        self,
+        index: FindingsIndex,
+        render: Renderer,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        socket_path: str | None = None,
+        interval: float = DEFAULT_INTERVAL,
+    ):
+        self.index = index
+        self.interval = interval
+        self.socket_path = socket_path
+        if socket_path:
+            # A socket left behind by an earlier run is replaced; anything else is kept
+            if _remove_socket(socket_path) is False:
+                raise FileExistsError(f"{socket_path} exists and is not a socket")
+            self.httpd: socketserver.BaseServer = _UnixServer(socket_path, _Handler)
+        else:
+            self.httpd = _TCPServer((host, port), _Handler)
+        self.httpd.index = index  # type: ignore[attr-defined]
+        self.httpd.render = render  # type: ignore[attr-defined]
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def address(self) -> str:
+        if self.socket_path:
+            return f"unix:{self.socket_path}"
+        host, port = self.httpd.server_address[:2]  # type: ignore[misc]
+        return f"http://{host}:{port}"
+
+    def _poll(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.index.refresh()
+            except Exception as e:
+                # A broken config or a directory vanishing mid-walk; keep serving the last index
+                print(f"aminscan serve: refresh failed: {e}", file=sys.stderr)
+
+    def start(self) -> None:
+        """
+        Builds the index, then serves and polls from background threads (see close()).
+        """
+        self.index.refresh()
+        threading.Thread(target=self._poll, daemon=True).start()
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def serve_forever(self) -> None:
+        """
+        Builds the index and serves from the calling thread until interrupted.
+        """
+        self.index.refresh()
+        threading.Thread(target=self._poll, daemon=True).start()
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self.httpd.shutdown()
+            self._thread = None
+        self.httpd.server_close()
+        if self.socket_path:
+            _remove_socket(self.socket_path)
+
+
+def _remove_socket(path: str) -> bool | None:
+    """
+    Unlinks `path` if it is a Unix socket. Returns None if nothing is there, False if it is not a socket.
+    """
+    try:
+        st = os.lstat(path)
+    except FileNotFoundError:
+        return None
+    if not stat.S_ISSOCK(st.st_mode):
+        return False
+    os.unlink(path)
+    return True
@@ -2,10 +2,20 @@ from __future__ import annotations
 
 import math
 import re
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from .config import AminScanConfig
 
 # Candidate tokens: long-ish strings that often represent secrets
 TOKEN_RE = re.compile(r"[A-Za-z0-9_\-\/\+=]{20,}")
 
+# Thresholds used by looks_like_high_entropy_token
+MIN_TOKEN_LENGTH = 28
+MIN_ENTROPY = 4.0
+
 def shannon_entropy(s: str) -> float:
     if not s:
         return 0.0
@@ -23,7 +33,214 @@ def looks_like_high_entropy_token(s: str) -> bool:
     # Heuristics to reduce noise:
     # - long enough
     # - reasonably high entropy
-    if len(s) < 28:
+    if len(s) < MIN_TOKEN_LENGTH:
         return False
     ent = shannon_entropy(s)
-    return ent >= 4.0
+    return ent >= MIN_ENTROPY
+
+
+# Recent token scores; lockfiles and vendored code repeat the same tokens a lot
+MEMO_SIZE = 65_536
+# Scores this close to MIN_ENTROPY are recomputed with shannon_entropy, so the
+# fast paths never flip a decision through float rounding.
+_EXACT_MARGIN = 1e-9
+# c * log2(c), precomputed for typical token lengths
+_XLOG2X_SIZE = 1024
+_XLOG2X = [0.0] + [c * math.log2(c) for c in range(1, _XLOG2X_SIZE)]
+
+_NUMPY_BATCH = 4096
+
+_memo: "OrderedDict[str, float]" = OrderedDict()
+_np = None  # numpy module, False if unavailable, None if not tried yet
+
+
+def _xlog2x(c: int) -> float:
+    return _XLOG2X[c] if c < _XLOG2X_SIZE else c * math.log2(c)
+
+
+def _score_python(tokens: Sequence[str]) -> List[float]:
+    # H = log2(n) - sum(c * log2(c)) / n
+    out = []
+    for tok in tokens:
+        n = len(tok)
+        out.append(math.log2(n) - sum(_xlog2x(c) for c in Counter(tok).values()) / n if n else 0.0)
+    return out
+
+
+def _numpy():
+    # NumPy is optional and slow to import, so it is only loaded for the first big batch
+    global _np
+    if _np is None:
+        try:
+            import numpy
+        except ImportError:
+            _np = False
+        else:
+            _np = numpy
+    return _np or None
+
+
+def _score_numpy(tokens: Sequence[str]) -> List[float]:
+    # Bounded batches keep the (tokens x 128) count matrix small
+    if len(tokens) > _NUMPY_BATCH:
+        out: List[float] = []
+        for i in range(0, len(tokens), _NUMPY_BATCH):
+            out.extend(_score_numpy(tokens[i:i + _NUMPY_BATCH]))
+        return out
+    try:
+        codes = _np.frombuffer("".join(tokens).encode("ascii"), dtype=_np.uint8)
+    except UnicodeEncodeError:
+        return _score_python(tokens)
+    lengths = _np.fromiter((len(t) for t in tokens), dtype=_np.int64, count=len(tokens))
+    owner = _np.repeat(_np.arange(len(tokens), dtype=_np.int64), lengths)
+    counts = _np.bincount(owner * 128 + codes, minlength=len(tokens) * 128).reshape(len(tokens), 128)
+    table = _np.zeros(int(lengths.max()) + 1)
+    table[1:] = _np.arange(1, len(table)) * _np.log2(_np.arange(1, len(table)))
+    ent = _np.log2(lengths) - table[counts].sum(axis=1) / lengths
+    return ent.tolist()
+
+
+def entropy_scores(tokens: Sequence[str]) -> List[float]:
+    """
+    Shannon entropy of many tokens at once (NumPy when available), memoized.
+    Scores may differ from shannon_entropy in the last float bits.
+    """
+    scores: List[float | None] = []
+    missing: Dict[str, None] = {}
+    for tok in tokens:
+        score = _memo.get(tok)
+        if score is not None:
+            _memo.move_to_end(tok)
+        elif tok:
+            missing[tok] = None
+        else:
+            score = 0.0
+        scores.append(score)
+
+    if missing:
+        fresh = list(missing)
+        # The NumPy set-up cost only pays off for a handful of tokens or more
+        computed = _score_numpy(fresh) if len(fresh) >= 8 and _numpy() else _score_python(fresh)
+        for tok, score in zip(fresh, computed):
+            _memo[tok] = score
+        while len(_memo) > MEMO_SIZE:
+            _memo.popitem(last=False)
+        lookup = dict(zip(fresh, computed))
+        scores = [lookup[t] if s is None else s for t, s in zip(tokens, scores)]
+    return scores  # type: ignore[return-value]
+
+
+def high_entropy_flags(tokens: Sequence[str]) -> List[bool]:
+    """
+    Batched looks_like_high_entropy_token: same decision for every token.
+    """
+    flags = [False] * len(tokens)
+    idx = [i for i, t in enumerate(tokens) if len(t) >= MIN_TOKEN_LENGTH]
+    if not idx:
+        return flags
+    for i, score in zip(idx, entropy_scores([tokens[i] for i in idx])):
+        if abs(score - MIN_ENTROPY) < _EXACT_MARGIN:
+            score = shannon_entropy(tokens[i])
+        flags[i] = score >= MIN_ENTROPY
+    return flags
+
+
+# Token classes that are never secrets, skipped before scoring (see SafeTokens)
+SAFE_TOKEN_CLASSES = ("hex", "uuid", "integrity", "data-uri", "path")
+# Text before a token looked at for its context (`integrity": "`, `;base64,`, ` h1:`)
+SAFE_TOKEN_CONTEXT = 32
+
+_HEX_LOWER = "0123456789abcdef"
+_HEX_UPPER = "0123456789ABCDEF"
+_PATH_CHARS = "abcdefghijklmnopqrstuvwxyz/_-"
+# Subresource integrity (package-lock.json, yarn.lock, <script integrity=...>)
+_SRI_PREFIXES = ("sha1-", "sha256-", "sha384-", "sha512-")
+# A whole key a digest is the value of (npm, SRI attributes, checksum files), right before the value
+_INTEGRITY_KEY_RE = re.compile(r"""(?:^|[^\w.-])(?:integrity|checksum|sha\d*sum)["']?\s*[:=]?\s*["']?$""", re.IGNORECASE)
+# Hex digest lengths accepted after such a key: MD5, SHA-1, SHA-256
+_DIGEST_HEX_LENGTHS = (32, 40, 64)
+_GO_SUM_PREFIX = " h1:"
+
+
+class SafeTokenError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class SafeTokens:
+    """
+    Entropy candidates that are recognized as harmless by their characters and
+    the text right before them, and so are never scored or reported:
+
+    - hex: only hex digits (git SHAs, checksums); at most 4 bits per character,
+      so they (almost) never reach MIN_ENTROPY anyway and skipping saves the scoring
+    - uuid: 8-4-4-4-12 hex groups
+    - integrity: sha*- prefixed SRI hashes, hex digests that are the value of an
+      `integrity`/`checksum`/`sha256sum` key, go.sum `h1:` hashes
+    - data-uri: the payload after `;base64,`
+    - path: lowercase letters, `_` and `-` separated by `/`
+    """
+
+    classes: Tuple[str, ...] = SAFE_TOKEN_CLASSES
+
+    def __post_init__(self) -> None:
+        unknown = [c for c in self.classes if c not in SAFE_TOKEN_CLASSES]
+        if unknown:
+            raise SafeTokenError(f"unknown safe_tokens class {unknown[0]!r} (known: {', '.join(SAFE_TOKEN_CLASSES)})")
+
+    @classmethod
+    def from_config(cls, config: "AminScanConfig") -> "SafeTokens":
+        if config.safe_tokens is None:
+            return cls()
+        return cls(classes=tuple(config.safe_tokens))
+
+    def classify(self, tok: str, before: str = "") -> str | None:
+        """
+        The class of `tok` if it is one of the enabled safe classes, else None.
+        `before` is the text preceding the token on its line (its tail is enough).
+        """
+        classes = self.classes
+        if "hex" in classes and (not tok.strip(_HEX_LOWER) or not tok.strip(_HEX_UPPER)):
+            return "hex"
+        if (
+            "uuid" in classes and len(tok) == 36 and tok[8] == tok[13] == tok[18] == tok[23] == "-"
+            and not tok.replace("-", "").lower().strip(_HEX_LOWER)
+        ):
+            return "uuid"
+        if "integrity" in classes and (
+            tok.startswith(_SRI_PREFIXES)
+            or before.endswith(_GO_SUM_PREFIX)
+            or (
+                len(tok) in _DIGEST_HEX_LENGTHS and not tok.lower().strip(_HEX_LOWER)
+                and _INTEGRITY_KEY_RE.search(before) is not None
+            )
+        ):
+            return "integrity"
+        if "data-uri" in classes and before[-8:].lower() == ";base64,":
+            return "data-uri"
+        if "path" in classes and "/" in tok and not tok.strip(_PATH_CHARS):
+            return "path"
+        return None
+
+    def filter(self, matches: Sequence[re.Match], text: str, counts: Dict[str, int] | None = None) -> List[re.Match]:
+        """
+        Drops TOKEN_RE matches in `text` that classify as safe; `counts` is
+        incremented per class for each one dropped.
+        """
+        if not self.classes:
+            return list(matches)
+        kept = []
+        for m in matches:
+            start = m.start()
+            # The context never reaches into the previous line
+            lo = max(0, start - SAFE_TOKEN_CONTEXT)
+            lo = text.rfind("\n", lo, start) + 1 or lo
+            kind = self.classify(m.group(0), text[lo:start])
+            if kind is None:
+                kept.append(m)
+            elif counts is not None:
+                counts[kind] = counts.get(kind, 0) + 1
+        return kept
+
+
+DEFAULT_SAFE_TOKENS = SafeTokens()
@@ -1,8 +1,17 @@
 from __future__ import annotations
 
-from fnmatch import fnmatch
+import hashlib
+import mmap
+import os
+import re
+from bisect import bisect_right
+from fnmatch import translate
+from functools import lru_cache
 from pathlib import Path
-from typing import Iterable, List
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
 
 # Things we almost never want to scan
 DEFAULT_IGNORES = [
@@ -16,6 +25,7 @@ DEFAULT_IGNORES = [
     "**/*.min.js",
     "**/*.map",
     "**/*.lock",
+    "**/.aminscan-cache/**",
 ]
 
 # File types that usually contain readable text/code
@@ -23,6 +33,14 @@ TEXT_EXTS = {
     ".py", ".js", ".ts", ".jsx", ".tsx", ".java", ".go", ".rb", ".php", ".cs", ".cpp", ".c", ".h",
     ".html", ".css", ".json", ".yml", ".yaml", ".toml", ".env", ".txt", ".md", ".ini", ".cfg",
 }
+# Extension-less files are scanned when smaller than this
+NO_EXT_MAX_BYTES = 200_000
+
+# Archives scanned member by member (see archives.py), by kind
+ARCHIVE_SUFFIXES = {
+    ".zip": "zip", ".jar": "zip", ".war": "zip", ".ear": "zip", ".whl": "zip",
+    ".tar": "tar", ".tgz": "tar", ".tar.gz": "tar", ".tbz2": "tar", ".tar.bz2": "tar", ".txz": "tar", ".tar.xz": "tar",
+}
 
 
 def load_ignore_patterns(base: Path, extra: List[str] | None = None) -> List[str]:
@@ -41,28 +59,292 @@ def load_ignore_patterns(base: Path, extra: List[str] | None = None) -> List[str
     return patterns
 
 
+class IgnoreMatcher:
+    """
+    Ignore patterns compiled once into a single regex for files and one for
+    directories whose whole subtree is ignored (so the walker can prune them).
+
+    Patterns use fnmatch syntax (`*` also matches `/`); a leading `**/` also
+    matches at the top level, so `**/node_modules/**` covers `node_modules/x.js`.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        file_res: List[str] = []
+        dir_res: List[str] = []
+        for pat in patterns:
+            variants = [pat, pat[3:]] if pat.startswith("**/") else [pat]
+            for variant in variants:
+                if not variant:
+                    continue
+                file_res.append(translate(variant))
+                # "dir/**" (or "dir/*", as `*` crosses "/") ignores everything below "dir"
+                for tail in ("/**", "/*"):
+                    if variant.endswith(tail) and len(variant) > len(tail):
+                        dir_res.append(translate(variant[:-len(tail)]))
+                        break
+        self._file = re.compile("|".join(file_res)) if file_res else None
+        self._dir = re.compile("|".join(dir_res)) if dir_res else None
+
+    def match_file(self, rel_posix: str) -> bool:
+        return self._file is not None and self._file.match(rel_posix) is not None
+
+    def match_dir(self, rel_posix: str) -> bool:
+        """
+        True if every path below this directory is ignored.
+        """
+        return self._dir is not None and self._dir.match(rel_posix) is not None
+
+
+@lru_cache(maxsize=32)
+def compile_ignores(patterns: Tuple[str, ...]) -> IgnoreMatcher:
+    return IgnoreMatcher(patterns)
+
 
 def is_ignored(rel_posix: str, patterns: List[str]) -> bool:
     """
     Checks if a file path (relative, posix-style) matches any ignore pattern.
     """
-    for pat in patterns:
-        if fnmatch(rel_posix, pat):
-            return True
-    return False
+    return compile_ignores(tuple(patterns)).match_file(rel_posix)
 
 
-def iter_text_files(base: Path, ignore_patterns: List[str]) -> Iterable[Path]:
+def iter_text_files(
+    base: Path,
+    ignore_patterns: List[str],
+    threads: int = 0,
+    accept: Callable[[str, os.DirEntry], bool] | None = None,
+) -> Iterator[Path]:
     """
-    Iterates over text/code files under base that are not ignored.
+    Iterates over text/code files under base that are not ignored, in sorted
+    depth-first order. Ignored directories are never entered. `accept(rel, entry)`
+    replaces the extension-based text check (see classify.FileClassifier).
+
+    With `threads` > 1, directory listings are prefetched on a thread pool;
+    the output order does not change.
     """
-    for p in base.rglob("*"):
-        if not p.is_file():
-            continue
-        rel = p.relative_to(base).as_posix()
-        if is_ignored(rel, ignore_patterns):
-            continue
-
-        # Only scan text-like files; also allow no-extension small files
-        if p.suffix.lower() in TEXT_EXTS or (p.suffix == "" and p.stat().st_size < 200_000):
-            yield p
+    matcher = compile_ignores(tuple(ignore_patterns))
+    pool = None
+    if threads > 1:
+        from concurrent.futures import ThreadPoolExecutor
+
+        pool = ThreadPoolExecutor(max_workers=threads)
+    pending: Dict[str, Future] = {}
+
+    def listing(path: str) -> List[os.DirEntry]:
+        fut = pending.pop(path, None)
+        entries = fut.result() if fut is not None else _scandir_sorted(path)
+        if pool is not None:
+            for e in entries:
+                if e.is_dir(follow_symlinks=False) and not matcher.match_dir(_rel(base_s, e.path)):
+                    pending[e.path] = pool.submit(_scandir_sorted, e.path)
+        return entries
+
+    base_s = str(base)
+    try:
+        stack = [iter(listing(base_s))]
+        while stack:
+            entry = next(stack[-1], None)
+            if entry is None:
+                stack.pop()
+                continue
+            rel = _rel(base_s, entry.path)
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if not matcher.match_dir(rel):
+                        stack.append(iter(listing(entry.path)))
+                    continue
+                if not entry.is_file() or matcher.match_file(rel):
+                    continue
+                if accept is not None:
+                    if accept(rel, entry):
+                        yield Path(entry.path)
+                    continue
+                suffix = _suffix(entry.name)
+                # Only scan text-like files; also allow no-extension small files
+                if suffix in TEXT_EXTS or (suffix == "" and entry.stat().st_size < NO_EXT_MAX_BYTES):
+                    yield Path(entry.path)
+            except OSError:
+                continue
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _scandir_sorted(path: str) -> List[os.DirEntry]:
+    try:
+        with os.scandir(path) as it:
+            return sorted(it, key=lambda e: e.name)
+    except OSError:
+        return []
+
+
+def _rel(base: str, path: str) -> str:
+    rel = path[len(base):].lstrip(os.sep)
+    return rel.replace(os.sep, "/") if os.sep != "/" else rel
+
+
+def _suffix(name: str) -> str:
+    # Same as Path(name).suffix, lower-cased
+    i = name.rfind(".")
+    return name[i:].lower() if 0 < i < len(name) - 1 else ""
+
+
+def is_text_file(p: Path) -> bool:
+    # Only scan text-like files; also allow no-extension small files
+    return is_text_name(p.name, p.stat().st_size)
+
+
+def is_text_name(name: str, size: int) -> bool:
+    suffix = _suffix(name)
+    return suffix in TEXT_EXTS or (suffix == "" and size < NO_EXT_MAX_BYTES)
+
+
+def archive_kind(name: str) -> str | None:
+    """
+    "zip" or "tar" for archive file names, None otherwise.
+    """
+    lower = name.lower()
+    for suffix, kind in ARCHIVE_SUFFIXES.items():
+        if lower.endswith(suffix):
+            return kind
+    return None
+
+
+# Same line boundaries as str.splitlines()
+LINE_BREAK_RE = re.compile(r"\r\n|[\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+
+
+class LineIndex:
+    """
+    Maps character offsets in a text buffer to 1-based line numbers.
+    The newline offset table is only built the first time it is needed.
+    """
+
+    def __init__(self, text: str):
+        self._text = text
+        self._starts: List[int] | None = None
+
+    def _line_starts(self) -> List[int]:
+        if self._starts is None:
+            self._starts = [0] + [m.end() for m in LINE_BREAK_RE.finditer(self._text)]
+        return self._starts
+
+    def line_of(self, pos: int) -> int:
+        return bisect_right(self._line_starts(), pos)
+
+    def line_bounds(self, line_no: int) -> Tuple[int, int]:
+        """
+        Returns (start, end) offsets of a line, excluding its line break.
+        """
+        starts = self._line_starts()
+        start = starts[line_no - 1]
+        if line_no == len(starts):
+            return start, len(self._text)
+        # The next line starts right after this one's break; only CRLF is two characters
+        end = starts[line_no]
+        return start, end - (2 if self._text.startswith("\r\n", end - 2) else 1)
+
+
+# Files at least this large are scanned window by window instead of being read whole
+LARGE_FILE_BYTES = 16 * 1024 * 1024
+# Window size for large files
+CHUNK_BYTES = 4 * 1024 * 1024
+# A line longer than a window is cut at an arbitrary character; the windows on
+# either side of such a cut share this many bytes, so that a match crossing it
+# is whole in one of them (see TextChunk.span). At least LONG_LINE_CONTEXT.
+CHUNK_OVERLAP = 4096
+
+
+class TextChunk(NamedTuple):
+    first_line: int  # line number of the chunk's first line
+    last_line: int  # line number of the chunk's last line
+    text: str
+    continued: bool  # the first line started in the previous chunk
+    span: Tuple[int, int]  # hits starting in text[span[0]:span[1]] belong to this chunk
+
+
+def iter_text_chunks(fp: Path, chunk_bytes: int | None = None, hasher: Any = None) -> Iterator[TextChunk]:
+    """
+    Decodes a file window by window through mmap, keeping memory bounded by the window size.
+
+    Windows end on a newline where possible. A line longer than a window is cut
+    at a UTF-8 character boundary, and the next window starts CHUNK_OVERLAP bytes
+    before the cut, so both see the text around it; `span` tells which part of
+    each chunk's text is its own, and `continued` that the first line started in
+    the previous chunk. `hasher`, if given, is fed every byte of the file once.
+    """
+    chunk_bytes = chunk_bytes or CHUNK_BYTES
+    overlap = min(CHUNK_OVERLAP, chunk_bytes // 4)
+    with open(fp, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = own = 0
+            line = 1
+            continued = False
+            while pos < size:
+                # [pos, own) was the previous chunk's; [own, cut) is ours;
+                # [nxt, end) is shared with the next chunk
+                end = min(pos + chunk_bytes, size)
+                nl = mm.rfind(b"\n", own, end) if end < size else -1
+                if end == size or nl != -1:
+                    end = cut = nxt = nl + 1 if nl != -1 else end
+                else:
+                    end = _char_boundary(mm, own + 1, end)
+                    cut = _char_boundary(mm, own + 1, end - overlap)
+                    nxt = _char_boundary(mm, own, cut - overlap)
+
+                if hasher is not None:
+                    hasher.update(mm[own:cut])
+                head, body, shared, tail = (
+                    mm[a:b].decode("utf-8", errors="ignore") for a, b in ((pos, own), (own, nxt), (nxt, cut), (cut, end))
+                )
+                text = head + body + shared + tail
+                breaks = last_break = 0
+                for m in LINE_BREAK_RE.finditer(text):
+                    breaks += 1
+                    last_break = m.end()
+                ends_with_break = breaks > 0 and last_break == len(text)
+                span = (len(head), len(text) - len(tail))
+                yield TextChunk(line, line + breaks - (1 if ends_with_break else 0), text, continued, span)
+
+                _release(mm, pos, nxt)
+                if nxt == end:
+                    line += breaks
+                    continued = not ends_with_break
+                else:
+                    before = head + body
+                    line += len(LINE_BREAK_RE.findall(before))
+                    continued = LINE_BREAK_RE.match(before[-1:]) is None
+                pos, own = nxt, cut
+
+
+def _char_boundary(mm: mmap.mmap, lo: int, end: int) -> int:
+    # Don't split a UTF-8 sequence or a CRLF pair
+    end = max(lo, end)
+    while end > lo and (mm[end] & 0xC0) == 0x80:
+        end -= 1
+    if end > lo and mm[end - 1] == 0x0D:
+        end -= 1
+    return end
+
+
+def _release(mm: mmap.mmap, start: int, end: int) -> None:
+    # Drop already scanned pages from our resident set
+    if not hasattr(mmap, "MADV_DONTNEED"):
+        return
+    page_start = start - start % mmap.PAGESIZE
+    try:
+        mm.madvise(mmap.MADV_DONTNEED, page_start, end - page_start)
+    except (OSError, ValueError):
+        pass
+
+
+def file_digest(fp: Path, block: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(fp, "rb") as f:
+        while True:
+            data = f.read(block)
+            if not data:
+                return h.hexdigest()
+            h.update(data)
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import sys
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Tuple
+
+# Keys of a finding, in report order. The line hash (see baseline.fingerprint) is
+# not among them: it identifies the secret-bearing line, so it stays out of reports.
+FIELDS = ("rule_id", "title", "severity", "confidence", "file", "line", "evidence_masked", "recommendation")
+# Keys that come from the rule and are the same for all of its findings
+RULE_FIELDS = ("rule_id", "title", "severity", "confidence", "recommendation")
+_RULE_POS = {k: i for i, k in enumerate(RULE_FIELDS)}
+_OWN_FIELDS = frozenset(FIELDS) - frozenset(RULE_FIELDS)
+
+RuleInfo = Tuple[str, str, str, str, str]
+
+# Rule metadata of this process, referenced by index from every finding of the rule.
+# Indices are process-local: findings pickle the metadata itself (see Finding.__reduce__).
+_RULES: List[RuleInfo] = []
+_RULE_INDEX: Dict[RuleInfo, int] = {}
+
+
+def rule_index(rule_id: str, title: str, severity: str, confidence: str, recommendation: str) -> int:
+    """
+    Index of the rule metadata in the process-wide table, added on first use.
+    """
+    info = (rule_id, title, severity, confidence, recommendation)
+    index = _RULE_INDEX.get(info)
+    if index is None:
+        index = _RULE_INDEX[info] = len(_RULES)
+        _RULES.append(info)
+    return index
+
+
+class Finding(Mapping):
+    """
+    A finding as a read-only mapping with the keys of the report dict (FIELDS, plus
+    extra keys such as `commit`), so `f["file"]`, `f.get(...)` and `dict(f)` work as before.
+
+    It holds a fraction of the memory of that dict: the rule's title, severity and
+    recommendation are shared through the rule table, `file` is interned so all
+    findings of a file point at one string, and there is no per-finding hash table.
+    Use to_dict() (or json_default) to serialize.
+
+    `line_hash` is an attribute only, not a key: reports never contain it, and
+    to_record() (record_default) adds it for stores that are read back, such as the cache.
+    """
+
+    __slots__ = ("_rule", "file", "line", "evidence_masked", "line_hash", "_extra")
+
+    def __init__(
+        self,
+        rule: int,
+        file: str,
+        line: int,
+        evidence_masked: str,
+        line_hash: str,
+        extra: Dict[str, Any] | None = None,
+    ):
+        self._rule = rule
+        self.file = sys.intern(file)
+        self.line = line
+        self.evidence_masked = evidence_masked
+        self.line_hash = line_hash
+        self._extra = extra or None
+
+    @classmethod
+    def from_mapping(cls, d: Mapping) -> "Finding":
+        """
+        Converts a report dict or a record (e.g. from the cache) back; keys outside FIELDS
+        are kept as extras.
+        """
+        if isinstance(d, Finding):
+            return d
+        rule = rule_index(*(d.get(k) for k in RULE_FIELDS))
+        extra = {k: v for k, v in d.items() if k not in FIELDS and k != "line_hash"}
+        return cls(rule, d.get("file"), d.get("line"), d.get("evidence_masked"), d.get("line_hash"), extra)
+
+    @property
+    def rule_id(self) -> str:
+        return _RULES[self._rule][0]
+
+    @property
+    def severity(self) -> str:
+        return _RULES[self._rule][2]
+
+    def replace(self, **fields: Any) -> "Finding":
+        """
+        Copy with `file` or other keys changed; unknown keys become extras.
+        """
+        extra = dict(self._extra or {})
+        f = Finding(self._rule, self.file, self.line, self.evidence_masked, self.line_hash)
+        for k, v in fields.items():
+            if k in _OWN_FIELDS or k == "line_hash":
+                setattr(f, k, sys.intern(v) if k == "file" else v)
+            elif k in _RULE_POS:
+                raise KeyError(f"{k} is set by the rule")
+            else:
+                extra[k] = v
+        f._extra = extra or None
+        return f
+
+    def to_dict(self) -> Dict[str, Any]:
+        rule_id, title, severity, confidence, recommendation = _RULES[self._rule]
+        d = {
+            "rule_id": rule_id,
+            "title": title,
+            "severity": severity,
+            "confidence": confidence,
+            "file": self.file,
+            "line": self.line,
+            "evidence_masked": self.evidence_masked,
+            "recommendation": recommendation,
+        }
+        if self._extra:
+            d.update(self._extra)
+        return d
+
+    def to_record(self) -> Dict[str, Any]:
+        """
+        to_dict() plus the line hash, for stores read back with from_mapping().
+        """
+        d = self.to_dict()
+        d["line_hash"] = self.line_hash
+        return d
+
+    def __getitem__(self, key: str) -> Any:
+        pos = _RULE_POS.get(key)
+        if pos is not None:
+            return _RULES[self._rule][pos]
+        if key in _OWN_FIELDS:
+            return getattr(self, key)
+        if self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __iter__(self) -> Iterator[str]:
+        yield from FIELDS
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return len(FIELDS) + len(self._extra or ())
+
+    def __eq__(self, other: object) -> bool:
+        # Equal when their report mappings are: the line hash is not part of them
+        if isinstance(other, Finding):
+            return (
+                _RULES[self._rule] == _RULES[other._rule]
+                and self.file == other.file
+                and self.line == other.line
+                and self.evidence_masked == other.evidence_masked
+                and (self._extra or None) == (other._extra or None)
+            )
+        return Mapping.__eq__(self, other)
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"Finding({self.to_dict()!r})"
+
+    def __reduce__(self):
+        # Rule indices differ between processes, so the metadata travels with the finding;
+        # pickle memoizes the shared tuple, so a worker batch carries each rule once.
+        return _restore, (_RULES[self._rule], self.file, self.line, self.evidence_masked, self.line_hash, self._extra)
+
+
+def _restore(info: RuleInfo, file: str, line: int, evidence_masked: str, line_hash: str, extra: Dict[str, Any] | None) -> Finding:
+    return Finding(rule_index(*info), file, line, evidence_masked, line_hash, extra)
+
+
+def json_default(o: Any) -> Any:
+    """
+    `default=` for json.dumps: renders findings in their dict shape.
+    """
+    if isinstance(o, Finding):
+        return o.to_dict()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def record_default(o: Any) -> Any:
+    """
+    `default=` for json.dumps of stores that are read back: findings as to_record().
+    """
+    if isinstance(o, Finding):
+        return o.to_record()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
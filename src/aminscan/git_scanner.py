@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+import codecs
+import re
+import subprocess
+import tempfile
+from pathlib import Path, PurePosixPath
+from typing import IO, TYPE_CHECKING, Any, Dict, Iterator, List, Tuple
+
+from .classify import SNIFF_BLOCK, FileClassifier, FileTypes, looks_binary
+from .entropy import SafeTokens
+from .file_utils import is_ignored, load_ignore_patterns
+from .findings import Finding
+from .secrets_rules import DEFAULT_RULESET, RuleSet
+from .secrets_scanner import dedupe_findings, dotenv_finding, scan_lines, scan_text
+
+if TYPE_CHECKING:
+    import sqlite3
+
+HUNK_RE = re.compile(rb"^@@ -\d+(?:,\d+)? \+(\d+)(?:,\d+)? @@")
+
+# Blobs larger than this are skipped in history scans (read and discarded, never held in memory)
+MAX_BLOB_BYTES = 5 * 1024 * 1024
+# Blob ids kept in memory before the seen-set spills to disk
+SEEN_MEMORY_LIMIT = 500_000
+
+
+class GitError(RuntimeError):
+    pass
+
+
+def run_git(base: Path, *args: str) -> bytes:
+    try:
+        proc = subprocess.run(
+            ["git", "-c", "core.quotePath=false", *args],
+            cwd=base,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=False,
+        )
+    except FileNotFoundError as e:
+        raise GitError("git executable not found") from e
+    if proc.returncode != 0:
+        raise GitError(proc.stderr.decode("utf-8", errors="replace").strip() or f"git {args[0]} failed")
+    return proc.stdout
+
+
+def iter_added_lines(base: Path, rev_range: str | None = None, staged: bool = False) -> Iterator[Tuple[str, int, str]]:
+    """
+    Yields (path, line_no, line) for every line added by a diff.
+
+    Paths are relative to `base` and line numbers refer to the post-change file.
+    Use `rev_range` (e.g. "origin/main..HEAD") or `staged` for the index.
+    """
+    args = ["diff", "--no-color", "--no-ext-diff", "--no-renames", "--unified=0", "--relative", "--no-prefix"]
+    if staged:
+        args.append("--cached")
+    elif rev_range:
+        args.append(rev_range)
+    else:
+        raise ValueError("either rev_range or staged is required")
+    args.append("--")
+
+    path: str | None = None
+    next_line = 0
+    in_hunk = False
+    for raw in run_git(base, *args).split(b"\n"):
+        if raw.startswith(b"diff --git "):
+            path, in_hunk = None, False
+        elif not in_hunk and raw.startswith(b"+++ "):
+            # Git ends names with a space in a TAB and C-quotes names with quotes or control characters
+            name = raw[4:-1] if raw.endswith(b"\t") else raw[4:]
+            target = _unquote(name)
+            path = None if target == "/dev/null" else target
+        elif raw.startswith(b"@@"):
+            m = HUNK_RE.match(raw)
+            in_hunk = m is not None
+            next_line = int(m.group(1)) if m else 0
+        elif in_hunk and raw.startswith(b"+"):
+            if path is not None:
+                line = raw[1:].decode("utf-8", errors="ignore").rstrip("\r")
+                yield path, next_line, line
+            next_line += 1
+
+
+def scan_diff(
+    base: Path,
+    rev_range: str | None = None,
+    staged: bool = False,
+    use_entropy: bool = True,
+    extra_ignores: List[str] | None = None,
+    ruleset: RuleSet | None = None,
+    safe_tokens: SafeTokens | None = None,
+    types: FileTypes | None = None,
+) -> List[Finding]:
+    """
+    Runs the secret rules and entropy heuristic on added lines only.
+    Findings use the same shape as scan_secrets, with the working tree path.
+    Files are picked like walked ones (see classify.py): by name, then by the
+    first block of the working tree file, or of the added lines if it is gone.
+    """
+    ruleset = ruleset or DEFAULT_RULESET
+    ignore = load_ignore_patterns(base, extra_ignores or [])
+    classifier = FileClassifier(types)
+    findings: List[Finding] = []
+
+    current: str | None = None
+    batch: List[Tuple[int, str]] = []
+    verdict = False
+
+    def flush() -> None:
+        if current is None or verdict is False or not batch:
+            return
+        fp = base / current
+        if looks_binary(_diff_head(fp, batch)):
+            return
+        if fp.name == ".env":
+            findings.append(dotenv_finding(str(fp)))
+        findings.extend(scan_lines(str(fp), batch, use_entropy, ruleset.for_path(current), safe_tokens))
+
+    for path, line_no, line in iter_added_lines(base, rev_range, staged):
+        if path != current:
+            flush()
+            current, batch = path, []
+            verdict = False if is_ignored(path, ignore) else classifier.by_name(PurePosixPath(path).name)
+        if verdict:
+            batch.append((line_no, line))
+    flush()
+
+    return dedupe_findings(findings)
+
+
+def _diff_head(fp: Path, lines: List[Tuple[int, str]]) -> bytes:
+    try:
+        with open(fp, "rb") as fh:
+            return fh.read(SNIFF_BLOCK)
+    except OSError:
+        # Not in the working tree (e.g. deleted after staging)
+        return "\n".join(line for _, line in lines).encode("utf-8")[:SNIFF_BLOCK]
+
+
+class BlobSet:
+    """
+    Set of blob ids that keeps up to `memory_limit` entries in RAM and spills
+    the rest to a temporary SQLite table.
+    """
+
+    def __init__(self, memory_limit: int = SEEN_MEMORY_LIMIT):
+        self.memory_limit = memory_limit
+        self._mem: set[bytes] = set()
+        self._tmpdir: tempfile.TemporaryDirectory | None = None
+        self._db: sqlite3.Connection | None = None
+
+    def add(self, sha: str) -> bool:
+        """
+        Adds a blob id; returns False if it was already present.
+        """
+        key = bytes.fromhex(sha)
+        if key in self._mem:
+            return False
+        if self._db is not None and self._db.execute("SELECT 1 FROM seen WHERE id = ?", (key,)).fetchone():
+            return False
+        self._mem.add(key)
+        if len(self._mem) >= self.memory_limit:
+            self._spill()
+        return True
+
+    def _spill(self) -> None:
+        if self._db is None:
+            import sqlite3
+
+            self._tmpdir = tempfile.TemporaryDirectory(prefix="aminscan-")
+            self._db = sqlite3.connect(str(Path(self._tmpdir.name) / "seen.db"))
+            self._db.execute("CREATE TABLE seen (id BLOB PRIMARY KEY) WITHOUT ROWID")
+        self._db.executemany("INSERT OR IGNORE INTO seen VALUES (?)", ((k,) for k in self._mem))
+        self._db.commit()
+        self._mem.clear()
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+        if self._tmpdir is not None:
+            self._tmpdir.cleanup()
+            self._tmpdir = None
+
+
+class CatFile:
+    """
+    One long-lived `git cat-file --batch` process for reading blobs by id.
+    """
+
+    def __init__(self, base: Path):
+        self.proc = subprocess.Popen(
+            ["git", "cat-file", "--batch"],
+            cwd=base,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def read(self, sha: str, max_bytes: int = MAX_BLOB_BYTES) -> bytes | None:
+        """
+        Returns the blob content, or None if it is missing, not a blob, or over `max_bytes`.
+        """
+        assert self.proc.stdin is not None and self.proc.stdout is not None
+        self.proc.stdin.write(sha.encode("ascii") + b"\n")
+        self.proc.stdin.flush()
+        header = self.proc.stdout.readline().split()
+        if len(header) != 3:
+            return None  # "<sha> missing"
+        kind, size = header[1], int(header[2])
+        if kind != b"blob" or size > max_bytes:
+            _discard(self.proc.stdout, size + 1)
+            return None
+        data = self.proc.stdout.read(size)
+        self.proc.stdout.read(1)  # trailing newline
+        return data
+
+    def close(self) -> None:
+        if self.proc.stdin:
+            self.proc.stdin.close()
+        self.proc.wait()
+
+
+def _discard(stream: IO[bytes], n: int) -> None:
+    while n > 0:
+        chunk = stream.read(min(n, 1 << 16))
+        if not chunk:
+            return
+        n -= len(chunk)
+
+
+def iter_history_changes(base: Path) -> Iterator[Tuple[str, str, str]]:
+    """
+    Yields (commit, path, blob) for every file version added or modified by any
+    reachable commit, oldest commits first. Paths are relative to `base`.
+    """
+    args = [
+        "git", "-c", "core.quotePath=false", "log", "--all", "--reverse", "--date-order",
+        "--format=commit %H", "--raw", "--no-abbrev", "--no-renames", "--root", "-m", "--relative",
+    ]
+    with tempfile.TemporaryFile() as err:
+        try:
+            proc = subprocess.Popen(args, cwd=base, stdout=subprocess.PIPE, stderr=err)
+        except FileNotFoundError as e:
+            raise GitError("git executable not found") from e
+        assert proc.stdout is not None
+
+        commit = ""
+        for raw in proc.stdout:
+            if raw.startswith(b"commit "):
+                commit = raw[7:].strip().decode("ascii")
+            elif raw.startswith(b":"):
+                meta, _, path = raw.rstrip(b"\n").partition(b"\t")
+                fields = meta.split()
+                # :old_mode new_mode old_sha new_sha status
+                if len(fields) < 5 or fields[4][:1] == b"D" or not fields[1].startswith(b"100"):
+                    continue
+                yield commit, _unquote(path), fields[3].decode("ascii")
+
+        if proc.wait() != 0:
+            err.seek(0)
+            raise GitError(err.read().decode("utf-8", errors="replace").strip() or "git log failed")
+
+
+def _unquote(path: bytes) -> str:
+    # core.quotePath=false still C-quotes names with control characters or quotes
+    if len(path) >= 2 and path[:1] == path[-1:] == b'"':
+        path = codecs.escape_decode(path[1:-1])[0]
+    return path.decode("utf-8", errors="replace")
+
+
+def scan_history(
+    base: Path,
+    use_entropy: bool = True,
+    extra_ignores: List[str] | None = None,
+    max_blob_bytes: int = MAX_BLOB_BYTES,
+    meta: Dict[str, Any] | None = None,
+    ruleset: RuleSet | None = None,
+    safe_tokens: SafeTokens | None = None,
+    types: FileTypes | None = None,
+) -> List[Finding]:
+    """
+    Scans every blob reachable from any ref, each unique blob exactly once.
+
+    Findings point at the first commit and path where the blob appeared
+    (`file` is repository-relative, plus a `commit` key). Blobs are picked
+    like walked files (see classify.py), by path name and then by content.
+    """
+    ruleset = ruleset or DEFAULT_RULESET
+    ignore = load_ignore_patterns(base, extra_ignores or [])
+    classifier = FileClassifier(types)
+    findings: List[Finding] = []
+    seen = BlobSet()
+    cat = CatFile(base)
+    last_commit = ""
+    commits = scanned = 0
+    try:
+        for commit, path, sha in iter_history_changes(base):
+            if commit != last_commit:
+                last_commit, commits = commit, commits + 1
+            if is_ignored(path, ignore):
+                continue
+            # Binary names are rejected before the blob is read
+            verdict = classifier.by_name(PurePosixPath(path).name)
+            if not verdict or not seen.add(sha):
+                continue
+            data = cat.read(sha, max_blob_bytes)
+            if data is None or looks_binary(data[:SNIFF_BLOCK]):
+                continue
+            scanned += 1
+            text = data.decode("utf-8", errors="ignore")
+            for f in scan_text(Path(path), text, use_entropy, ruleset.for_path(path), safe_tokens=safe_tokens):
+                findings.append(f.replace(commit=commit))
+    finally:
+        cat.close()
+        seen.close()
+
+    if meta is not None:
+        meta["history"] = {"commits_with_changes": commits, "blobs_scanned": scanned}
+    return dedupe_findings(findings)
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Tuple
+
+from .archives import ArchiveLimits
+from .baseline import DEFAULT_BASELINE_FILE, Baseline
+from .budget import ScanBudget
+from .cache import CACHE_DIR_NAME, ScanCache, scan_signature
+from .classify import FileTypes
+from .config import AminScanConfig, load_config
+from .entropy import SafeTokens
+from .git_scanner import scan_diff, scan_history
+from .rule_packs import load_ruleset
+from .secrets_scanner import iter_secrets
+from .sharding import Shard
+from .stats import ScanStats, timed
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+
+class ScanPipeline:
+    """
+    One `aminscan scan` as a library call.
+
+    The configuration (rules, baseline, cache, limits) is resolved up front.
+    findings() then runs the repository scan, which is CPU-bound, and the web scan,
+    which is I/O-bound, at the same time and returns their findings as one stream:
+    repository findings as they are produced, then the web findings.
+
+        pipeline = ScanPipeline(Path("."), url="https://example.com")
+        for f in pipeline.findings():
+            ...
+        pipeline.meta  # complete once the stream is exhausted
+
+    `url`, `cache` and `baseline` default to the config. `cache` and `baseline`
+    may be True (the default location), False (off) or a path. `diff`/`staged`/`history`
+    select a git scan instead of the working tree. Raises RuleError, SafeTokenError or
+    BaselineError for a broken config, and findings() raises GitError.
+    """
+
+    def __init__(
+        self,
+        base: Path,
+        url: str | None = None,
+        use_entropy: bool = True,
+        jobs: int | None = None,
+        cache: Path | bool | None = None,
+        baseline: Path | bool | None = None,
+        shard: Shard | None = None,
+        diff: str | None = None,
+        staged: bool = False,
+        history: bool = False,
+        stats: ScanStats | None = None,
+        config: AminScanConfig | None = None,
+        web_timeout: int = 10,
+    ):
+        self.base = base
+        self.jobs = jobs
+        self.shard = shard
+        self.diff = diff
+        self.staged = staged
+        self.history = history
+        self.stats = stats
+        self.web_timeout = web_timeout
+
+        with timed(stats, "config"):
+            self.config = config if config is not None else load_config(base)
+            self.ruleset = load_ruleset(base, self.config)
+            self.safe_tokens = SafeTokens.from_config(self.config)
+            self.baseline = self._open_baseline(baseline)
+        self.url = url or self.config.url
+        self.use_entropy = self.config.entropy and use_entropy
+        self.cache = self._open_cache(cache)
+        self.meta: Dict[str, Any] = {
+            "scanned_path": str(base),
+            "url": self.url,
+            "entropy_enabled": self.use_entropy,
+        }
+        if shard is not None:
+            # `merge` only combines shards of scans with the same settings
+            self.meta["signature"] = scan_signature(self.use_entropy, self.config, self.ruleset)
+
+    def _open_baseline(self, baseline: Path | bool | None) -> Baseline | None:
+        if baseline is False or (baseline is None and not self.config.baseline):
+            return None
+        if isinstance(baseline, Path):
+            fp = baseline
+        else:
+            # Config paths are relative to the scanned path
+            fp = self.base / (self.config.baseline or DEFAULT_BASELINE_FILE)
+        return Baseline.load(fp, self.base)
+
+    def _open_cache(self, cache: Path | bool | None) -> ScanCache | None:
+        if cache is False or (cache is None and not self.config.cache):
+            return None
+        directory = cache if isinstance(cache, Path) else self.base / CACHE_DIR_NAME
+        return ScanCache.open(directory, use_entropy=self.use_entropy, config=self.config, ruleset=self.ruleset)
+
+    @property
+    def git_scan(self) -> bool:
+        return bool(self.diff or self.staged or self.history)
+
+    def findings(self) -> Iterator[Dict[str, Any]]:
+        """
+        Starts both scans and returns the merged stream. Git scans start (and
+        can fail) right away; the working tree scan runs as the stream is consumed.
+        """
+        web: Future | None = None
+        if self.url:
+            from concurrent.futures import ThreadPoolExecutor
+
+            pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="aminscan-web")
+            web = pool.submit(self._scan_web, self.url)
+            # The thread finishes the scan on its own; nothing else is queued
+            pool.shutdown(wait=False)
+
+        stream: Iterable[Dict[str, Any]] = self._merge(self._scan_repo(), web)
+        if self.baseline is not None:
+            stream = self._suppress(stream, self.baseline)
+        return iter(stream)
+
+    def run(self) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Consumes findings() and returns (findings, meta).
+        """
+        findings = list(self.findings())
+        return findings, self.meta
+
+    def _scan_repo(self) -> Iterable[Dict[str, Any]]:
+        config = self.config
+        if self.history:
+            return scan_history(
+                self.base,
+                use_entropy=self.use_entropy,
+                extra_ignores=config.extra_ignores,
+                meta=self.meta,
+                ruleset=self.ruleset,
+                safe_tokens=self.safe_tokens,
+                types=FileTypes.from_config(config),
+            )
+        if self.git_scan:
+            findings = scan_diff(
+                self.base,
+                rev_range=self.diff,
+                staged=self.staged,
+                use_entropy=self.use_entropy,
+                extra_ignores=config.extra_ignores,
+                ruleset=self.ruleset,
+                safe_tokens=self.safe_tokens,
+                types=FileTypes.from_config(config),
+            )
+            self.meta["diff"] = "staged" if self.staged else self.diff
+            return findings
+        return iter_secrets(
+            self.base,
+            use_entropy=self.use_entropy,
+            extra_ignores=config.extra_ignores,
+            jobs=self.jobs,
+            cache=self.cache,
+            meta=self.meta,
+            stats=self.stats,
+            ruleset=self.ruleset,
+            budget=ScanBudget.from_config(config),
+            shard=self.shard,
+            archives=ArchiveLimits.from_config(config),
+            types=FileTypes.from_config(config),
+            safe_tokens=self.safe_tokens,
+        )
+
+    def _scan_web(self, url: str) -> Tuple[List[Dict[str, Any]], float]:
+        # requests costs more to import than a small repository takes to scan
+        from .web_scanner import scan_web
+
+        t0 = time.perf_counter()
+        # Tagged like `aminscan web` findings, so reports and baselines tell targets apart
+        findings = [{**f, "target": url} for f in scan_web(url, timeout=self.web_timeout)]
+        return findings, time.perf_counter() - t0
+
+    def _merge(self, repo: Iterable[Dict[str, Any]], web: Future | None) -> Iterator[Dict[str, Any]]:
+        yield from repo
+        if web is None:
+            return
+        findings, seconds = web.result()
+        # Recorded here, not in the web thread, so stats hooks always run on the consuming thread
+        if self.stats is not None:
+            self.stats.add_phase("web", seconds)
+        yield from findings
+
+    def _suppress(self, findings: Iterable[Dict[str, Any]], baseline: Baseline) -> Iterator[Dict[str, Any]]:
+        yield from baseline.filter(findings)
+        self.meta["baseline"] = baseline.stats()
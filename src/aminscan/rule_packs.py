@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from .config import AminScanConfig, user_cache_dir
+from .secrets_rules import DEFAULT_RULESET, RULES, LazyPattern, RuleSet, SecretRule
+from .streaming import SEVERITY_ORDER
+
+# Bump when the normalized rule format changes, so old artifacts are ignored
+ARTIFACT_FORMAT = 1
+RULES_CACHE_SUBDIR = "rules"
+
+RULE_ID_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+RULE_KEYS = {"id", "title", "severity", "regex", "keywords", "entropy", "paths", "recommendation"}
+DEFAULT_RECOMMENDATION = "If this is a real secret, rotate it and move it to environment variables/secret manager."
+
+
+class RuleError(ValueError):
+    pass
+
+
+def load_ruleset(base: Path, config: AminScanConfig, cache_dir: Path | None = None) -> RuleSet:
+    """
+    Built-in rules plus the `rules:` and `rule_packs:` from the config.
+
+    Validated rules are stored as an artifact keyed by the hash of their sources,
+    so unchanged packs are not re-parsed or re-validated; patterns of user rules
+    are compiled lazily, on the first line that contains one of their keywords.
+    """
+    if not config.rules and not config.rule_packs:
+        return DEFAULT_RULESET
+
+    packs: List[Tuple[str, bytes]] = []
+    for name in config.rule_packs:
+        fp = base / name
+        try:
+            packs.append((name, fp.read_bytes()))
+        except OSError as e:
+            raise RuleError(f"cannot read rule pack {name}: {e.strerror or e}")
+
+    h = hashlib.sha256(f"format={ARTIFACT_FORMAT}\n".encode("ascii"))
+    h.update(json.dumps(config.rules, sort_keys=True, default=str).encode("utf-8"))
+    for name, data in packs:
+        h.update(f"\n{name}\n{len(data)}\n".encode("utf-8"))
+        h.update(data)
+    artifact = (cache_dir or user_cache_dir() / RULES_CACHE_SUBDIR) / f"{h.hexdigest()[:32]}.json"
+
+    specs = _read_artifact(artifact)
+    if specs is None:
+        specs = compile_specs(config.rules, packs)
+        _write_artifact(artifact, specs)
+
+    return RuleSet(list(RULES) + [_to_rule(spec) for spec in specs])
+
+
+def compile_specs(inline: List[Any], packs: List[Tuple[str, bytes]]) -> List[Dict[str, Any]]:
+    """
+    Validates raw rule definitions and returns them in normalized form.
+    Raises RuleError naming the offending rule.
+    """
+    # Only needed when the artifact is stale, so it is not imported for every scan
+    import yaml
+
+    sources: List[Tuple[str, Any]] = [(".aminscan.yml rules", inline)]
+    for name, data in packs:
+        try:
+            raw = yaml.safe_load(data.decode("utf-8")) or []
+        except (UnicodeDecodeError, yaml.YAMLError) as e:
+            raise RuleError(f"{name}: not valid YAML: {e}")
+        sources.append((name, raw.get("rules", []) if isinstance(raw, dict) else raw))
+
+    seen = {r.id for r in RULES}
+    specs: List[Dict[str, Any]] = []
+    for where, rules in sources:
+        if not isinstance(rules, list):
+            raise RuleError(f"{where}: expected a list of rules")
+        for i, raw in enumerate(rules, start=1):
+            spec = _validate(raw, f"{where} #{i}")
+            if spec["id"] in seen:
+                raise RuleError(f"{where} #{i}: duplicate rule id {spec['id']}")
+            seen.add(spec["id"])
+            specs.append(spec)
+    return specs
+
+
+def _validate(raw: Any, where: str) -> Dict[str, Any]:
+    if not isinstance(raw, dict):
+        raise RuleError(f"{where}: a rule must be a mapping")
+    unknown = set(raw) - RULE_KEYS
+    if unknown:
+        raise RuleError(f"{where}: unknown keys {', '.join(sorted(map(str, unknown)))}")
+
+    rule_id = raw.get("id")
+    if not isinstance(rule_id, str) or not RULE_ID_RE.match(rule_id):
+        raise RuleError(f"{where}: 'id' must be a string of letters, digits, '_', '.' or '-'")
+    where = f"{where} ({rule_id})"
+
+    regex = raw.get("regex")
+    if not isinstance(regex, str) or not regex:
+        raise RuleError(f"{where}: 'regex' is required")
+    try:
+        compiled = re.compile(regex)
+    except re.error as e:
+        raise RuleError(f"{where}: invalid regex: {e}")
+    if compiled.match(""):
+        raise RuleError(f"{where}: regex matches the empty string")
+
+    severity = str(raw.get("severity", "high")).lower()
+    if severity not in SEVERITY_ORDER:
+        raise RuleError(f"{where}: 'severity' must be one of {', '.join(SEVERITY_ORDER)}")
+
+    keywords = raw.get("keywords", []) or []
+    if isinstance(keywords, str):
+        keywords = [keywords]
+    if not isinstance(keywords, list) or not all(isinstance(k, str) and k and "\n" not in k and "\r" not in k for k in keywords):
+        raise RuleError(f"{where}: 'keywords' must be non-empty single-line strings")
+
+    entropy = raw.get("entropy")
+    if entropy is not None:
+        if isinstance(entropy, bool) or not isinstance(entropy, (int, float)) or not 0 < entropy <= 8:
+            raise RuleError(f"{where}: 'entropy' must be a number between 0 and 8")
+        entropy = float(entropy)
+
+    paths = raw.get("paths", []) or []
+    if isinstance(paths, str):
+        paths = [paths]
+    if not isinstance(paths, list) or not all(isinstance(p, str) and p for p in paths):
+        raise RuleError(f"{where}: 'paths' must be a list of globs")
+
+    return {
+        "id": rule_id,
+        "title": str(raw.get("title") or rule_id),
+        "severity": severity,
+        "regex": regex,
+        "recommendation": str(raw.get("recommendation") or DEFAULT_RECOMMENDATION),
+        "keywords": keywords,
+        "min_entropy": entropy,
+        "paths": paths,
+    }
+
+
+def _to_rule(spec: Dict[str, Any]) -> SecretRule:
+    return SecretRule(
+        id=spec["id"],
+        title=spec["title"],
+        severity=spec["severity"],
+        pattern=LazyPattern(spec["regex"]),
+        recommendation=spec["recommendation"],
+        keywords=tuple(spec["keywords"]),
+        min_entropy=spec["min_entropy"],
+        paths=tuple(spec["paths"]),
+    )
+
+
+def _read_artifact(fp: Path) -> List[Dict[str, Any]] | None:
+    try:
+        raw = json.loads(fp.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(raw, dict) or raw.get("format") != ARTIFACT_FORMAT or not isinstance(raw.get("rules"), list):
+        return None
+    return raw["rules"]
+
+
+def _write_artifact(fp: Path, specs: List[Dict[str, Any]]) -> None:
+    # Best effort: a read-only home only costs re-validation next time
+    try:
+        fp.parent.mkdir(parents=True, exist_ok=True)
+        tmp = fp.with_name(f"{fp.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"format": ARTIFACT_FORMAT, "rules": specs}), encoding="utf-8")
+        os.replace(tmp, fp)
+    except OSError:
+        pass
@@ -1,7 +1,67 @@
 from __future__ import annotations
 
+import hashlib
 import re
+import time
 from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from .entropy import shannon_entropy
+from .file_utils import IgnoreMatcher, LineIndex
+
+
+# Characters searched on each side of a keyword on lines over the length limit;
+# longer than any realistic token. Windows are searched in place, and a match
+# that runs into a window's end is redone against the rest of the line, so
+# window edges never count as word boundaries.
+LONG_LINE_CONTEXT = 1024
+
+
+class LazyPattern:
+    """
+    Stand-in for a compiled re.Pattern that compiles on first use.
+
+    User-defined rules use it, so a rule whose keywords never occur in the
+    scanned files is never compiled. Pickles as its source (for worker processes).
+    """
+
+    __slots__ = ("pattern", "flags", "_compiled")
+
+    def __init__(self, pattern: str, flags: int = 0):
+        self.pattern = pattern
+        self.flags = flags
+        self._compiled: re.Pattern | None = None
+
+    @property
+    def compiled(self) -> re.Pattern:
+        if self._compiled is None:
+            self._compiled = re.compile(self.pattern, self.flags)
+        return self._compiled
+
+    def search(self, string: str, *args: Any) -> re.Match | None:
+        return self.compiled.search(string, *args)
+
+    def finditer(self, string: str, *args: Any) -> Iterator[re.Match]:
+        return self.compiled.finditer(string, *args)
+
+    def match(self, string: str, *args: Any) -> re.Match | None:
+        return self.compiled.match(string, *args)
+
+    def __getstate__(self) -> Tuple[str, int]:
+        return self.pattern, self.flags
+
+    def __setstate__(self, state: Tuple[str, int]) -> None:
+        self.pattern, self.flags = state
+        self._compiled = None
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, LazyPattern) and (self.pattern, self.flags) == (other.pattern, other.flags)
+
+    def __hash__(self) -> int:
+        return hash((self.pattern, self.flags))
+
+    def __repr__(self) -> str:
+        return f"LazyPattern({self.pattern!r})"
 
 
 @dataclass(frozen=True)
@@ -9,8 +69,15 @@ class SecretRule:
     id: str
     title: str
     severity: str
-    pattern: re.Pattern
+    pattern: re.Pattern | LazyPattern
     recommendation: str
+    # Literal strings, at least one of which appears in every match of `pattern`.
+    # Rules without keywords are run against every line.
+    keywords: Tuple[str, ...] = ()
+    # Matches whose Shannon entropy is below this are not reported
+    min_entropy: float | None = None
+    # Globs (ignore-pattern syntax) for paths relative to the scan root; empty means every file
+    paths: Tuple[str, ...] = ()
 
 
 RULES: list[SecretRule] = [
@@ -20,6 +87,7 @@ RULES: list[SecretRule] = [
         severity="high",
         pattern=re.compile(r"\bAKIA[0-9A-Z]{16}\b"),
         recommendation="Rotate/revoke the key and remove it from git history (use git filter-repo).",
+        keywords=("AKIA",),
     ),
     SecretRule(
         id="SEC-GITHUB-TOKEN",
@@ -27,6 +95,7 @@ RULES: list[SecretRule] = [
         severity="high",
         pattern=re.compile(r"\bgh[pousr]_[A-Za-z0-9_]{20,}\b"),
         recommendation="Revoke the token in GitHub settings and rotate credentials.",
+        keywords=("ghp_", "gho_", "ghu_", "ghs_", "ghr_"),
     ),
     SecretRule(
         id="SEC-GOOGLE-API-KEY",
@@ -34,6 +103,7 @@ RULES: list[SecretRule] = [
         severity="high",
         pattern=re.compile(r"\bAIza[0-9A-Za-z\-_]{35}\b"),
         recommendation="Restrict and rotate the key in your cloud console; remove it from git history.",
+        keywords=("AIza",),
     ),
     SecretRule(
         id="SEC-SLACK-TOKEN",
@@ -41,6 +111,7 @@ RULES: list[SecretRule] = [
         severity="high",
         pattern=re.compile(r"\bxox[baprs]-[0-9A-Za-z-]{10,}\b"),
         recommendation="Revoke the token in Slack, rotate secrets, and purge from git history.",
+        keywords=("xox",),
     ),
     SecretRule(
         id="SEC-JWT",
@@ -48,6 +119,7 @@ RULES: list[SecretRule] = [
         severity="medium",
         pattern=re.compile(r"\beyJ[a-zA-Z0-9_-]{10,}\.[a-zA-Z0-9_-]{10,}\.[a-zA-Z0-9_-]{10,}\b"),
         recommendation="Treat as sensitive: invalidate sessions/rotate signing keys if exposed.",
+        keywords=("eyJ",),
     ),
     SecretRule(
         id="SEC-PRIVATE-KEY",
@@ -55,5 +127,212 @@ RULES: list[SecretRule] = [
         severity="critical",
         pattern=re.compile(r"-----BEGIN (?:RSA |EC |OPENSSH |)?PRIVATE KEY-----"),
         recommendation="Remove the key immediately, rotate affected credentials, and purge from git history.",
+        keywords=("-----BEGIN",),
     ),
 ]
+
+
+class RuleSet:
+    """
+    Compiled view of a list of rules.
+
+    One combined keyword regex is run over the whole buffer; a rule's own pattern
+    is only searched on lines that contain one of its keywords. Results match
+    searching every rule on every line.
+    """
+
+    def __init__(self, rules: Iterable[SecretRule]):
+        self.rules: List[SecretRule] = list(rules)
+        self.keyword_rules = [(rank, r) for rank, r in enumerate(self.rules) if r.keywords]
+        self.has_unanchored = len(self.keyword_rules) != len(self.rules)
+        self._path_matchers = {rank: IgnoreMatcher(r.paths) for rank, r in enumerate(self.rules) if r.paths}
+        self.path_restricted = bool(self._path_matchers)
+        self._subsets: Dict[Tuple[int, ...], RuleSet] = {}
+
+        keywords = sorted({k for r in self.rules for k in r.keywords}, key=len, reverse=True)
+        for k in keywords:
+            if not k or "\n" in k or "\r" in k:
+                raise ValueError(f"Invalid rule keyword: {k!r}")
+        self.prefilter = re.compile("|".join(re.escape(k) for k in keywords)) if keywords else None
+
+        h = hashlib.sha256()
+        for r in self.rules:
+            h.update(repr((
+                r.id, r.title, r.severity, r.pattern.pattern, r.pattern.flags, r.recommendation,
+                r.keywords, r.min_entropy, r.paths,
+            )).encode("utf-8"))
+        self.version = h.hexdigest()[:16]
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Workers rebuild matchers and subsets from the rules
+        return {"rules": self.rules}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(state["rules"])  # type: ignore[misc]
+
+    def for_path(self, rel_posix: str) -> "RuleSet":
+        """
+        The rules whose path globs allow `rel_posix` (relative to the scan root).
+        Returns self when no rule is path-restricted.
+        """
+        if not self.path_restricted:
+            return self
+        key = tuple(
+            rank for rank in range(len(self.rules))
+            if rank not in self._path_matchers or self._path_matchers[rank].match_file(rel_posix)
+        )
+        if len(key) == len(self.rules):
+            return self
+        subset = self._subsets.get(key)
+        if subset is None:
+            subset = self._subsets[key] = RuleSet(self.rules[rank] for rank in key)
+        return subset
+
+    def match_line(
+        self,
+        line: str,
+        timings: Dict[str, List[float]] | None = None,
+    ) -> Iterator[Tuple[int, SecretRule, str]]:
+        """
+        Yields (rank, rule, evidence) for the first match of each rule on a single line.
+        """
+        for rank, rule, m in self._line_matches(line, timings):
+            yield rank, rule, m.group(0)
+
+    def _line_matches(
+        self,
+        line: str,
+        timings: Dict[str, List[float]] | None = None,
+    ) -> Iterator[Tuple[int, SecretRule, re.Match]]:
+        for rank, rule in enumerate(self.rules):
+            if rule.keywords and not any(k in line for k in rule.keywords):
+                continue
+            m = _search(rule, line, timings)
+            if m:
+                yield rank, rule, m
+
+    def scan(
+        self,
+        text: str,
+        index: LineIndex | None = None,
+        timings: Dict[str, List[float]] | None = None,
+        max_line_length: int = 0,
+    ) -> Iterator[Tuple[int, int, SecretRule, str, int]]:
+        """
+        Yields (line_no, rank, rule, evidence, start) for every rule hit in `text`,
+        ordered by line then rank; `start` is the match's offset in `text`.
+
+        If `timings` is given, each rule's pattern search time and hit count are
+        added to timings[rule.id] as [seconds, hits]. Lines longer than
+        `max_line_length` (if set) are searched only in a window around each
+        keyword occurrence; hits on such lines are ordered by position, not rank.
+        """
+        index = index or LineIndex(text)
+        if self.has_unanchored:
+            # Some rule has no anchor, so every line has to be visited anyway
+            for line_no, line in enumerate(text.splitlines(), start=1):
+                for rank, rule, rm in self._line_matches(line, timings):
+                    yield line_no, rank, rule, rm.group(0), index.line_bounds(line_no)[0] + rm.start()
+            return
+
+        if self.prefilter is None:
+            return
+
+        pos = 0
+        while True:
+            m = self.prefilter.search(text, pos)
+            if not m:
+                return
+            line_no = index.line_of(m.start())
+            start, end = index.line_bounds(line_no)
+            if max_line_length and end - start > max_line_length:
+                yield from self._scan_long_line(text, line_no, start, end, m, timings)
+                pos = end
+                continue
+            line = text[start:end]
+            for rank, rule in self.keyword_rules:
+                if not any(k in line for k in rule.keywords):
+                    continue
+                rm = _search(rule, line, timings)
+                if rm:
+                    yield line_no, rank, rule, rm.group(0), start + rm.start()
+            # The rest of this line has been handled
+            pos = max(end, m.end())
+
+    def _scan_long_line(
+        self,
+        text: str,
+        line_no: int,
+        start: int,
+        end: int,
+        first: re.Match,
+        timings: Dict[str, List[float]] | None,
+    ) -> Iterator[Tuple[int, int, SecretRule, str, int]]:
+        # Only the first match of each rule counts, as for ordinary lines
+        assert self.prefilter is not None
+        reported: set[int] = set()
+        m: re.Match | None = first
+        while m is not None and len(reported) < len(self.keyword_rules):
+            lo = max(start, m.start() - LONG_LINE_CONTEXT)
+            hi = min(end, m.end() + LONG_LINE_CONTEXT)
+            window = text[lo:hi]
+            for rank, rule in self.keyword_rules:
+                if rank in reported or not any(k in window for k in rule.keywords):
+                    continue
+                rm = _search(rule, text, timings, (lo, hi, end))
+                if rm:
+                    reported.add(rank)
+                    yield line_no, rank, rule, rm.group(0), rm.start()
+            m = self.prefilter.search(text, m.end(), end)
+
+
+def _search(
+    rule: SecretRule,
+    line: str,
+    timings: Dict[str, List[float]] | None,
+    window: Tuple[int, int, int] | None = None,
+) -> re.Match | None:
+    if timings is None:
+        return _first_match(rule, line, window)
+    t0 = time.perf_counter()
+    m = _first_match(rule, line, window)
+    entry = timings.setdefault(rule.id, [0.0, 0])
+    entry[0] += time.perf_counter() - t0
+    if m:
+        entry[1] += 1
+    return m
+
+
+def _first_match(rule: SecretRule, line: str, window: Tuple[int, int, int] | None = None) -> re.Match | None:
+    # `window` is (start, end, line end): only `line`[start:end] is searched
+    if window is None:
+        if rule.min_entropy is None:
+            return rule.pattern.search(line)
+        matches = rule.pattern.finditer(line)
+    else:
+        matches = _window_matches(rule, line, *window)
+    for m in matches:
+        if rule.min_entropy is None or shannon_entropy(m.group(0)) >= rule.min_entropy:
+            return m
+    return None
+
+
+def _window_matches(rule: SecretRule, text: str, lo: int, hi: int, line_end: int) -> Iterator[re.Match]:
+    # Searching from `lo` in place keeps the text before it visible to \b and lookbehinds;
+    # `hi` would act as the end of the string, so matches reaching it are redone up to `line_end`
+    pos = lo
+    while pos < hi:
+        m = rule.pattern.search(text, pos, hi)
+        if m is None:
+            return
+        if m.end() == hi and hi < line_end:
+            start = m.start()
+            m = rule.pattern.match(text, start, line_end)
+            if m is None:
+                pos = start + 1
+                continue
+        yield m
+        pos = max(m.end(), m.start() + 1)
+
+
+DEFAULT_RULESET = RuleSet(RULES)
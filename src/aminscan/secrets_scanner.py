@@ -1,83 +1,746 @@
 from __future__ import annotations
 
+import hashlib
+import os
+import time
+from dataclasses import dataclass
+from itertools import repeat
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Tuple
 
-from .entropy import TOKEN_RE, looks_like_high_entropy_token
-from .file_utils import iter_text_files, load_ignore_patterns
-from .secrets_rules import RULES
+from .archives import MEMBER_SEP, ArchiveLimits, ArchiveReader
+from .budget import SNIFF_BYTES, Deadline, ScanBudget
+from .cache import ScanCache
+from .classify import SNIFF_BLOCK, FileClassifier, FileTypes, looks_binary
+from .entropy import DEFAULT_SAFE_TOKENS, MIN_TOKEN_LENGTH, TOKEN_RE, SafeTokens, high_entropy_flags
+from .file_utils import (
+    LARGE_FILE_BYTES,
+    LineIndex,
+    TextChunk,
+    archive_kind,
+    file_digest,
+    iter_text_chunks,
+    iter_text_files,
+    load_ignore_patterns,
+)
+from .findings import Finding, rule_index
+from .secrets_rules import DEFAULT_RULESET, RuleSet, SecretRule
+from .sharding import Shard, select_shard
+from .stats import FileStats, ScanStats, timed
 
-def scan_secrets(base: Path, use_entropy: bool = True, extra_ignores: List[str] | None = None) -> List[Dict[str, Any]]:
-    findings: List[Dict[str, Any]] = []
+# Below this many files the process pool costs more than it saves
+PARALLEL_MIN_FILES = 64
+# Upper bound on paths handed to a worker at once
+MAX_BATCH_SIZE = 256
+# Entropy candidates scored between checks of a file's time budget
+ENTROPY_BATCH = 4096
+
+
+def scan_secrets(
+    base: Path,
+    use_entropy: bool = True,
+    extra_ignores: List[str] | None = None,
+    jobs: int | None = None,
+    cache: ScanCache | None = None,
+    meta: Dict[str, Any] | None = None,
+    stats: ScanStats | None = None,
+    ruleset: RuleSet | None = None,
+    budget: ScanBudget | None = None,
+    shard: Shard | None = None,
+    archives: ArchiveLimits | None = None,
+    types: FileTypes | None = None,
+    safe_tokens: SafeTokens | None = None,
+) -> List[Finding]:
+    """
+    Scans `base` for secrets; see iter_secrets for the streaming variant.
+    """
+    return list(iter_secrets(
+        base, use_entropy, extra_ignores, jobs=jobs, cache=cache, meta=meta, stats=stats, ruleset=ruleset,
+        budget=budget, shard=shard, archives=archives, types=types, safe_tokens=safe_tokens,
+    ))
+
+
+def iter_secrets(
+    base: Path,
+    use_entropy: bool = True,
+    extra_ignores: List[str] | None = None,
+    jobs: int | None = None,
+    cache: ScanCache | None = None,
+    meta: Dict[str, Any] | None = None,
+    stats: ScanStats | None = None,
+    ruleset: RuleSet | None = None,
+    budget: ScanBudget | None = None,
+    shard: Shard | None = None,
+    archives: ArchiveLimits | None = None,
+    types: FileTypes | None = None,
+    safe_tokens: SafeTokens | None = None,
+) -> Iterator[Finding]:
+    """
+    Yields deduplicated findings as each file finishes, in walk order.
+
+    With a `cache`, unchanged files reuse their stored findings and the cache is
+    saved once the scan completes. Run details (cache hits/misses) are added to
+    `meta` if given, also on completion. With `stats`, walk/read/match/entropy/dedupe
+    timings are recorded for every file actually scanned. `ruleset` defaults to the
+    built-in rules; rule path globs are matched against paths relative to `base`.
+    With a `budget`, files it skips or cuts short are listed in meta["budget"].
+    With a `shard`, only that slice of the walked files is scanned (see sharding.py).
+    With `archives`, text members of zip/tar archives are scanned too and reported
+    as "<archive>!/<member>". Files are picked by name and, when that does not
+    decide, by their first block (see classify.py); `types` adds or removes types.
+    Binary files skipped are counted in meta["binary"]. Entropy candidates of a
+    `safe_tokens` class (default: all classes) are not scored; meta["safe_tokens"]
+    counts them per class for the files scanned (not those served from the cache).
+    """
     extra_ignores = extra_ignores or []
-    ignore = load_ignore_patterns(base, extra_ignores)
-    files = list(iter_text_files(base, ignore))
+    with timed(stats, "walk"):
+        ignore = load_ignore_patterns(base, extra_ignores)
+        classifier = FileClassifier(types, archives=archives is not None, known=cache.types if cache is not None else None)
+        files = list(iter_text_files(base, ignore, accept=classifier.accept))
+        if cache is not None:
+            cache.types = classifier.verdicts
+        if shard is not None:
+            files, shard_bytes = select_shard(files, base, shard)
+            if meta is not None:
+                meta["shard"] = {
+                    "index": shard.index,
+                    "count": shard.count,
+                    "files": len(files),
+                    "bytes": shard_bytes,
+                    "rules": (ruleset or DEFAULT_RULESET).version,
+                }
+    profile = stats is not None
+    safe_tokens = safe_tokens or DEFAULT_SAFE_TOKENS
+    tally = ScanTally(base, classifier, budget, use_entropy, safe_tokens, stats)
+
+    def unique(findings: List[Finding]) -> List[Finding]:
+        with timed(stats, "dedupe"):
+            return dedupe_findings(findings)
 
+    def account(result: FileScan) -> None:
+        tally.add(result)
+
+    def report() -> None:
+        if meta is not None:
+            tally.report(meta)
+
+    # The dedupe key includes the file, so deduplicating each file's batch
+    # is the same as deduplicating the whole run, with no state kept across files.
+    if cache is None:
+        tasks = [(fp, None) for fp in files]
+        for result in _scan_files(tasks, use_entropy, jobs, profile=profile, ruleset=ruleset, base=base, budget=budget, archives=archives,
+            safe_tokens=safe_tokens,
+        ):
+            account(result)
+            yield from unique(result.findings or [])
+        report()
+        return
+
+    # Resolve what we can from file metadata alone; only the rest is read
+    plan: List[Tuple[Path, str, List[Dict[str, Any]] | None]] = []
+    tasks: List[Tuple[Path, str | None]] = []
     for fp in files:
+        rel = fp.relative_to(base).as_posix()
         try:
-            text = fp.read_text(encoding="utf-8", errors="ignore")
-        except Exception:
+            st = fp.stat()
+        except OSError:
+            continue
+        hit = cache.lookup(rel, st.st_size, st.st_mtime_ns)
+        plan.append((fp, rel, hit))
+        if hit is None:
+            tasks.append((fp, cache.digest(rel)))
+
+    scanned = _scan_files(
+        tasks, use_entropy, jobs, hashing=True, profile=profile, ruleset=ruleset, base=base, budget=budget, archives=archives,
+        safe_tokens=safe_tokens,
+    )
+    for fp, rel, hit in plan:
+        if hit is not None:
+            yield from unique(_relocate(hit, fp, rel))
             continue
+        result = next(scanned)
+        account(result)
+        if result.findings is None:
+            yield from unique(_relocate(cache.revalidate(rel, result.size, result.mtime_ns), fp, rel))
+            continue
+        # Results cut short by time are not cached, so the file is scanned again next time
+        if result.digest is not None and result.truncated != "time":
+            cache.store(rel, result.size, result.mtime_ns, result.digest, result.findings)
+        yield from unique(result.findings)
+
+    cache.save()
+    report()
+    if meta is not None:
+        meta["cache"] = cache.stats()
+
+
+@dataclass
+class FileScan:
+    path: Path
+    # None when the content hash matched the digest the task was given
+    findings: List[Finding] | None
+    size: int = 0
+    mtime_ns: int = 0
+    digest: str | None = None
+    stats: FileStats | None = None
+    # Why the budget skipped the file or cut its scan short, if it did
+    skipped: str | None = None
+    truncated: str | None = None
+    # Entropy candidates skipped per safe token class
+    safe_tokens: Dict[str, int] | None = None
+
+
+class ScanTally:
+    """
+    Totals over the FileScan results of one scan root, for its report meta:
+    binary files, files the budget skipped or cut short, and safe tokens per class.
+    """
+
+    def __init__(
+        self,
+        base: Path,
+        classifier: FileClassifier,
+        budget: ScanBudget | None,
+        use_entropy: bool,
+        safe_tokens: SafeTokens,
+        stats: ScanStats | None = None,
+    ):
+        self.base = base
+        self.budget = budget
+        self.use_entropy = use_entropy
+        self.stats = stats
+        self.skipped: List[Dict[str, str]] = []
+        self.truncated: List[Dict[str, str]] = []
+        # Binaries rejected by name or sniffing during the walk, plus those caught on read
+        self.binary = {"files": classifier.binary_files, "bytes": classifier.binary_bytes, "sniffed": classifier.sniffed}
+        self.safe_tokens = dict.fromkeys(safe_tokens.classes, 0)
+
+    def add(self, result: FileScan) -> None:
+        if self.stats is not None and result.stats is not None:
+            self.stats.add_file(result.stats)
+        if result.skipped == "binary":
+            self.binary["files"] += 1
+            self.binary["bytes"] += result.size
+        elif result.skipped:
+            self.skipped.append({"file": _rel_path(result.path, self.base), "reason": result.skipped})
+        if result.truncated:
+            self.truncated.append({"file": _rel_path(result.path, self.base), "reason": result.truncated})
+        for kind, n in (result.safe_tokens or {}).items():
+            self.safe_tokens[kind] += n
+
+    def report(self, meta: Dict[str, Any]) -> None:
+        meta["binary"] = self.binary
+        if self.use_entropy:
+            meta["safe_tokens"] = self.safe_tokens
+        if self.budget is not None:
+            meta["budget"] = {
+                "skipped_files": len(self.skipped),
+                "truncated_files": len(self.truncated),
+                "skipped": self.skipped,
+                "truncated": self.truncated,
+            }
+
+
+def scan_paths(
+    paths: List[Path],
+    use_entropy: bool = True,
+    jobs: int | None = None,
+    ruleset: RuleSet | None = None,
+    base: Path | None = None,
+    budget: ScanBudget | None = None,
+    archives: ArchiveLimits | None = None,
+    safe_tokens: SafeTokens | None = None,
+) -> Iterator[FileScan]:
+    """
+    Scans the given files (a process pool is used when worthwhile) and yields a FileScan per path, in order.
+    """
+    tasks = [(fp, None) for fp in paths]
+    return _scan_files(tasks, use_entropy, jobs, ruleset=ruleset, base=base, budget=budget, archives=archives, safe_tokens=safe_tokens)
+
+
+def scan_file(
+    fp: Path,
+    use_entropy: bool = True,
+    ruleset: RuleSet | None = None,
+    base: Path | None = None,
+    budget: ScanBudget | None = None,
+    archives: ArchiveLimits | None = None,
+    safe_tokens: SafeTokens | None = None,
+) -> List[Finding]:
+    """
+    Scans a single file and returns its findings (not deduplicated).
+    """
+    return _scan_task(fp, use_entropy, ruleset=ruleset, base=base, budget=budget, archives=archives, safe_tokens=safe_tokens).findings or []
+
+
+def scan_text(
+    fp: Path,
+    text: str,
+    use_entropy: bool = True,
+    ruleset: RuleSet | None = None,
+    line_offset: int = 0,
+    file_checks: bool = True,
+    stats: FileStats | None = None,
+    max_line_length: int = 0,
+    deadline: Deadline | None = None,
+    safe_tokens: SafeTokens | None = None,
+    safe_counts: Dict[str, int] | None = None,
+    span: Tuple[int, int] | None = None,
+) -> List[Finding]:
+    """
+    Scans an already decoded buffer belonging to `fp`.
+
+    Findings are ordered by line, then by rule order, with entropy hits last,
+    which is the order a line-by-line scan produces. `line_offset` shifts line
+    numbers when `text` is a later chunk of the file; `file_checks` controls
+    whole-file checks such as the .env warning. Timings are added to `stats` if given.
+    Lines over `max_line_length` are matched in windows (see RuleSet.scan); once
+    `deadline` expires, the findings so far are returned. Entropy candidates of a
+    `safe_tokens` class are dropped unscored and counted in `safe_counts`.
+    If `span` is given, only hits starting in text[span[0]:span[1]] are kept;
+    the rest of `text` is context shared with the neighbouring chunks.
+    """
+    ruleset = ruleset or DEFAULT_RULESET
+    lo, hi = span or (0, len(text))
+    findings: List[Finding] = []
+
+    # .env presence warning
+    if file_checks and fp.name == ".env":
+        findings.append(dotenv_finding(str(fp)))
+
+    index = LineIndex(text)
+    hits: List[Tuple[int, int, Finding]] = []
+    # A long line can carry thousands of hits; hash it once, not per hit
+    digests: Dict[int, str] = {}
+
+    def digest(local: int) -> str:
+        if local not in digests:
+            digests[local] = line_hash(_line_text(text, index, local))
+        return digests[local]
+
+    t0 = time.perf_counter() if stats is not None else 0.0
+
+    # 1) High-confidence regex rules
+    timings = stats.rules if stats is not None else None
+    for line_no, rank, rule, evidence, start in ruleset.scan(text, index, timings, max_line_length):
+        if not lo <= start < hi:
+            continue
+        lh = digest(line_no)
+        line_no += line_offset
+        hits.append((line_no, rank, rule_finding(rule, str(fp), line_no, evidence, digest=lh)))
+        if deadline is not None and deadline.check():
+            break
+
+    if stats is not None:
+        t1 = time.perf_counter()
+        stats.rule_match += t1 - t0
+        stats.lines += text.count("\n")
+        n_rule_hits = len(hits)
+
+    # 2) Medium-confidence entropy rule (optional)
+    # TOKEN_RE cannot match line breaks, so searching the whole buffer finds the same tokens.
+    if use_entropy and not (deadline is not None and deadline.check()):
+        entropy_rank = len(ruleset.rules)
+        candidates = [m for m in TOKEN_RE.finditer(text) if len(m.group(0)) >= MIN_TOKEN_LENGTH and lo <= m.start() < hi]
+        candidates = (safe_tokens or DEFAULT_SAFE_TOKENS).filter(candidates, text, safe_counts)
+        # Without a deadline this is a single batch
+        step = ENTROPY_BATCH if deadline is not None else max(1, len(candidates))
+        for i in range(0, len(candidates), step):
+            batch = candidates[i:i + step]
+            for m, flagged in zip(batch, high_entropy_flags([m.group(0) for m in batch])):
+                if flagged:
+                    local = index.line_of(m.start())
+                    line_no = local + line_offset
+                    hits.append((line_no, entropy_rank, entropy_finding(str(fp), line_no, m.group(0), digest=digest(local))))
+            if deadline is not None and deadline.check():
+                break
+        if stats is not None:
+            seconds = time.perf_counter() - t1
+            stats.entropy += seconds
+            stats.add_rule("SEC-ENTROPY-TOKEN", seconds, len(hits) - n_rule_hits)
+
+    hits.sort(key=lambda h: (h[0], h[1]))
+    findings.extend(h[2] for h in hits)
+    return findings
+
+
+def _line_text(text: str, index: LineIndex, line_no: int) -> str:
+    start, end = index.line_bounds(line_no)
+    return text[start:end]
+
+
+def scan_lines(
+    file: str,
+    lines: Iterable[Tuple[int, str]],
+    use_entropy: bool = True,
+    ruleset: RuleSet | None = None,
+    safe_tokens: SafeTokens | None = None,
+) -> List[Finding]:
+    """
+    Scans individual (line_no, line) pairs, e.g. the added lines of a diff.
+    """
+    ruleset = ruleset or DEFAULT_RULESET
+    safe_tokens = safe_tokens or DEFAULT_SAFE_TOKENS
+    findings: List[Finding] = []
+    for line_no, line in lines:
+        for _, rule, evidence in ruleset.match_line(line):
+            findings.append(rule_finding(rule, file, line_no, evidence, line))
+        if use_entropy:
+            tokens = [m.group(0) for m in safe_tokens.filter(list(TOKEN_RE.finditer(line)), line)]
+            for tok, flagged in zip(tokens, high_entropy_flags(tokens)):
+                if flagged:
+                    findings.append(entropy_finding(file, line_no, tok, line))
+    return findings
+
+
+ENTROPY_RULE = rule_index(
+    "SEC-ENTROPY-TOKEN",
+    "Possible high-entropy secret/token (heuristic)",
+    "medium",
+    "medium",
+    "If this is a real secret, rotate it and move it to environment variables/secret manager.",
+)
+DOTENV_RULE = rule_index(
+    "SEC-DOTENV",
+    ".env file detected (may contain secrets)",
+    "medium",
+    "high",
+    "Remove .env from repo and add it to .gitignore. Rotate any exposed values.",
+)
+
 
-        # .env presence warning
-        if fp.name == ".env":
-            findings.append({
-                "rule_id": "SEC-DOTENV",
-                "title": ".env file detected (may contain secrets)",
-                "severity": "medium",
-                "confidence": "high",
-                "file": str(fp),
-                "line": 1,
-                "evidence_masked": ".env",
-                "recommendation": "Remove .env from repo and add it to .gitignore. Rotate any exposed values.",
-            })
-
-        for line_no, line in enumerate(text.splitlines(), start=1):
-            # 1) High-confidence regex rules
-            for rule in RULES:
-                m = rule.pattern.search(line)
-                if not m:
-                    continue
-                evidence = m.group(0)
-                findings.append({
-                    "rule_id": rule.id,
-                    "title": rule.title,
-                    "severity": rule.severity,
-                    "confidence": "high",
-                    "file": str(fp),
-                    "line": line_no,
-                    "evidence_masked": mask_evidence(evidence),
-                    "recommendation": rule.recommendation,
-                })
-
-            # 2) Medium-confidence entropy rule (optional)
-            if use_entropy:
-                for tok in TOKEN_RE.findall(line):
-                    if looks_like_high_entropy_token(tok):
-                        findings.append({
-                            "rule_id": "SEC-ENTROPY-TOKEN",
-                            "title": "Possible high-entropy secret/token (heuristic)",
-                            "severity": "medium",
-                            "confidence": "medium",
-                            "file": str(fp),
-                            "line": line_no,
-                            "evidence_masked": mask_evidence(tok),
-                            "recommendation": "If this is a real secret, rotate it and move it to environment variables/secret manager.",
-                        })
-
-    # Deduplicate findings (avoid repeated entries)
+def dotenv_finding(file: str) -> Finding:
+    return Finding(DOTENV_RULE, file, 1, ".env", line_hash(""))
+
+
+def line_hash(line: str) -> str:
+    """
+    Short hash of a source line with whitespace normalized; identifies a finding's
+    line independently of its line number (see baseline.py).
+    """
+    return hashlib.sha256(" ".join(line.split()).encode("utf-8")).hexdigest()[:16]
+
+
+def rule_finding(rule: SecretRule, file: str, line_no: int, evidence: str, line: str = "", digest: str | None = None) -> Finding:
+    # `digest` is line_hash(line), when the caller already has it
+    index = rule_index(rule.id, rule.title, rule.severity, "high", rule.recommendation)
+    return Finding(index, file, line_no, mask_evidence(evidence), digest or line_hash(line))
+
+
+def entropy_finding(file: str, line_no: int, tok: str, line: str = "", digest: str | None = None) -> Finding:
+    return Finding(ENTROPY_RULE, file, line_no, mask_evidence(tok), digest or line_hash(line))
+
+
+def dedupe_findings(findings: List[Mapping]) -> List[Mapping]:
+    # Deduplicate findings (avoid repeated entries), keeping first occurrence order
     seen = set()
-    unique: List[Dict[str, Any]] = []
+    unique: List[Mapping] = []
     for f in findings:
         key = (f.get("rule_id"), f.get("file"), f.get("line"), f.get("evidence_masked"))
         if key in seen:
             continue
         seen.add(key)
         unique.append(f)
-
     return unique
 
 
+def resolve_jobs(jobs: int | None) -> int:
+    if jobs is None or jobs <= 0:
+        return os.cpu_count() or 1
+    return jobs
+
+
+def _scan_files(
+    tasks: List[Tuple[Path, str | None]],
+    use_entropy: bool,
+    jobs: int | None,
+    hashing: bool = False,
+    profile: bool = False,
+    ruleset: RuleSet | None = None,
+    base: Path | None = None,
+    budget: ScanBudget | None = None,
+    archives: ArchiveLimits | None = None,
+    safe_tokens: SafeTokens | None = None,
+) -> Iterator[FileScan]:
+    """
+    Yields a FileScan per (path, known digest) task, in task order, using a process pool when worthwhile.
+    """
+    jobs = resolve_jobs(jobs)
+    if jobs <= 1 or len(tasks) < PARALLEL_MIN_FILES:
+        for fp, known in tasks:
+            yield _scan_task(fp, use_entropy, known, hashing, profile, ruleset, base, budget, archives, safe_tokens)
+        return
+
+    # Imported here: multiprocessing is a noticeable share of startup for small (pre-commit) scans
+    from concurrent.futures import ProcessPoolExecutor
+
+    # A few batches per worker keeps the pool busy when file sizes are uneven
+    batch_size = max(1, min(MAX_BATCH_SIZE, len(tasks) // (jobs * 4)))
+    batches = [tasks[i:i + batch_size] for i in range(0, len(tasks), batch_size)]
+
+    # The rule set and limits are sent once per worker (not per batch) and its patterns are
+    # compiled once per process. Executor.map returns batches in submission order.
+    with ProcessPoolExecutor(
+        max_workers=min(jobs, len(batches)),
+        initializer=_init_worker,
+        initargs=(ruleset, base, budget, archives, safe_tokens),
+    ) as ex:
+        for batch_results in ex.map(_scan_batch, batches, repeat(use_entropy), repeat(hashing), repeat(profile)):
+            yield from batch_results
+
+
+_worker_rules: Tuple[RuleSet | None, Path | None, ScanBudget | None, ArchiveLimits | None, SafeTokens | None] = (
+    None, None, None, None, None,
+)
+
+
+def _init_worker(
+    ruleset: RuleSet | None,
+    base: Path | None,
+    budget: ScanBudget | None = None,
+    archives: ArchiveLimits | None = None,
+    safe_tokens: SafeTokens | None = None,
+) -> None:
+    global _worker_rules
+    _worker_rules = (ruleset, base, budget, archives, safe_tokens)
+
+
+def _scan_batch(
+    tasks: List[Tuple[Path, str | None]],
+    use_entropy: bool,
+    hashing: bool,
+    profile: bool = False,
+) -> List[FileScan]:
+    ruleset, base, budget, archives, safe_tokens = _worker_rules
+    return [
+        _scan_task(fp, use_entropy, known, hashing, profile, ruleset, base, budget, archives, safe_tokens)
+        for fp, known in tasks
+    ]
+
+
+def _scan_task(
+    fp: Path,
+    use_entropy: bool,
+    known_digest: str | None = None,
+    hashing: bool = False,
+    profile: bool = False,
+    ruleset: RuleSet | None = None,
+    base: Path | None = None,
+    budget: ScanBudget | None = None,
+    archives: ArchiveLimits | None = None,
+    safe_tokens: SafeTokens | None = None,
+) -> FileScan:
+    ruleset = ruleset or DEFAULT_RULESET
+    rel = _rel_path(fp, base) if ruleset.path_restricted or budget is not None else ""
+    if ruleset.path_restricted:
+        ruleset = ruleset.for_path(rel)
+        # Nothing can match here, so the file is never opened
+        if not ruleset.rules and not use_entropy and fp.name != ".env":
+            return FileScan(fp, [])
+    if budget is not None and (not budget.active or budget.exempt(rel)):
+        budget = None
+
+    t0 = time.perf_counter() if profile else 0.0
+    try:
+        st = fp.stat()
+        # Archives are bounded by their own member limits, not by the text file guards
+        if archives is not None and archive_kind(fp.name):
+            return _scan_archive(fp, st, use_entropy, known_digest, hashing, profile, ruleset, budget, archives, safe_tokens)
+        if budget is not None and budget.max_file_bytes and st.st_size > budget.max_file_bytes:
+            return FileScan(fp, [], st.st_size, st.st_mtime_ns, skipped="size")
+        if st.st_size >= LARGE_FILE_BYTES:
+            return _scan_large_file(fp, st, use_entropy, known_digest, hashing, profile, ruleset, budget, rel, safe_tokens)
+        data = fp.read_bytes()
+    except OSError:
+        return FileScan(fp, [])
+
+    # Named like text, but is not (or not in an encoding worth decoding)
+    if looks_binary(data[:SNIFF_BLOCK]):
+        return FileScan(fp, [], st.st_size, st.st_mtime_ns, skipped="binary")
+    if budget is not None:
+        reason = budget.skip_reason(rel, st.st_size, data[:SNIFF_BYTES])
+        if reason:
+            return FileScan(fp, [], st.st_size, st.st_mtime_ns, skipped=reason)
+
+    digest = hashlib.sha256(data).hexdigest() if hashing else None
+    if known_digest is not None and digest == known_digest:
+        return FileScan(fp, None, st.st_size, st.st_mtime_ns, digest)
+
+    text = data.decode("utf-8", errors="ignore")
+    fs = None
+    if profile:
+        fs = FileStats(str(fp), bytes=len(data), lines=1 if data and not data.endswith(b"\n") else 0)
+        fs.read = time.perf_counter() - t0
+    deadline = budget.deadline() if budget is not None else None
+    safe_counts: Dict[str, int] = {}
+    findings = scan_text(
+        fp, text, use_entropy, ruleset, stats=fs,
+        max_line_length=budget.max_line_length if budget is not None else 0,
+        deadline=deadline,
+        safe_tokens=safe_tokens,
+        safe_counts=safe_counts,
+    )
+    return FileScan(
+        fp, findings, st.st_size, st.st_mtime_ns, digest, fs,
+        truncated="time" if deadline is not None and deadline.expired else None,
+        safe_tokens=safe_counts,
+    )
+
+
+def _rel_path(fp: Path, base: Path | None) -> str:
+    if base is not None:
+        try:
+            return fp.relative_to(base).as_posix()
+        except ValueError:
+            pass
+    return fp.as_posix()
+
+
+def _scan_large_file(
+    fp: Path,
+    st: os.stat_result,
+    use_entropy: bool,
+    known_digest: str | None,
+    hashing: bool,
+    profile: bool = False,
+    ruleset: RuleSet | None = None,
+    budget: ScanBudget | None = None,
+    rel: str = "",
+    safe_tokens: SafeTokens | None = None,
+) -> FileScan:
+    with open(fp, "rb") as fh:
+        head = fh.read(SNIFF_BYTES)
+    if looks_binary(head[:SNIFF_BLOCK]):
+        return FileScan(fp, [], st.st_size, st.st_mtime_ns, skipped="binary")
+    if budget is not None:
+        reason = budget.skip_reason(rel, st.st_size, head)
+        if reason:
+            return FileScan(fp, [], st.st_size, st.st_mtime_ns, skipped=reason)
+
+    if known_digest is not None and file_digest(fp) == known_digest:
+        return FileScan(fp, None, st.st_size, st.st_mtime_ns, known_digest)
+
+    t0 = time.perf_counter()
+    fs = FileStats(str(fp), bytes=st.st_size) if profile else None
+    hasher = hashlib.sha256() if hashing else None
+    deadline = budget.deadline() if budget is not None else None
+    safe_counts: Dict[str, int] = {}
+    findings = scan_chunks(
+        fp, iter_text_chunks(fp, hasher=hasher), use_entropy, stats=fs, ruleset=ruleset,
+        max_line_length=budget.max_line_length if budget is not None else 0,
+        deadline=deadline,
+        safe_tokens=safe_tokens,
+        safe_counts=safe_counts,
+    )
+    if fs is not None:
+        # Chunks are mapped and decoded lazily, so reading is whatever scanning did not take
+        fs.read = max(0.0, time.perf_counter() - t0 - fs.rule_match - fs.entropy)
+    truncated = "time" if deadline is not None and deadline.expired else None
+    # An unfinished hash does not describe the file
+    digest = hasher.hexdigest() if hasher and not truncated else None
+    return FileScan(fp, findings, st.st_size, st.st_mtime_ns, digest, fs, truncated=truncated, safe_tokens=safe_counts)
+
+
+def _scan_archive(
+    fp: Path,
+    st: os.stat_result,
+    use_entropy: bool,
+    known_digest: str | None,
+    hashing: bool,
+    profile: bool,
+    ruleset: RuleSet,
+    budget: ScanBudget | None,
+    archives: ArchiveLimits,
+    safe_tokens: SafeTokens | None = None,
+) -> FileScan:
+    digest = file_digest(fp) if hashing else None
+    if known_digest is not None and digest == known_digest:
+        return FileScan(fp, None, st.st_size, st.st_mtime_ns, digest)
+
+    t0 = time.perf_counter()
+    fs = FileStats(str(fp), bytes=st.st_size) if profile else None
+    deadline = budget.deadline() if budget is not None else None
+    reader = ArchiveReader(archives)
+    findings: List[Finding] = []
+    safe_counts: Dict[str, int] = {}
+    for member, data in reader.members(fp):
+        findings.extend(scan_text(
+            Path(member), data.decode("utf-8", errors="ignore"), use_entropy, ruleset, stats=fs,
+            max_line_length=budget.max_line_length if budget is not None else 0,
+            deadline=deadline,
+            safe_tokens=safe_tokens,
+            safe_counts=safe_counts,
+        ))
+        if deadline is not None and deadline.expired:
+            break
+    if fs is not None:
+        fs.read = max(0.0, time.perf_counter() - t0 - fs.rule_match - fs.entropy)
+    if deadline is not None and deadline.expired:
+        truncated: str | None = "time"
+    else:
+        truncated = "archive-limits" if reader.skipped else None
+    return FileScan(fp, findings, st.st_size, st.st_mtime_ns, digest, fs, truncated=truncated, safe_tokens=safe_counts)
+
+
+def scan_chunks(
+    fp: Path,
+    chunks: Iterable[TextChunk],
+    use_entropy: bool = True,
+    stats: FileStats | None = None,
+    ruleset: RuleSet | None = None,
+    max_line_length: int = 0,
+    deadline: Deadline | None = None,
+    safe_tokens: SafeTokens | None = None,
+    safe_counts: Dict[str, int] | None = None,
+) -> List[Finding]:
+    """
+    Scans a file chunk by chunk (see iter_text_chunks), so memory does not grow with file size.
+    Stops after the chunk during which `deadline` expires.
+    """
+    findings: List[Finding] = []
+    # Rules already reported per line, for lines that continue into the next
+    # chunk; only the first match per rule and line counts, as in a whole-file scan.
+    reported: Dict[int, set] = {}
+    for chunk in chunks:
+        part = scan_text(
+            fp,
+            chunk.text,
+            use_entropy,
+            line_offset=chunk.first_line - 1,
+            file_checks=chunk.first_line == 1 and not chunk.continued,
+            stats=stats,
+            ruleset=ruleset,
+            max_line_length=max_line_length,
+            deadline=deadline,
+            safe_tokens=safe_tokens,
+            safe_counts=safe_counts,
+            span=chunk.span,
+        )
+        reported = {line: rules for line, rules in reported.items() if line >= chunk.first_line} if chunk.continued else {}
+        part = [f for f in part if f["rule_id"] not in reported.get(f["line"], ())]
+        for f in part:
+            if f["rule_id"] != "SEC-ENTROPY-TOKEN":
+                reported.setdefault(f["line"], set()).add(f["rule_id"])
+        findings.extend(part)
+        if deadline is not None and deadline.check():
+            break
+    return findings
+
+
+def _relocate(findings: List[Mapping], fp: Path, rel: str) -> List[Finding]:
+    # Cached findings are stored as dicts, possibly under a different absolute root;
+    # only that root changes, an archive member's "!/<member>" suffix is kept
+    file = str(fp)
+    own = str(Path(rel))
+    relocated = []
+    for f in findings:
+        f = Finding.from_mapping(f)
+        if f.file == file or f.file.startswith(file + MEMBER_SEP):
+            relocated.append(f)
+            continue
+        at = f.file.find(own + MEMBER_SEP)
+        relocated.append(f.replace(file=file + f.file[at + len(own):] if at != -1 else file))
+    return relocated
 
 
 def mask_evidence(val: str) -> str:
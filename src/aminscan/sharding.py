@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import hashlib
+import heapq
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+# Fixed per-file cost, in bytes, so shards of many tiny files are not overloaded
+FILE_COST_BYTES = 4096
+
+SHARD_RE = re.compile(r"^\s*(\d+)\s*/\s*(\d+)\s*$")
+
+
+class ShardError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Shard:
+    """
+    Slice `index` (1-based) of `count` disjoint slices of a scan.
+    """
+
+    index: int
+    count: int
+
+    @classmethod
+    def parse(cls, spec: str) -> "Shard":
+        m = SHARD_RE.match(spec)
+        if not m:
+            raise ShardError(f"invalid shard {spec!r}, expected I/N (e.g. 2/4)")
+        index, count = int(m.group(1)), int(m.group(2))
+        if not 1 <= index <= count:
+            raise ShardError(f"invalid shard {spec!r}, I must be between 1 and N")
+        return cls(index, count)
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+
+def path_hash(rel_posix: str) -> int:
+    # Stable across runs and machines, unlike hash()
+    return int.from_bytes(hashlib.sha256(rel_posix.encode("utf-8")).digest()[:8], "big")
+
+
+def assign_shards(files: List[Tuple[str, int]], count: int) -> List[int]:
+    """
+    Assigns (relative path, size) entries to `count` shards and returns the 0-based shard of each.
+
+    Files are placed largest first on the currently lightest shard, so shards end
+    up with similar byte volumes. Ties are broken by path hash, so every node that
+    walks the same checkout computes the same assignment.
+    """
+    order = sorted(range(len(files)), key=lambda i: (-files[i][1], path_hash(files[i][0])))
+    # (bytes, files, shard): on equal load the shard with fewer files wins
+    loads = [(0, 0, s) for s in range(count)]
+    assigned = [0] * len(files)
+    for i in order:
+        load, n, s = heapq.heappop(loads)
+        assigned[i] = s
+        heapq.heappush(loads, (load + files[i][1] + FILE_COST_BYTES, n + 1, s))
+    return assigned
+
+
+def select_shard(files: List[Path], base: Path, shard: Shard) -> Tuple[List[Path], int]:
+    """
+    The files of `shard` (in walk order) and their total size.
+    """
+    sized: List[Tuple[str, int]] = []
+    for fp in files:
+        try:
+            size = fp.stat().st_size
+        except OSError:
+            size = 0
+        sized.append((fp.relative_to(base).as_posix(), size))
+
+    selected: List[Path] = []
+    total = 0
+    for fp, (_, size), s in zip(files, sized, assign_shards(sized, shard.count)):
+        if s == shard.index - 1:
+            selected.append(fp)
+            total += size
+    return selected, total
+
+
+def merge_reports(reports: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Combines JSON reports (as written by --out-json) into their concatenated findings and a meta.
+
+    Reports of a sharded scan must all come from the same scan (shard count, rules
+    and scan signature) and, together, cover every shard exactly once.
+    """
+    if not reports:
+        raise ShardError("no reports to merge")
+
+    findings: List[Dict[str, Any]] = []
+    metas: List[Dict[str, Any]] = []
+    for i, report in enumerate(reports, start=1):
+        if not isinstance(report, dict) or report.get("tool") != "AminScan" or not isinstance(report.get("findings"), list):
+            raise ShardError(f"report #{i} is not an AminScan JSON report")
+        findings.extend(report["findings"])
+        metas.append(report.get("meta") or {})
+
+    merged: Dict[str, Any] = {"parts": len(reports)}
+    if any(m.get("shard") for m in metas):
+        merged["shards"] = _check_shards(metas)
+
+    first = metas[0]
+    meta = {
+        "scanned_path": first.get("scanned_path"),
+        "url": next((m["url"] for m in metas if m.get("url")), None),
+        "entropy_enabled": first.get("entropy_enabled"),
+        "merged": merged,
+        "parts": metas,
+    }
+    return findings, meta
+
+
+def _check_shards(metas: List[Dict[str, Any]]) -> int:
+    shards: List[Dict[str, Any]] = [m["shard"] for m in metas if m.get("shard")]
+    if len(shards) < len(metas):
+        raise ShardError("sharded and unsharded reports cannot be merged")
+    for key, what in (("count", "shard counts"), ("rules", "rules")):
+        values = {str(s.get(key)) for s in shards}
+        if len(values) > 1:
+            raise ShardError(f"reports come from different {what}: {', '.join(sorted(values))}")
+    if len({m.get("signature") for m in metas}) > 1:
+        raise ShardError("reports come from scans with different settings")
+
+    count = shards[0]["count"]
+    seen: Dict[int, int] = {}
+    for s in shards:
+        seen[s["index"]] = seen.get(s["index"], 0) + 1
+    duplicate = [str(i) for i in sorted(seen) if seen[i] > 1]
+    if duplicate:
+        raise ShardError(f"duplicate shard(s) {', '.join(duplicate)} of {count}")
+    missing = [str(i) for i in range(1, count + 1) if i not in seen]
+    if missing:
+        raise ShardError(f"missing shard(s) {', '.join(missing)} of {count}")
+    return count
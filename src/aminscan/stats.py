@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import heapq
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import Any, ContextManager, Dict, Iterator, List, Tuple
+
+# "web" runs concurrently with the repository scan, so phases can add up to more than the wall time
+PHASES = ("config", "walk", "read", "rule_match", "entropy", "dedupe", "web", "render")
+
+# Slowest files kept in the report
+DEFAULT_TOP_N = 10
+
+
+@dataclass
+class FileStats:
+    """
+    Timings for one scanned file. Built in the worker that scanned it and
+    merged into the run's ScanStats by the parent.
+    """
+
+    file: str
+    bytes: int = 0
+    lines: int = 0
+    read: float = 0.0
+    rule_match: float = 0.0
+    entropy: float = 0.0
+    # rule_id -> [seconds, hits]
+    rules: Dict[str, List[float]] = field(default_factory=dict)
+
+    @property
+    def seconds(self) -> float:
+        return self.read + self.rule_match + self.entropy
+
+    def add_rule(self, rule_id: str, seconds: float, hits: int = 0) -> None:
+        entry = self.rules.setdefault(rule_id, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += hits
+
+
+class StatsHook:
+    """
+    Receives the same counters as the report; subclass and override what you need,
+    e.g. to forward them to a metrics system.
+    """
+
+    def on_phase(self, name: str, seconds: float) -> None:
+        pass
+
+    def on_file(self, stats: FileStats) -> None:
+        pass
+
+    def on_finish(self, report: Dict[str, Any]) -> None:
+        pass
+
+
+class ScanStats:
+    """
+    Run-wide profile: wall time per phase, cumulative time and hits per rule,
+    bytes/lines scanned and the slowest files.
+
+    read/rule_match/entropy are summed over files, so with worker processes
+    they can exceed the wall time of the scan.
+    """
+
+    def __init__(self, top_n: int = DEFAULT_TOP_N, hooks: List[StatsHook] | None = None):
+        self.top_n = top_n
+        self.hooks: List[StatsHook] = list(hooks or [])
+        self.phases: Dict[str, float] = {}
+        self.rules: Dict[str, List[float]] = {}
+        self.files = 0
+        self.bytes = 0
+        self.lines = 0
+        self._slowest: List[Tuple[float, str, int]] = []
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - t0)
+
+    def add_phase(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+        for hook in self.hooks:
+            hook.on_phase(name, seconds)
+
+    def add_file(self, fs: FileStats) -> None:
+        self.files += 1
+        self.bytes += fs.bytes
+        self.lines += fs.lines
+        for name in ("read", "rule_match", "entropy"):
+            self.phases[name] = self.phases.get(name, 0.0) + getattr(fs, name)
+        for rule_id, (seconds, hits) in fs.rules.items():
+            entry = self.rules.setdefault(rule_id, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += hits
+
+        item = (fs.seconds, fs.file, fs.bytes)
+        if len(self._slowest) < self.top_n:
+            heapq.heappush(self._slowest, item)
+        elif item > self._slowest[0]:
+            heapq.heapreplace(self._slowest, item)
+        for hook in self.hooks:
+            hook.on_file(fs)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "wall_seconds": round(time.perf_counter() - self._started, 6),
+            "phases": {name: round(self.phases[name], 6) for name in PHASES if name in self.phases},
+            "files": self.files,
+            "bytes": self.bytes,
+            "lines": self.lines,
+            "rules": {
+                rule_id: {"seconds": round(seconds, 6), "hits": int(hits)}
+                for rule_id, (seconds, hits) in sorted(self.rules.items(), key=lambda kv: -kv[1][0])
+            },
+            "slowest_files": [
+                {"file": file, "seconds": round(seconds, 6), "bytes": nbytes}
+                for seconds, file, nbytes in sorted(self._slowest, reverse=True)
+            ],
+        }
+
+    def finish(self) -> Dict[str, Any]:
+        """
+        Returns the report and hands it to every hook's on_finish.
+        """
+        report = self.as_dict()
+        for hook in self.hooks:
+            hook.on_finish(report)
+        return report
+
+
+def timed(stats: ScanStats | None, name: str) -> ContextManager[None]:
+    """
+    stats.phase(name), or a no-op when profiling is off.
+    """
+    return stats.phase(name) if stats is not None else nullcontext()
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import json
+from collections import Counter
+from pathlib import Path
+from typing import IO, Any, Dict
+
+from .findings import json_default
+
+SEVERITY_ORDER = {"low": 1, "medium": 2, "high": 3, "critical": 4}
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+SARIF_LEVELS = {"critical": "error", "high": "error", "medium": "warning", "low": "note"}
+
+
+class SummaryCounter:
+    """
+    Incremental version of cli.summarize(): feed findings one at a time.
+    """
+
+    def __init__(self) -> None:
+        self.sev: Counter = Counter()
+        self.cat: Counter = Counter()
+        self.total = 0
+        self.max_severity = 0
+
+    def add(self, f: Dict[str, Any]) -> None:
+        sev = (f.get("severity") or "low").lower()
+        self.sev[sev] += 1
+        self.max_severity = max(self.max_severity, SEVERITY_ORDER.get(sev, 0))
+
+        rule_id = (f.get("rule_id") or "").strip()
+        prefix = rule_id.split("-")[0] if rule_id else "OTHER"
+        self.cat[prefix] += 1
+        self.total += 1
+
+    def hit_threshold(self, fail_on: str) -> bool:
+        return self.max_severity >= SEVERITY_ORDER[fail_on]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "by_severity": dict(self.sev),
+            "by_category": dict(self.cat),
+            "total": self.total,
+        }
+
+
+class JsonlWriter:
+    """
+    One JSON object per finding per line, flushed as it is written.
+    """
+
+    def __init__(self, path: Path):
+        self._fh: IO[str] = open(path, "w", encoding="utf-8")
+
+    def write(self, f: Dict[str, Any]) -> None:
+        self._fh.write(json.dumps(f, separators=(",", ":"), default=json_default) + "\n")
+        self._fh.flush()
+
+    def close(self) -> None:
+        self._fh.close()
+
+
+class SarifWriter:
+    """
+    SARIF 2.1.0 log written incrementally.
+
+    Results are streamed into the run first; the tool/rule metadata seen along
+    the way is written after them when the writer is closed.
+    """
+
+    def __init__(self, path: Path, version: str, base: Path | None = None):
+        self.version = version
+        self.base = base
+        self.rules: Dict[str, Dict[str, Any]] = {}
+        self._first = True
+        self._fh: IO[str] = open(path, "w", encoding="utf-8")
+        self._fh.write(f'{{"version":"2.1.0","$schema":"{SARIF_SCHEMA}","runs":[{{"results":[')
+        self._fh.flush()
+
+    def write(self, f: Dict[str, Any]) -> None:
+        rule_id = f.get("rule_id") or "OTHER"
+        severity = (f.get("severity") or "low").lower()
+        if rule_id not in self.rules:
+            self.rules[rule_id] = {
+                "id": rule_id,
+                "shortDescription": {"text": f.get("title", "Finding")},
+                "help": {"text": f.get("recommendation") or ""},
+                "properties": {"severity": severity},
+            }
+
+        result: Dict[str, Any] = {
+            "ruleId": rule_id,
+            "level": SARIF_LEVELS.get(severity, "warning"),
+            "message": {"text": f"{f.get('title', 'Finding')}: {f.get('evidence_masked')}"},
+            "properties": {"confidence": f.get("confidence"), "severity": severity},
+        }
+        if f.get("file"):
+            location: Dict[str, Any] = {"artifactLocation": {"uri": self._uri(str(f["file"]))}}
+            if f.get("line") is not None:
+                location["region"] = {"startLine": f["line"]}
+            result["locations"] = [{"physicalLocation": location}]
+
+        self._fh.write(("" if self._first else ",") + json.dumps(result, separators=(",", ":")))
+        self._fh.flush()
+        self._first = False
+
+    def _uri(self, file: str) -> str:
+        p = Path(file)
+        if self.base is not None and p.is_absolute():
+            try:
+                return p.relative_to(self.base).as_posix()
+            except ValueError:
+                pass
+        return p.as_posix()
+
+    def close(self) -> None:
+        driver = {
+            "name": "AminScan",
+            "version": self.version,
+            "rules": list(self.rules.values()),
+        }
+        self._fh.write("]," + json.dumps({"tool": {"driver": driver}})[1:-1] + "}]}")
+        self._fh.close()
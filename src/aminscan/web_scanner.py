@@ -1,9 +1,15 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
-from urllib.parse import urljoin
+import re
+import secrets
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, List, NamedTuple, Tuple
+from urllib.parse import urljoin, urlsplit
 
 import requests
+import requests.adapters
 
 
 SEC_HEADERS = [
@@ -25,18 +31,160 @@ SENSITIVE_PATHS = [
     "/admin",
 ]
 
+# What the first bytes of a real exposure look like; paths without an entry
+# are reported on status alone (unless they match the catch-all page)
+PATH_SIGNATURES = {
+    "/.env": re.compile(rb"(?m)^[ \t]*(?:export[ \t]+)?[A-Za-z_][A-Za-z0-9_]*[ \t]*="),
+    "/.git/config": re.compile(rb"\[core\]|repositoryformatversion"),
+    "/backup.zip": re.compile(rb"\APK(?:\x03\x04|\x05\x06)"),
+    "/db.sql": re.compile(rb"(?i)CREATE TABLE|INSERT INTO|DROP TABLE|-- MySQL dump|PostgreSQL database dump"),
+}
+
+# Bytes read from a probed body, at most
+PROBE_MAX_BYTES = 1024
+
 
 def scan_web(url: str, timeout: int = 10) -> List[Dict[str, Any]]:
+    sess = new_session()
+
+    final_url, findings = check_base(sess, url, timeout)
+    if final_url is None:
+        return findings
+
+    # 6) Safe probing for common sensitive paths (headers and first bytes only)
+    catch_all = fetch_sample(sess, probe_url(final_url, catch_all_path()), timeout, head_first=False)
+    for path in SENSITIVE_PATHS:
+        f = probe_finding(path, fetch_sample(sess, probe_url(final_url, path), timeout), catch_all)
+        if f is not None:
+            findings.append(f)
+
+    return findings
+
+
+def scan_web_many(
+    urls: Iterable[str],
+    timeout: int = 10,
+    concurrency: int = 32,
+    per_host: int = 4,
+) -> List[Dict[str, Any]]:
+    """
+    Scans many targets concurrently on a thread pool.
+
+    Each host gets its own pooled session and at most `per_host` requests in
+    flight; `concurrency` bounds requests overall. Requests wait in a queue per
+    host and are handed to the pool, round robin across hosts, only when their
+    host has a free slot, so a busy host never ties up idle workers. Once a
+    target's base page is fetched, all of its probes are queued. Findings are
+    the same as scan_web's, tagged with `target`, and ordered by input URL.
+    """
+    urls = list(dict.fromkeys(u.strip() for u in urls if u.strip()))
+    workers = max(1, concurrency)
+    per_host = max(1, per_host)
+    sessions: Dict[str, requests.Session] = {}
+    queues: Dict[str, Deque[Tuple[Callable[..., Any], tuple, tuple]]] = {}
+    busy: Dict[str, int] = {}
+    # Hosts with queued requests and a free slot, in the order they get the next worker
+    ready: Deque[str] = deque()
+    running: Dict[Future, Tuple[str, tuple]] = {}
+
+    def enqueue(url: str, fn: Callable[..., Any], args: tuple, tag: tuple) -> None:
+        key = urlsplit(url).netloc.lower()
+        if key not in sessions:
+            sessions[key] = new_session(pool_size=per_host)
+            queues[key], busy[key] = deque(), 0
+        queues[key].append((fn, (sessions[key], *args), tag))
+        if len(queues[key]) == 1 and busy[key] < per_host:
+            ready.append(key)
+
+    def dispatch(ex: ThreadPoolExecutor) -> None:
+        while ready and len(running) < workers:
+            key = ready.popleft()
+            fn, args, tag = queues[key].popleft()
+            busy[key] += 1
+            running[ex.submit(fn, *args)] = (key, tag)
+            if queues[key] and busy[key] < per_host:
+                ready.append(key)
+
+    def sample(sess: requests.Session, final_url: str, path: str, head_first: bool = True) -> ProbeSample | None:
+        return fetch_sample(sess, probe_url(final_url, path), timeout, head_first)
+
+    results: Dict[str, List[Dict[str, Any]]] = {}
+    catch_alls: Dict[str, ProbeSample | None] = {}
+    samples: Dict[str, List[ProbeSample | None]] = {}
+    for url in urls:
+        enqueue(url, check_base, (url, timeout), ("base", url))
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        dispatch(ex)
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                key, (kind, url, *rest) = running.pop(fut)
+                busy[key] -= 1
+                if queues[key] and busy[key] == per_host - 1:
+                    ready.append(key)
+                if kind == "base":
+                    final_url, results[url] = fut.result()
+                    if final_url is not None:
+                        samples[url] = [None] * len(SENSITIVE_PATHS)
+                        enqueue(final_url, sample, (final_url, catch_all_path(), False), ("catch_all", url))
+                        for i, path in enumerate(SENSITIVE_PATHS):
+                            enqueue(final_url, sample, (final_url, path), ("probe", url, i))
+                elif kind == "catch_all":
+                    catch_alls[url] = fut.result()
+                else:
+                    samples[url][rest[0]] = fut.result()
+            dispatch(ex)
+
+    for url, probed in samples.items():
+        for path, probe in zip(SENSITIVE_PATHS, probed):
+            f = probe_finding(path, probe, catch_alls[url])
+            if f is not None:
+                results[url].append(f)
+
+    for sess in sessions.values():
+        sess.close()
+
     findings: List[Dict[str, Any]] = []
+    for url in urls:
+        for f in results[url]:
+            f["target"] = url
+            findings.append(f)
+    return findings
 
+
+def load_targets(path: Path) -> List[str]:
+    """
+    Reads one URL per line; blank lines and # comments are skipped.
+    """
+    targets = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            targets.append(line)
+    return targets
+
+
+def new_session(pool_size: int = 10) -> requests.Session:
     sess = requests.Session()
     sess.headers.update({"User-Agent": "AminScan/0.0.4"})
+    adapter = requests.adapters.HTTPAdapter(pool_connections=10, pool_maxsize=pool_size)
+    sess.mount("http://", adapter)
+    sess.mount("https://", adapter)
+    return sess
+
+
+def check_base(sess: requests.Session, url: str, timeout: int = 10) -> Tuple[str | None, List[Dict[str, Any]]]:
+    """
+    Fetches the target itself and checks HTTPS, headers, CORS and banners.
+    Returns (final URL after redirects, findings); the URL is None if unreachable.
+    """
+    findings: List[Dict[str, Any]] = []
 
     # 1) Fetch the URL (follow redirects)
     try:
         r = sess.get(url, allow_redirects=True, timeout=timeout)
     except Exception:
-        return [{
+        return None, [{
             "rule_id": "WEB-UNREACHABLE",
             "title": "Web scan failed (URL unreachable)",
             "severity": "medium",
@@ -119,24 +267,99 @@ def scan_web(url: str, timeout: int = 10) -> List[Dict[str, Any]]:
             "recommendation": "Disable X-Powered-By header to reduce fingerprinting.",
         })
 
-    # 6) Safe probing for common sensitive paths
+    return final_url, findings
+
+
+class ProbeSample(NamedTuple):
+    status: int
+    content_type: str
+    body: bytes  # at most PROBE_MAX_BYTES from the start of the body
+
+
+def probe_url(final_url: str, path: str) -> str:
     base = final_url if final_url.endswith("/") else final_url + "/"
-    for path in SENSITIVE_PATHS:
-        target = urljoin(base, path.lstrip("/"))
+    return urljoin(base, path.lstrip("/"))
+
+
+def catch_all_path() -> str:
+    # A path that should not exist; a 200 here means the server answers everything
+    return f"/aminscan-{secrets.token_hex(8)}"
+
+
+def fetch_sample(sess: requests.Session, url: str, timeout: int = 10, head_first: bool = True) -> ProbeSample | None:
+    """
+    Fetches status, content type and the first bytes of a URL without downloading the body.
+
+    HEAD comes first; only when it reports success (or is not supported) a
+    streamed, ranged GET reads at most PROBE_MAX_BYTES and drops the connection.
+    """
+    if head_first:
         try:
-            pr = sess.get(target, allow_redirects=True, timeout=timeout)
-            if pr.status_code in (200, 206):
-                findings.append({
-                    "rule_id": "WEB-SENSITIVE-PATH",
-                    "title": f"Sensitive path accessible: {path}",
-                    "severity": "high",
-                    "confidence": "medium",
-                    "file": None,
-                    "line": None,
-                    "evidence_masked": path,
-                    "recommendation": "Remove/lock down the resource and verify server configuration.",
-                })
+            h = sess.head(url, allow_redirects=True, timeout=timeout)
+            h.close()
         except Exception:
-            continue
+            h = None
+        if h is not None and h.status_code not in (200, 206, 405, 501):
+            return ProbeSample(h.status_code, h.headers.get("content-type", ""), b"")
 
-    return findings
+    try:
+        r = sess.get(
+            url,
+            headers={"Range": f"bytes=0-{PROBE_MAX_BYTES - 1}"},
+            stream=True,
+            allow_redirects=True,
+            timeout=timeout,
+        )
+    except Exception:
+        return None
+    try:
+        body = b""
+        if r.status_code in (200, 206):
+            for chunk in r.iter_content(chunk_size=PROBE_MAX_BYTES):
+                body += chunk
+                if len(body) >= PROBE_MAX_BYTES:
+                    break
+        return ProbeSample(r.status_code, r.headers.get("content-type", ""), body[:PROBE_MAX_BYTES])
+    except Exception:
+        return None
+    finally:
+        # Closing before the body is fully read discards the connection instead of draining it
+        r.close()
+
+
+def probe_finding(path: str, sample: ProbeSample | None, catch_all: ProbeSample | None = None) -> Dict[str, Any] | None:
+    """
+    Decides from a probe sample whether a sensitive path is really exposed.
+    """
+    if sample is None or sample.status not in (200, 206):
+        return None
+
+    body = sample.body
+    if catch_all is not None and catch_all.status in (200, 206) and body and body == catch_all.body:
+        return None  # same page the server returns for any path
+
+    confidence = "medium"
+    signature = PATH_SIGNATURES.get(path)
+    if signature is not None and body:
+        if signature.search(body):
+            confidence = "high"
+        elif _looks_like_html(body, sample.content_type):
+            return None  # e.g. an SPA index.html served for every route
+
+    return {
+        "rule_id": "WEB-SENSITIVE-PATH",
+        "title": f"Sensitive path accessible: {path}",
+        "severity": "high",
+        "confidence": confidence,
+        "file": None,
+        "line": None,
+        "evidence_masked": path,
+        "recommendation": "Remove/lock down the resource and verify server configuration.",
+    }
+
+
+def _looks_like_html(body: bytes, content_type: str) -> bool:
+    if "html" in content_type.lower():
+        return True
+    head = body.lstrip(b"\xef\xbb\xbf \t\r\n")[:64].lower()
+    return head.startswith((b"<!doctype html", b"<html", b"<head", b"<body", b"<script"))
@@ -0,0 +1,130 @@
+import json
+import multiprocessing
+import subprocess
+import sys
+
+import pytest
+
+from aminscan import batch
+from aminscan.batch import BatchError, BatchScan, Checkpoint, load_roots
+from aminscan.secrets_scanner import scan_secrets
+
+
+def make_repos(tmp_path):
+    roots = []
+    for name in ("alpha", "beta", "gamma"):
+        repo = tmp_path / name
+        (repo / "src").mkdir(parents=True)
+        for i in range(80):
+            (repo / "src" / f"m{i:02d}.py").write_text(f"K{i} = 'AKIA{i:016d}'\n" + "x = 1\n" * i, encoding="utf-8")
+        roots.append(repo)
+    # Each repository's own config and ignore file apply
+    (roots[1] / ".aminscanignore").write_text("src/m1*.py\n", encoding="utf-8")
+    (roots[2] / ".aminscan.yml").write_text("entropy: false\nextra_ignores: ['src/m0*']\n", encoding="utf-8")
+    return roots
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_batch_matches_a_scan_per_repository(tmp_path, monkeypatch, jobs):
+    roots = make_repos(tmp_path)
+    broken = tmp_path / "broken"
+    broken.mkdir()
+    (broken / ".aminscan.yml").write_text("rules: [{id: X}]\n", encoding="utf-8")
+    # Small units, so every repository is spread over several of them
+    monkeypatch.setattr(batch, "BATCH_BYTES", 64 * 1024)
+
+    scans = {r.root: r for r in BatchScan([*roots, broken], jobs=jobs).run()}
+
+    assert scans[broken].error.startswith("Invalid rules") and not scans[broken].findings
+    for root, ignores, entropy in zip(roots, ([], [], ["src/m0*"]), (True, True, False)):
+        meta: dict = {}
+        assert scans[root].findings == scan_secrets(root, use_entropy=entropy, extra_ignores=ignores, jobs=1, meta=meta)
+        assert scans[root].meta["binary"] == meta["binary"]
+    # The config and ignore files are text too
+    assert [scans[root].files for root in roots] == [80, 71, 71]
+    assert scans[roots[2]].meta["entropy_enabled"] is False
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_a_failing_unit_only_fails_its_repository(tmp_path, monkeypatch, jobs):
+    roots = make_repos(tmp_path)
+    monkeypatch.setattr(batch, "BATCH_BYTES", 64 * 1024)
+    scan_task = batch._scan_task
+
+    def flaky(fp, *args, **kwargs):
+        if fp.parent.parent.name == "beta" and fp.name == "m05.py":
+            raise OSError("vanished mid-scan")
+        return scan_task(fp, *args, **kwargs)
+
+    # Forked workers see the patched function too
+    if jobs > 1 and multiprocessing.get_start_method() != "fork":
+        pytest.skip("needs forked workers")
+    monkeypatch.setattr(batch, "_scan_task", flaky)
+    scans = list(BatchScan(roots, jobs=jobs).run())
+
+    assert sorted(s.root.name for s in scans) == ["alpha", "beta", "gamma"]
+    by_name = {s.root.name: s for s in scans}
+    assert by_name["beta"].error == "Scan failed: vanished mid-scan" and not by_name["beta"].findings
+    assert len(by_name["alpha"].findings) == 80 and by_name["gamma"].error is None
+
+
+def test_checkpoint_resumes_and_drops_a_cut_off_line(tmp_path):
+    roots = make_repos(tmp_path)
+    path = tmp_path / "out" / "checkpoint.jsonl"
+    checkpoint = Checkpoint.open(path, {"use_entropy": True})
+    first = next(BatchScan(roots[:1], jobs=1).run())
+    checkpoint.record(first, "alpha.json", {"by_severity": {"high": 80}, "by_category": {"SEC": 80}, "total": 80})
+    checkpoint.close()
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write('{"root": "/half-writ')
+
+    resumed = Checkpoint.open(path, {"use_entropy": True})
+    assert list(resumed.done) == [str(roots[0])]
+    assert path.read_text(encoding="utf-8").endswith("}\n")
+    with pytest.raises(BatchError, match="other options"):
+        Checkpoint.open(path, {"use_entropy": False})
+    assert not Checkpoint.open(path, {"use_entropy": False}, fresh=True).done
+
+
+def test_scan_many_cli_writes_reports_and_resumes(tmp_path):
+    roots = make_repos(tmp_path)
+    roots_file = tmp_path / "roots.txt"
+    roots_file.write_text("# repositories\nalpha\n\nbeta\nalpha\n" + str(roots[2]) + "\n", encoding="utf-8")
+    assert load_roots(roots_file) == roots
+    out = tmp_path / "reports"
+    cmd = [sys.executable, "-m", "aminscan", "scan-many", "--roots", str(roots_file), "--out-dir", str(out), "--jobs", "2"]
+
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    assert proc.returncode == 1
+    assert [line.split("]")[0] for line in proc.stdout.splitlines()[:3]] == ["[1/3", "[2/3", "[3/3"]
+    summary = json.loads((out / "summary.json").read_text(encoding="utf-8"))
+    assert summary["repositories"] == 3 and summary["summary"]["total"] == 80 + 70 + 70
+    for entry in summary["reports"]:
+        report = json.loads((out / entry["report"]).read_text(encoding="utf-8"))
+        assert report["summary"] == entry["summary"]
+
+    # Interrupted after the first repository: only the others are scanned again
+    lines = (out / "checkpoint.jsonl").read_text(encoding="utf-8").splitlines(keepends=True)
+    (out / "checkpoint.jsonl").write_text("".join(lines[:2]), encoding="utf-8")
+    proc = subprocess.run([*cmd, "--fail-on", "critical"], capture_output=True, text=True)
+    assert proc.returncode == 0
+    assert "1 of 3 repositories already scanned" in proc.stdout
+    assert sum(line.startswith("[") for line in proc.stdout.splitlines()) == 2
+    assert json.loads((out / "summary.json").read_text(encoding="utf-8"))["summary"]["total"] == 220
+
+
+def test_invalid_fail_on_is_a_repository_error(tmp_path):
+    roots = make_repos(tmp_path)
+    (roots[1] / ".aminscan.yml").write_text("fail_on: severe\n", encoding="utf-8")
+    roots_file = tmp_path / "roots.txt"
+    roots_file.write_text("\n".join(r.name for r in roots) + "\n", encoding="utf-8")
+    out = tmp_path / "reports"
+
+    proc = subprocess.run(
+        [sys.executable, "-m", "aminscan", "scan-many", "--roots", str(roots_file), "--out-dir", str(out), "--jobs", "1"],
+        capture_output=True, text=True,
+    )
+    assert proc.returncode == 1 and "Traceback" not in proc.stderr
+    summary = json.loads((out / "summary.json").read_text(encoding="utf-8"))
+    assert summary["errors"] == 1 and summary["failed"] == [str(r) for r in roots]
+    assert "invalid fail_on 'severe'" in summary["reports"][1]["error"]
@@ -0,0 +1,21 @@
+from aminscan.secrets_scanner import dedupe_findings, iter_secrets, scan_secrets
+
+
+def test_dedupe_keeps_first_occurrence():
+    a = {"rule_id": "R", "file": "f", "line": 1, "evidence_masked": "x", "n": 1}
+    b = {"rule_id": "R", "file": "f", "line": 1, "evidence_masked": "x", "n": 2}
+    c = {"rule_id": "R", "file": "f", "line": 2, "evidence_masked": "x", "n": 3}
+    assert dedupe_findings([a, b, c]) == [a, c]
+
+
+def test_iter_secrets_streams_deduplicated_findings(tmp_path):
+    tok = "R4nd0m_Str1ng_WithLotsOfVariety_1234567890+=="
+    (tmp_path / "a.py").write_text(f"x = '{tok}' + '{tok}'\n", encoding="utf-8")
+    (tmp_path / "b.py").write_text(f"y = '{tok}'\n", encoding="utf-8")
+
+    stream = iter_secrets(tmp_path, jobs=1)
+    first = next(stream)
+    assert first["file"] == str(tmp_path / "a.py")
+    rest = list(stream)
+    assert [first] + rest == scan_secrets(tmp_path, jobs=1)
+    assert [f["file"] for f in rest] == [str(tmp_path / "b.py")]
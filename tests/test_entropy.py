@@ -1,4 +1,10 @@
-from aminscan.entropy import shannon_entropy, looks_like_high_entropy_token
+import random
+
+import pytest
+
+from aminscan import entropy
+from aminscan.entropy import SAFE_TOKEN_CLASSES, TOKEN_RE, SafeTokenError, SafeTokens, high_entropy_flags, shannon_entropy, looks_like_high_entropy_token
+from aminscan.secrets_scanner import scan_secrets
 
 def test_entropy_basic():
     assert shannon_entropy("aaaaaaaaaa") < 1.0
@@ -11,3 +17,82 @@ def test_high_entropy_token_heuristic():
 
     low = "this_is_not_random_at_all________"
     assert looks_like_high_entropy_token(low) is False
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_batched_flags_match_single_token_heuristic(monkeypatch, use_numpy):
+    if not use_numpy:
+        monkeypatch.setattr(entropy, "_np", False)
+    entropy._memo.clear()
+    rnd = random.Random(3)
+    alphabet = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-/+="
+    tokens = ["0123456789abcdef" * 2]  # exactly 4.0 bits
+    for _ in range(2000):
+        k = rnd.randint(2, len(alphabet))
+        tokens.append("".join(rnd.choice(alphabet[:k]) for _ in range(rnd.randint(20, 80))))
+    expected = [looks_like_high_entropy_token(t) for t in tokens]
+    assert high_entropy_flags(tokens) == expected
+    # Second pass is served from the memo
+    assert high_entropy_flags(tokens) == expected
+    entropy._memo.clear()
+    assert high_entropy_flags(tokens[:5]) == expected[:5]
+
+
+SECRET = "R4nd0m_Str1ng_WithLotsOfVariety_1234567890"
+
+
+@pytest.mark.parametrize("tok, before, kind", [
+    ("9fceb02d0ae598e95dc970b74767f19372d61af8", "commit ", "hex"),
+    ("3F2504E0-4F89-11D3-9A0C-0305E82C3301", "id = '", "uuid"),
+    ("sha512-Xq9vR2mK8pL4nT6wZ1yB3cD5fG7hJ0kQ==", '"integrity": "', "integrity"),
+    ("Xq9vR2mK8pL4nT6wZ1yB3cD5fG7hJ0kQ=", "golang.org/x/net v0.1.0 h1:", "integrity"),
+    ("iVBORw0KGgoAAAANSUhEUgAAAAEAAAAB", '<img src="data:image/png;base64,', "data-uri"),
+    ("node_modules/some-package/dist/esm/index", "import x from '", "path"),
+    (SECRET, 'token = "', None),
+    ("src/Components/" + SECRET, "", None),
+])
+def test_safe_token_classes(tok, before, kind):
+    assert SafeTokens().classify(tok, before) == kind
+
+
+DIGEST = "9fceb02d0ae598e95dc970b74767f193"
+NO_HEX = SafeTokens(classes=tuple(c for c in SAFE_TOKEN_CLASSES if c != "hex"))
+
+
+@pytest.mark.parametrize("tok, before, kind", [
+    (DIGEST, "sha256sum: ", "integrity"),
+    (DIGEST.upper() + "01234567", '"checksum": "', "integrity"),
+    # Only whole digest keys, and only digest-shaped values
+    (DIGEST, "api_checksum = ", None),
+    (DIGEST, "data-integrity=", None),
+    (DIGEST + "0", "checksum: ", None),
+    (SECRET, "checksum: ", None),
+])
+def test_integrity_keys(tok, before, kind):
+    assert NO_HEX.classify(tok, before) == kind
+
+
+def test_safe_token_context_stops_at_the_line_start(tmp_path):
+    text = f"checksum:\n{DIGEST}\nintegrity:\n  {SECRET}\n"
+    kept = NO_HEX.filter(list(TOKEN_RE.finditer(text)), text)
+    assert [m.group(0) for m in kept] == [DIGEST, SECRET]
+    (tmp_path / "deps.yml").write_text(text, encoding="utf-8")
+    assert [f["line"] for f in scan_secrets(tmp_path, jobs=1)] == [4]
+
+
+def test_safe_tokens_are_skipped_counted_and_configurable(tmp_path):
+    (tmp_path / "app.js").write_text(
+        f"const id = '3f2504e0-4f89-11d3-9a0c-0305e82c3301';\n"
+        f"const img = 'data:image/gif;base64,R0lGODlhPQBEAPeoAJosM9xKq7vWpTfYz3cB1Hm8LwEg';\n"
+        f"const key = '{SECRET}';\n",
+        encoding="utf-8",
+    )
+    meta: dict = {}
+    findings = scan_secrets(tmp_path, jobs=1, meta=meta)
+    assert [f["line"] for f in findings] == [3]
+    assert meta["safe_tokens"] == {"hex": 0, "uuid": 1, "integrity": 0, "data-uri": 1, "path": 0}
+
+    findings = scan_secrets(tmp_path, jobs=1, safe_tokens=SafeTokens(classes=("uuid",)))
+    assert [f["line"] for f in findings] == [2, 3]
+    with pytest.raises(SafeTokenError):
+        SafeTokens(classes=("base64",))
@@ -0,0 +1,41 @@
+from aminscan.file_utils import is_ignored, iter_text_files, load_ignore_patterns
+
+
+def _touch(base, rel, text="x = 1\n"):
+    p = base / rel
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(text, encoding="utf-8")
+
+
+def _walk(base, **kw):
+    return [p.relative_to(base).as_posix() for p in iter_text_files(base, load_ignore_patterns(base), **kw)]
+
+
+def test_ignore_patterns_match_at_any_depth():
+    patterns = ["**/node_modules/**", "**/*.min.js", "docs/*"]
+    assert is_ignored("node_modules/a/index.js", patterns)
+    assert is_ignored("pkg/node_modules/a.js", patterns)
+    assert is_ignored("app.min.js", patterns)
+    assert is_ignored("docs/a/b.md", patterns)
+    assert not is_ignored("src/node_modules.py", patterns)
+    assert not is_ignored("src/docs/a.md", patterns)
+
+
+def test_walker_prunes_and_filters(tmp_path):
+    _touch(tmp_path, "b.py")
+    _touch(tmp_path, "a/z.json")
+    _touch(tmp_path, "a/README")
+    _touch(tmp_path, "a/image.png")
+    _touch(tmp_path, "node_modules/dep/index.js")
+    _touch(tmp_path, "pkg/node_modules/dep/index.js")
+    _touch(tmp_path, ".git/config")
+    _touch(tmp_path, "coverage/report.html")
+    (tmp_path / ".aminscanignore").write_text("**/coverage/**\n", encoding="utf-8")
+
+    assert _walk(tmp_path) == [".aminscanignore", "a/README", "a/z.json", "b.py"]
+
+
+def test_threaded_walk_keeps_order(tmp_path):
+    for i in range(30):
+        _touch(tmp_path, f"d{i % 4}/s{i % 3}/f{i}.py")
+    assert _walk(tmp_path, threads=4) == _walk(tmp_path)
@@ -0,0 +1,22 @@
+from aminscan.secrets_scanner import PARALLEL_MIN_FILES, scan_secrets
+
+
+def _make_tree(base):
+    for i in range(PARALLEL_MIN_FILES + 16):
+        d = base / f"pkg{i % 5}"
+        d.mkdir(exist_ok=True)
+        (d / f"mod{i}.py").write_text(
+            f"AWS = 'AKIA{i:016d}'\n"
+            "TOKEN = 'R4nd0m_Str1ng_WithLotsOfVariety_1234567890+=='\n"
+            "TOKEN = 'R4nd0m_Str1ng_WithLotsOfVariety_1234567890+=='\n",
+            encoding="utf-8",
+        )
+    (base / ".env").write_text("KEY=value\n", encoding="utf-8")
+
+
+def test_parallel_matches_serial(tmp_path):
+    _make_tree(tmp_path)
+    serial = scan_secrets(tmp_path, jobs=1)
+    parallel = scan_secrets(tmp_path, jobs=3)
+    assert serial
+    assert parallel == serial
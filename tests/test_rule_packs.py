@@ -0,0 +1,96 @@
+import pytest
+
+from aminscan.config import AminScanConfig, load_config
+from aminscan.rule_packs import RuleError, load_ruleset
+from aminscan.secrets_rules import LazyPattern
+from aminscan.secrets_scanner import PARALLEL_MIN_FILES, scan_secrets
+
+ACME = {
+    "id": "ACME-API-KEY",
+    "title": "ACME API key",
+    "severity": "critical",
+    "regex": r"\bacme_[A-Za-z0-9]{24}\b",
+    "keywords": ["acme_"],
+    "paths": ["**/*.py"],
+}
+
+
+def _ids(findings):
+    return sorted((f["rule_id"], f["file"].rsplit("/", 1)[-1]) for f in findings)
+
+
+def test_config_rules_and_packs_are_scanned(tmp_path):
+    (tmp_path / ".aminscan.yml").write_text(
+        "rules:\n"
+        "  - id: ACME-API-KEY\n"
+        "    regex: '\\bacme_[A-Za-z0-9]{24}\\b'\n"
+        "    keywords: [acme_]\n"
+        "rule_packs: [packs/internal.yml]\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "packs").mkdir()
+    (tmp_path / "packs" / "internal.yml").write_text(
+        "rules:\n"
+        "  - id: INT-TOKEN\n"
+        "    severity: medium\n"
+        "    regex: 'int-[0-9a-f]{16}'\n"
+        "    keywords: ['int-']\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "app.py").write_text("a = 'acme_" + "x" * 24 + "'\nb = 'int-0123456789abcdef'\n", encoding="utf-8")
+
+    ruleset = load_ruleset(tmp_path, load_config(tmp_path), cache_dir=tmp_path / "artifacts")
+    findings = scan_secrets(tmp_path, use_entropy=False, jobs=1, ruleset=ruleset)
+    assert _ids(findings) == [("ACME-API-KEY", "app.py"), ("INT-TOKEN", "app.py")]
+
+
+def test_artifact_is_reused_and_patterns_compile_lazily(tmp_path):
+    cfg = AminScanConfig(rules=[ACME])
+    first = load_ruleset(tmp_path, cfg, cache_dir=tmp_path)
+    assert len(list(tmp_path.glob("*.json"))) == 1
+
+    second = load_ruleset(tmp_path, cfg, cache_dir=tmp_path)
+    assert second.version == first.version
+    rule = second.rules[-1]
+    assert isinstance(rule.pattern, LazyPattern) and rule.pattern._compiled is None
+
+    (tmp_path / "plain.py").write_text("nothing to see\n", encoding="utf-8")
+    scan_secrets(tmp_path, jobs=1, ruleset=second)
+    # No line contained the keyword, so the pattern was never needed
+    assert rule.pattern._compiled is None
+
+
+def test_path_globs_and_entropy_threshold(tmp_path):
+    low = {"id": "LOW-ENTROPY", "regex": r"tok_[a-z]{20}", "keywords": ["tok_"], "entropy": 3.5}
+    cfg = AminScanConfig(rules=[ACME, low])
+    ruleset = load_ruleset(tmp_path, cfg, cache_dir=tmp_path / "artifacts")
+
+    key = "acme_" + "k" * 24
+    (tmp_path / "a.py").write_text(f"k = '{key}'\nt = 'tok_{'a' * 20}'\nu = 'tok_abcdefghijklmnopqrst'\n", encoding="utf-8")
+    (tmp_path / "a.txt").write_text(f"k = '{key}'\n", encoding="utf-8")
+
+    findings = scan_secrets(tmp_path, use_entropy=False, jobs=1, ruleset=ruleset)
+    assert [(f["rule_id"], f["line"]) for f in findings] == [("ACME-API-KEY", 1), ("LOW-ENTROPY", 3)]
+
+
+def test_parallel_workers_use_custom_rules(tmp_path):
+    for i in range(PARALLEL_MIN_FILES + 4):
+        (tmp_path / f"m{i}.py").write_text(f"k = 'acme_{i:024d}'\n", encoding="utf-8")
+    ruleset = load_ruleset(tmp_path, AminScanConfig(rules=[ACME]), cache_dir=tmp_path / "artifacts")
+    serial = scan_secrets(tmp_path, use_entropy=False, jobs=1, ruleset=ruleset)
+    assert len(serial) == PARALLEL_MIN_FILES + 4
+    assert scan_secrets(tmp_path, use_entropy=False, jobs=2, ruleset=ruleset) == serial
+
+
+@pytest.mark.parametrize("rule, message", [
+    ({"id": "X", "regex": "("}, "invalid regex"),
+    ({"id": "X", "regex": "a*"}, "empty string"),
+    ({"id": "X", "regex": "a", "severity": "urgent"}, "severity"),
+    ({"id": "X", "regex": "a", "entropy": 12}, "entropy"),
+    ({"id": "X", "regex": "a", "keyword": ["a"]}, "unknown keys keyword"),
+    ({"id": "SEC-JWT", "regex": "a"}, "duplicate rule id"),
+    ({"regex": "a"}, "'id'"),
+])
+def test_invalid_rules_are_rejected(tmp_path, rule, message):
+    with pytest.raises(RuleError, match=message):
+        load_ruleset(tmp_path, AminScanConfig(rules=[rule]), cache_dir=tmp_path)
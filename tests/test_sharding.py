@@ -0,0 +1,70 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from aminscan.secrets_scanner import scan_secrets
+from aminscan.sharding import Shard, ShardError, assign_shards, merge_reports
+
+
+def test_shards_are_disjoint_complete_and_match_a_full_scan(tmp_path):
+    for i in range(40):
+        (tmp_path / f"m{i:02d}.py").write_text(f"K{i} = 'AKIA{i:016d}'\n" + "x = 1\n" * (i * 50), encoding="utf-8")
+
+    full = scan_secrets(tmp_path, use_entropy=False, jobs=1)
+    parts = []
+    for i in (1, 2, 3):
+        meta: dict = {}
+        findings = scan_secrets(tmp_path, use_entropy=False, jobs=1, meta=meta, shard=Shard(i, 3))
+        assert meta["shard"]["files"] == len(findings)
+        parts.append({"tool": "AminScan", "meta": meta, "findings": findings})
+
+    files = [f["file"] for p in parts for f in p["findings"]]
+    assert len(files) == len(set(files))
+    merged, meta = merge_reports(parts)
+    assert sorted(f["file"] for f in merged) == sorted(f["file"] for f in full)
+    assert meta["merged"] == {"parts": 3, "shards": 3}
+
+    with pytest.raises(ShardError, match="missing shard"):
+        merge_reports(parts[:2])
+    with pytest.raises(ShardError, match="duplicate shard"):
+        merge_reports([*parts, parts[1]])
+    with pytest.raises(ShardError, match="unsharded"):
+        merge_reports([*parts, {"tool": "AminScan", "meta": {}, "findings": full}])
+    other = {**parts[2], "meta": {**parts[2]["meta"], "shard": {**parts[2]["meta"]["shard"], "rules": "0" * 16}}}
+    with pytest.raises(ShardError, match="different rules"):
+        merge_reports([*parts[:2], other])
+
+
+def test_merge_cli_fails_on_a_duplicate_shard(tmp_path):
+    (tmp_path / "src").mkdir()
+    for i in range(10):
+        (tmp_path / "src" / f"m{i}.py").write_text(f"K = 'AKIA{i:016d}'\n", encoding="utf-8")
+    aminscan = [sys.executable, "-m", "aminscan"]
+    for i in (1, 2):
+        out = tmp_path / f"part{i}.json"
+        subprocess.run([*aminscan, "scan", "--path", str(tmp_path / "src"), "--shard", f"{i}/2", "--out-json", str(out), "--fail-on", "critical"], check=True, capture_output=True)
+    assert json.loads((tmp_path / "part1.json").read_text(encoding="utf-8"))["meta"]["signature"]
+
+    proc = subprocess.run([*aminscan, "merge", str(tmp_path / "part1.json"), str(tmp_path / "part1.json")], capture_output=True, text=True)
+    assert proc.returncode != 0 and "duplicate shard(s) 1 of 2" in proc.stderr
+    proc = subprocess.run([*aminscan, "merge", str(tmp_path / "part1.json"), str(tmp_path / "part2.json"), "--fail-on", "critical"], capture_output=True, text=True)
+    assert proc.returncode == 0
+
+
+def test_assignment_balances_bytes_and_is_order_independent():
+    files = [(f"f{i}", size) for i, size in enumerate([10_000_000, 9_000_000] + [100_000] * 200)]
+    assigned = assign_shards(files, 2)
+    loads = [sum(size for (_, size), s in zip(files, assigned) if s == k) for k in (0, 1)]
+    assert abs(loads[0] - loads[1]) <= 1_000_000
+
+    reordered = files[::-1]
+    assert dict(zip([p for p, _ in reordered], assign_shards(reordered, 2))) == dict(zip([p for p, _ in files], assigned))
+
+
+def test_parse_rejects_bad_specs():
+    assert Shard.parse("2/4") == Shard(2, 4)
+    for spec in ("0/4", "5/4", "2", "a/b"):
+        with pytest.raises(ShardError):
+            Shard.parse(spec)
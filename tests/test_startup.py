@@ -0,0 +1,67 @@
+import os
+import subprocess
+import sys
+
+from aminscan.config import load_config
+
+# Only needed by subcommands or inputs a pre-commit scan of a plain repo does not have.
+# Timings are left to benchmarks/bench_startup.py: wall-clock limits flake on busy runners.
+LAZY_MODULES = {
+    "yaml", "requests", "urllib3", "http.server", "tarfile", "zipfile", "sqlite3", "multiprocessing", "concurrent.futures",
+}
+
+
+def _env(tmp_path):
+    env = {k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"}
+    env["XDG_CACHE_HOME"] = str(tmp_path / "xdg")
+    # Run with -S: .pth files can import modules (e.g. zipfile) before aminscan does
+    env["PYTHONPATH"] = os.pathsep.join(p for p in sys.path if p)
+    return env
+
+
+def _imported(args, env, cwd=None):
+    """
+    Runs python -S -X importtime; returns the names of the modules imported.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-S", "-X", "importtime", *args], env=env, cwd=cwd, capture_output=True, text=True,
+    )
+    assert proc.returncode == 0, proc.stderr
+    return {
+        line.split("|")[2].strip()
+        for line in proc.stderr.splitlines()
+        if line.startswith("import time:") and "|" in line
+    }
+
+
+def test_cli_import_is_lazy(tmp_path):
+    modules = _imported(["-c", "import aminscan.cli"], _env(tmp_path))
+    assert "aminscan.cli" in modules
+    assert not LAZY_MODULES & modules
+
+
+def test_noop_scan_is_lazy_and_caches_config(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / ".aminscan.yml").write_text("fail_on: critical\nextra_ignores: [dist]\n", encoding="utf-8")
+    env = _env(tmp_path)
+    scan = ["-m", "aminscan", "scan", "--path", str(repo)]
+
+    assert "yaml" in _imported(scan, env)  # first parse
+    assert not LAZY_MODULES & _imported(scan, env)
+
+
+def test_config_parse_cache_follows_the_file(tmp_path):
+    cfg = tmp_path / ".aminscan.yml"
+    cfg.write_text("fail_on: medium\n", encoding="utf-8")
+    cache_dir = tmp_path / "parsed"
+    assert load_config(tmp_path, cache_dir).fail_on == "medium"
+    assert len(list(cache_dir.iterdir())) == 1
+
+    cfg.write_text("fail_on: critical\nurl: https://example.com\n", encoding="utf-8")
+    config = load_config(tmp_path, cache_dir)
+    assert (config.fail_on, config.url) == ("critical", "https://example.com")
+    # Not representable in JSON: parsed every time instead of cached wrongly
+    cfg.write_text("fail_on: low\nrules: [{id: X, when: 2024-01-01}]\n", encoding="utf-8")
+    assert load_config(tmp_path, cache_dir).rules[0]["when"].year == 2024
+    assert load_config(tmp_path, cache_dir).rules[0]["when"].year == 2024
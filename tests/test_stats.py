@@ -0,0 +1,48 @@
+from aminscan.secrets_scanner import PARALLEL_MIN_FILES, scan_secrets
+from aminscan.stats import ScanStats, StatsHook
+
+
+class RecordingHook(StatsHook):
+    def __init__(self):
+        self.files = []
+        self.report = None
+
+    def on_file(self, stats):
+        self.files.append(stats.file)
+
+    def on_finish(self, report):
+        self.report = report
+
+
+def _make_tree(base, n):
+    for i in range(n):
+        (base / f"mod{i}.py").write_text(
+            f"AWS = 'AKIA{i:016d}'\nTOKEN = 'R4nd0m_Str1ng_WithLotsOfVariety_1234567890+=='\n",
+            encoding="utf-8",
+        )
+
+
+def test_stats_do_not_change_findings_and_count_work(tmp_path):
+    _make_tree(tmp_path, 3)
+    hook = RecordingHook()
+    stats = ScanStats(top_n=2, hooks=[hook])
+
+    assert scan_secrets(tmp_path, jobs=1, stats=stats) == scan_secrets(tmp_path, jobs=1)
+    report = stats.finish()
+
+    assert report is hook.report
+    assert report["files"] == 3 and report["lines"] == 6
+    assert set(report["phases"]) >= {"walk", "read", "rule_match", "entropy", "dedupe"}
+    assert report["rules"]["SEC-AWS-ACCESS-KEY"]["hits"] == 3
+    assert report["rules"]["SEC-ENTROPY-TOKEN"]["hits"] == 3
+    assert len(report["slowest_files"]) == 2
+    assert sorted(hook.files) == sorted(str(p) for p in tmp_path.iterdir())
+
+
+def test_stats_collected_from_worker_processes(tmp_path):
+    _make_tree(tmp_path, PARALLEL_MIN_FILES + 4)
+    stats = ScanStats()
+    scan_secrets(tmp_path, jobs=2, stats=stats)
+    report = stats.as_dict()
+    assert report["files"] == PARALLEL_MIN_FILES + 4
+    assert report["rules"]["SEC-AWS-ACCESS-KEY"]["hits"] == PARALLEL_MIN_FILES + 4
@@ -0,0 +1,49 @@
+import json
+
+from aminscan.cli import summarize
+from aminscan.streaming import JsonlWriter, SarifWriter, SummaryCounter
+
+FINDINGS = [
+    {"rule_id": "SEC-AWS-ACCESS-KEY", "title": "Possible AWS Access Key ID", "severity": "high",
+     "confidence": "high", "file": "/repo/app.py", "line": 3, "evidence_masked": "AKI***NOP",
+     "recommendation": "Rotate."},
+    {"rule_id": "WEB-BANNER-SERVER", "title": "Server header disclosed", "severity": "low",
+     "confidence": "medium", "file": None, "line": None, "evidence_masked": "nginx",
+     "recommendation": "Hide it."},
+]
+
+
+def test_summary_counter_matches_summarize():
+    counter = SummaryCounter()
+    for f in FINDINGS:
+        counter.add(f)
+    assert counter.as_dict() == summarize(FINDINGS)
+    assert counter.hit_threshold("high") and not counter.hit_threshold("critical")
+
+
+def test_jsonl_writer(tmp_path):
+    out = tmp_path / "f.jsonl"
+    w = JsonlWriter(out)
+    for f in FINDINGS:
+        w.write(f)
+    w.close()
+    assert [json.loads(line) for line in out.read_text().splitlines()] == FINDINGS
+
+
+def test_sarif_writer(tmp_path):
+    from pathlib import Path
+
+    out = tmp_path / "f.sarif"
+    w = SarifWriter(out, "0.0.4", base=Path("/repo"))
+    w.write(FINDINGS[0])
+    # Partial output is already on disk before the run finishes
+    assert "SEC-AWS-ACCESS-KEY" in out.read_text()
+    w.write(FINDINGS[1])
+    w.close()
+
+    run = json.loads(out.read_text())["runs"][0]
+    assert [r["ruleId"] for r in run["results"]] == ["SEC-AWS-ACCESS-KEY", "WEB-BANNER-SERVER"]
+    loc = run["results"][0]["locations"][0]["physicalLocation"]
+    assert loc == {"artifactLocation": {"uri": "app.py"}, "region": {"startLine": 3}}
+    assert run["results"][0]["level"] == "error"
+    assert {r["id"] for r in run["tool"]["driver"]["rules"]} == {"SEC-AWS-ACCESS-KEY", "WEB-BANNER-SERVER"}
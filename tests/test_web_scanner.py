@@ -0,0 +1,155 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from aminscan import web_scanner
+from aminscan.web_scanner import scan_web, scan_web_many
+
+DELAY = 0.05
+
+
+class Server(ThreadingHTTPServer):
+    request_queue_size = 128
+    daemon_threads = True
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.lock = threading.Lock()
+        self.in_flight = self.peak = 0
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        with self.server.lock:
+            self.server.in_flight += 1
+            self.server.peak = max(self.server.peak, self.server.in_flight)
+        time.sleep(DELAY)
+        with self.server.lock:
+            self.server.in_flight -= 1
+        status = 200 if self.path in ("/", "/app/", "/.env") else 404
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", "2")
+        self.send_header("X-Frame-Options", "DENY")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+class SpaHandler(BaseHTTPRequestHandler):
+    """Answers every path with the same index.html, except a real .git/config and a huge backup."""
+
+    sent = {}
+
+    def _headers(self):
+        if self.path == "/.git/config":
+            body, ctype = b"[core]\n\trepositoryformatversion = 0\n", "text/plain"
+        elif self.path == "/backup.zip":
+            body, ctype = None, "application/zip"
+        else:
+            body, ctype = b"<!DOCTYPE html><html><body>app</body></html>", "text/html"
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body) if body is not None else 50 * 1024 * 1024))
+        self.end_headers()
+        return body
+
+    def do_HEAD(self):
+        self._headers()
+
+    def do_GET(self):
+        body = self._headers()
+        if body is not None:
+            self.wfile.write(body)
+            return
+        chunk = b"PK\x03\x04" + b"\0" * (64 * 1024 - 4)
+        sent = 0
+        try:
+            for _ in range(800):
+                self.wfile.write(chunk)
+                sent += len(chunk)
+        except OSError:
+            pass
+        finally:
+            SpaHandler.sent[self.path] = sent
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve(handler):
+    httpd = Server(("127.0.0.1", 0), handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+@pytest.fixture
+def started():
+    httpds = [_serve(StubHandler) for _ in range(2)]
+    yield httpds
+    for h in httpds:
+        h.shutdown()
+
+
+@pytest.fixture
+def servers(started):
+    return [f"http://127.0.0.1:{h.server_address[1]}" for h in started]
+
+
+def _strip(findings):
+    return [{k: v for k, v in f.items() if k != "target"} for f in findings]
+
+
+def test_many_targets_match_serial_and_run_concurrently(started, servers):
+    targets = [f"{s}{path}" for s in servers for path in ("/", "/app/", "/other/")]
+
+    serial = [f for t in targets for f in scan_web(t)]
+    assert [h.peak for h in started] == [1, 1]
+    concurrent = scan_web_many(targets, concurrency=16, per_host=4)
+
+    assert _strip(concurrent) == serial
+    assert {f["target"] for f in concurrent} == set(targets)
+    assert any(f["rule_id"] == "WEB-SENSITIVE-PATH" and f["evidence_masked"] == "/.env" for f in concurrent)
+    # Requests overlapped, within the per-host limit
+    assert all(1 < h.peak <= 4 for h in started)
+
+
+def test_unreachable_target_is_reported():
+    findings = scan_web_many(["http://127.0.0.1:9/"], timeout=1)
+    assert [f["rule_id"] for f in findings] == ["WEB-UNREACHABLE"]
+    assert findings[0]["target"] == "http://127.0.0.1:9/"
+
+
+def test_probes_skip_catch_all_pages_and_never_download_bodies():
+    httpd = _serve(SpaHandler)
+    try:
+        findings = scan_web(f"http://127.0.0.1:{httpd.server_address[1]}/")
+    finally:
+        httpd.shutdown()
+
+    probes = {f["evidence_masked"]: f["confidence"] for f in findings if f["rule_id"] == "WEB-SENSITIVE-PATH"}
+    assert probes == {"/.git/config": "high", "/backup.zip": "high"}
+    # The 50 MB archive was abandoned after the first chunks
+    assert SpaHandler.sent["/backup.zip"] < 5 * 1024 * 1024
+
+
+def test_a_busy_host_does_not_hold_up_the_others(servers, monkeypatch):
+    busy, other = servers
+    targets = [f"{busy}/t{i}/" for i in range(4)] + [f"{other}/"]
+    started = []
+    original = web_scanner.check_base
+
+    def check_base(sess, url, timeout):
+        started.append(url)
+        return original(sess, url, timeout)
+
+    monkeypatch.setattr(web_scanner, "check_base", check_base)
+    findings = scan_web_many(targets, concurrency=2, per_host=1)
+
+    # The second worker goes to the other host instead of queueing behind the first
+    assert started[:2] in (targets[:1] + targets[-1:], targets[-1:] + targets[:1])
+    assert {f["target"] for f in findings} == set(targets)